@@ -16,6 +16,7 @@ from debugMode.modeDemo import Mode, ModeDemo
 from log import Log
 from text.textManagement import EndOfRoundTextManagement, Button
 from transmission import Communication, SessionType
+from transmission.outboxDispatcher import OutboxDispatcher
 from transmissionCustom import CustomMember
 
 from transmissionCustom import REMOVE_AT_SIGN_IF_EXISTS
@@ -345,6 +346,7 @@ class AfterEveryRoundAdditionalActions:
         self.edenData = edenData
         self.database = database
         self.communication = communication
+        self.outboxDispatcher: OutboxDispatcher = OutboxDispatcher(database=database, communication=communication)
         self.modeDemo = modeDemo
         LOG_aeraa.debug("AfterEveryRoundAdditionalActions object created")
 
@@ -393,6 +395,10 @@ class AfterEveryRoundAdditionalActions:
             LOG_aeraa.exception("Error while getting rooms for round " + str(round) + ": " + str(e))
             return None
 
+    @staticmethod
+    def roundEndKey(room: Room) -> str:
+        return "roundEnd:" + str(room.roomID)
+
     def videoCallStillRunningSendMsg(self, room: Room):
         assert isinstance(room, Room), "room is not a Room object"
         try:
@@ -402,13 +408,15 @@ class AfterEveryRoundAdditionalActions:
             photoPath: str = endOfRoundTextManagement.endVideoChatImagePath()
             text: str = endOfRoundTextManagement.roundIsOverAndVideoIsRunning()
 
-            result: bool = self.communication.sendPhoto(sessionType=SessionType.BOT,
-                                                        chatId=room.roomTelegramID,
-                                                        photoPath=photoPath,
-                                                        caption=text)
+            # one goodbye message per room (the same key as in roundEndMsg)
+            result: int = self.outboxDispatcher.enqueue(messages=[self.outboxDispatcher.createMessage(
+                idempotencyKey=self.roundEndKey(room=room),
+                chatId=room.roomTelegramID,
+                text=text,
+                photoPath=photoPath)])
 
-            LOG_aeraa.debug("Last message to group(video stil running) sent to room " + str(room.roomID) +
-                      ". Result: " + str(result))
+            LOG_aeraa.debug("Last message to group(video stil running) enqueued for room " + str(room.roomID) +
+                      ". Enqueued: " + str(result))
         except Exception as e:
             LOG_aeraa.exception("Error while sending message to room " + str(room.roomID) + ": " + str(e))
 
@@ -432,11 +440,13 @@ class AfterEveryRoundAdditionalActions:
                     ]
                 ]
             )
-            result: bool = self.communication.sendMessage(sessionType=SessionType.BOT,
-                                                          chatId=room.roomTelegramID,
-                                                          text=text,
-                                                          inlineReplyMarkup=replyMarkup)
-            LOG_aeraa.debug("Last message to group sent to room " + str(room.roomID) + ". Result: " + str(result))
+            result: int = self.outboxDispatcher.enqueue(messages=[self.outboxDispatcher.createMessage(
+                idempotencyKey=self.roundEndKey(room=room),
+                chatId=room.roomTelegramID,
+                text=text,
+                inlineReplyMarkup=replyMarkup)])
+            LOG_aeraa.debug("Last message to group enqueued for room " + str(room.roomID) + ". Enqueued: " +
+                            str(result))
         except Exception as e:
             LOG_aeraa.exception("Error while sending message to room " + str(room.roomID) + ": " + str(e))
 
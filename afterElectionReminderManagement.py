@@ -3,12 +3,13 @@ from enum import Enum
 
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-from chain import EdenData
+from chain import EdenData, ActionIndex
+from chain.actionIndex import ACTION_ELECT_VIDEO
 from chain.dfuse import DfuseConnection, GraphQLApi, ResponseSuccessful
 from chain.stateElectionState import ElectCurrTable
 from constants import alert_message_time_upload_video, ReminderGroup, time_span_for_notification_upload_video, \
     telegram_bot_name, default_language, CurrentElectionState, eden_account
-from database import Database, Election, Reminder, ReminderSent, ReminderSendStatus
+from database import Database, Election, Reminder, ReminderSent
 from database.election import ElectionRound
 from database.participant import Participant
 from database.room import Room
@@ -19,7 +20,8 @@ from log import Log
 import gettext
 
 from text.textManagement import VideoReminderTextManagement, Button
-from transmission import Communication, SessionType
+from transmission import Communication
+from transmission.outboxDispatcher import OutboxDispatcher
 from transmissionCustom import ADD_AT_SIGN_IF_NOT_EXISTS
 
 _ = gettext.gettext
@@ -48,6 +50,8 @@ class AfterElectionReminderManagement:
 
             self.edenData = edenData
             self.communication = communication
+            self.outboxDispatcher: OutboxDispatcher = OutboxDispatcher(database=database, communication=communication)
+            self.actionIndex = ActionIndex(edenData=edenData, database=database)
 
             self.dateTimeManagement = DateTimeManagement(edenData=edenData)
             self.participants = []
@@ -256,36 +260,27 @@ class AfterElectionReminderManagement:
                 ]
             )
 
-            sendResponse: bool = False
+            # messages are enqueued to the outbox; reminderSent records are written by the outbox dispatcher
+            expiresAt: datetime = OutboxDispatcher.localExpiry(
+                deadline=reminder.dateTimeBefore + timedelta(minutes=time_span_for_notification_upload_video),
+                executionTime=self.setExecutionTime(modeDemo=modeDemo))
+            messages: list = []
             for member in particiapntsToNotify:
-                try:
-                    cSession = self.database.createCsesion(expireOnCommit=False)
-                    LOG.trace("Live mode is enabled, sending message to: " + member.telegramID)
-                    member.telegramID = ADD_AT_SIGN_IF_NOT_EXISTS(member.telegramID)
-                    sendResponse = self.communication.sendMessage(sessionType=SessionType.BOT,
-                                                                  chatId=member.telegramID,
-                                                                  text=uploadReminderText,
-                                                                  inlineReplyMarkup=replyMarkup)
-
-                    LOG.info("LiveMode; Is message sent successfully to " + member.telegramID + ": " + str(sendResponse)
-                             + ". Saving to the database under electionID: " + str(election.electionID))
-
-                    response: bool = self.database.createOrUpdateReminderSentRecord(reminder=reminder,
-                                                                                    accountName=member.accountName,
-                                                                                    sendStatus=ReminderSendStatus.SEND if sendResponse is True
-                                                                                    else ReminderSendStatus.ERROR,
-                                                                                    round=room.round,
-                                                                                    cSession=cSession)
-                    if response is True:
-                        self.database.commitCcession(session=cSession)
-                    else:
-                        self.database.rollbackCcession(session=cSession)
-                    self.database.removeCcession(session=cSession)
-                except Exception as e:
-                    LOG.exception("Exception in sendAndSyncWithDatabaseUploadVideoNotification.inside. Description: " +
-                                  str(e))
-                    self.database.rollbackCcession(session=cSession)
-                    self.database.removeCcession(session=cSession)
+                messages.append(self.outboxDispatcher.createMessage(
+                    idempotencyKey=OutboxDispatcher.reminderKey(reminder=reminder,
+                                                                accountName=member.accountName,
+                                                                round=room.round),
+                    chatId=ADD_AT_SIGN_IF_NOT_EXISTS(member.telegramID),
+                    text=uploadReminderText,
+                    inlineReplyMarkup=replyMarkup,
+                    reminder=reminder,
+                    accountName=member.accountName,
+                    round=room.round,
+                    expiresAt=expiresAt))
+            enqueued: int = self.outboxDispatcher.enqueue(messages=messages)
+            LOG.info("Upload video reminder enqueued for " + str(enqueued) + "/" + str(len(messages)) +
+                     " participants of room " +
+                     str(room.roomID) + " (electionID: " + str(election.electionID) + ")")
         except Exception as e:
             LOG.exception("Exception (in sendAndSyncWithDatabaseUploadVideoNotification): " + str(e))
 
@@ -478,9 +473,10 @@ class AfterElectionReminderManagement:
                       " to end time: " + str(endTime))
 
             for i in range(0, 3):
-                actionsVideoUploaded = self.edenData.getActionsVideoUploaded(contractAccount=account,
-                                                                         startTime=startTime,
-                                                                         endTime=endTime)
+                actionsVideoUploaded = self.actionIndex.getActions(contractAccount=account,
+                                                                   actionName=ACTION_ELECT_VIDEO,
+                                                                   startTime=startTime,
+                                                                   endTime=endTime)
                 if isinstance(actionsVideoUploaded, ResponseSuccessful):
                     return actionsVideoUploaded
             return actionsVideoUploaded
@@ -1,10 +1,12 @@
 from .atomicAssets import AtomicAssetsData
 from .eden import EdenData
+from .actionIndex import ActionIndex
 #from .dfuse.connection import Response, ResponseSuccessful, ResponseError
 
 __all__ = [
     'AtomicAssetsData',
-    'EdenData'#,
+    'EdenData',
+    'ActionIndex'#,
     #'Response',
     #'ResponseSuccessful',
     #'ResponseError'
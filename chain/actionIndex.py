@@ -0,0 +1,251 @@
+import json
+from datetime import datetime
+
+from chain.dfuse import Response, ResponseSuccessful, ResponseError
+from chain.dfuse.graphqlApi import GraphQLApi, FIELDS_BLOCK_NAMED_ACTIONS_CREATED_ACTIONS_DATA, actionsQuery, \
+    demultiplexActions
+from chain.eden import EdenData, ACTION_ELECT_VOTE, ACTION_GIVE_SBT, ACTION_INDUCTED, ACTION_ELECT_VIDEO
+from database import Database, ChainAction, ChainActionCursor
+from log import Log
+
+LOG = Log(className="ActionIndex")
+
+
+class ActionIndexException(Exception):
+    pass
+
+
+# actions on eden contract that are indexed in local database
+INDEXED_ACTIONS: tuple = (ACTION_ELECT_VOTE, ACTION_GIVE_SBT, ACTION_INDUCTED, ACTION_ELECT_VIDEO)
+# actions read also from reversible blocks (votes are counted live); all others only from irreversible blocks
+REVERSIBLE_ACTIONS: tuple = (ACTION_ELECT_VOTE,)
+
+TRACE = 'trace'
+BLOCK = 'block'
+NUM = 'num'
+ID = 'id'
+
+
+class ActionIndex:
+    """Local (database) index of contract actions. For every action there is a cursor with indexed block range -
+    only blocks outside of that range are fetched from graphql server, everything else is read from database.
+    Only irreversible blocks are stored; the reversible tail is always fetched from the server."""
+
+    def __init__(self, edenData: EdenData, database: Database):
+        assert isinstance(edenData, EdenData), "edenData must be type of EdenData"
+        assert isinstance(database, Database), "database must be type of Database"
+        self.edenData = edenData
+        self.database = database
+
+    def toChainAction(self, contractAccount: str, actionName: str, result: dict) -> ChainAction:
+        """Create database object from one result of searchTransactionsForward"""
+        if TRACE not in result or BLOCK not in result[TRACE] or ID not in result[TRACE]:
+            raise ActionIndexException("Trace, block or id not in result: " + str(result))
+        return ChainAction(contractAccount=contractAccount,
+                           actionName=actionName,
+                           blockNum=int(result[TRACE][BLOCK][NUM]),
+                           transactionID=result[TRACE][ID],
+                           trace=json.dumps(result))
+
+    def indexRange(self, contractAccount: str, actionNames: list[str], startBlockNum: int, endBlockNum: int,
+                   cursors: dict):
+        """Fetch actions in (irreversible) block range with one combined search and store them page by page. When
+        range continues the indexed range of the action (or there is nothing indexed yet) cursor is moved after every
+        page, otherwise (backfill) cursor is moved only when whole range is stored"""
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionNames, list), "actionNames must be type of list"
+        assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
+        assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
+        assert isinstance(cursors, dict), "cursors must be type of dict"
+
+        LOG.debug("Index actions " + str(actionNames) + " from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum))
+        isForward: dict = {}
+        firstBlockNum: dict = {}
+        lastBlockNum: dict = {}
+        for actionName in actionNames:
+            cursor: ChainActionCursor = cursors.get(actionName)
+            isForward[actionName] = cursor is None or startBlockNum == cursor.lastBlockNum + 1
+            firstBlockNum[actionName] = startBlockNum if cursor is None else cursor.firstBlockNum
+            lastBlockNum[actionName] = startBlockNum - 1 if cursor is None else cursor.lastBlockNum
+
+        graphql: GraphQLApi = self.edenData.graphqlApi
+        for page in graphql.searchTransactionsForward(query=actionsQuery(account=contractAccount,
+                                                                         actionNames=actionNames),
+                                                      startBlockNum=startBlockNum,
+                                                      endBlockNum=endBlockNum,
+                                                      fields=FIELDS_BLOCK_NAMED_ACTIONS_CREATED_ACTIONS_DATA):
+            # next page can still have transactions from the last block in this page
+            pageLastBlockNum: int = max(int(result[TRACE][BLOCK][NUM]) for result in page) - 1
+            for actionName, results in demultiplexActions(report=page, actionNames=actionNames).items():
+                chainActions: list[ChainAction] = [self.toChainAction(contractAccount=contractAccount,
+                                                                      actionName=actionName,
+                                                                      result=result) for result in results]
+                if isForward[actionName]:
+                    lastBlockNum[actionName] = max(lastBlockNum[actionName], pageLastBlockNum)
+                self.database.saveChainActions(contractAccount=contractAccount,
+                                               actionName=actionName,
+                                               chainActions=chainActions,
+                                               firstBlockNum=firstBlockNum[actionName],
+                                               lastBlockNum=lastBlockNum[actionName])
+
+        # whole range is stored
+        for actionName in actionNames:
+            self.database.saveChainActions(contractAccount=contractAccount,
+                                           actionName=actionName,
+                                           chainActions=[],
+                                           firstBlockNum=min(firstBlockNum[actionName], startBlockNum),
+                                           lastBlockNum=max(lastBlockNum[actionName], endBlockNum)
+                                           if isForward[actionName] else lastBlockNum[actionName])
+
+    def getCursors(self, contractAccount: str, actionNames: list[str]) -> dict:
+        return {actionName: self.database.getChainActionCursor(contractAccount=contractAccount,
+                                                               actionName=actionName)
+                for actionName in actionNames}
+
+    def indexMissingRanges(self, contractAccount: str, ranges: dict, cursors: dict):
+        """ranges: {(startBlockNum, endBlockNum): [actionName, ...]} - actions with the same missing range are
+        fetched together"""
+        for (startBlockNum, endBlockNum), actionNames in sorted(ranges.items()):
+            self.indexRange(contractAccount=contractAccount,
+                            actionNames=sorted(actionNames),
+                            startBlockNum=startBlockNum,
+                            endBlockNum=endBlockNum,
+                            cursors=cursors)
+
+    def update(self, contractAccount: str, actionNames: list[str], startBlockNum: int, endBlockNum: int) -> int:
+        """Make sure that (irreversible part of) block range is indexed for all actions. Returns last indexed block
+        number"""
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionNames, list), "actionNames must be type of list"
+        assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
+        assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
+
+        lastIrreversibleBlockNum = self.edenData.getChainLastIrreversibleBlockNumber()
+        if isinstance(lastIrreversibleBlockNum, ResponseError):
+            raise ActionIndexException("Could not get last irreversible block: " + str(lastIrreversibleBlockNum.error))
+        indexEndBlockNum: int = min(endBlockNum, lastIrreversibleBlockNum)
+
+        # first pass - not indexed yet and backfill (requested range starts before indexed range)
+        cursors: dict = self.getCursors(contractAccount=contractAccount, actionNames=actionNames)
+        ranges: dict = {}
+        for actionName, cursor in cursors.items():
+            if cursor is None:
+                if startBlockNum <= indexEndBlockNum:
+                    ranges.setdefault((startBlockNum, indexEndBlockNum), []).append(actionName)
+            elif startBlockNum < cursor.firstBlockNum:
+                # whole gap - indexed range must stay contiguous
+                ranges.setdefault((startBlockNum, cursor.firstBlockNum - 1), []).append(actionName)
+        if len(ranges) > 0:
+            self.indexMissingRanges(contractAccount=contractAccount, ranges=ranges, cursors=cursors)
+            cursors = self.getCursors(contractAccount=contractAccount, actionNames=actionNames)
+
+        # second pass - only blocks after last indexed block
+        ranges = {}
+        for actionName, cursor in cursors.items():
+            if cursor is not None and indexEndBlockNum > cursor.lastBlockNum:
+                ranges.setdefault((cursor.lastBlockNum + 1, indexEndBlockNum), []).append(actionName)
+        if len(ranges) > 0:
+            self.indexMissingRanges(contractAccount=contractAccount, ranges=ranges, cursors=cursors)
+        return indexEndBlockNum
+
+    def getActionsByBlockRange(self, contractAccount: str, actionNames: set[str], startBlockNum: int,
+                               endBlockNum: int) -> Response:
+        """Returns {actionName: results}; results are in the same format as graphql server returns them"""
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionNames, set), "actionNames must be type of set"
+        assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
+        assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
+        try:
+            for actionName in actionNames:
+                if actionName not in INDEXED_ACTIONS:
+                    return ResponseError("Action '" + actionName + "' is not indexed")
+            if len(actionNames) == 0:
+                return ResponseError("Set of action names is empty")
+            if startBlockNum > endBlockNum:
+                return ResponseError("Start block is after end block")
+
+            actionNamesSorted: list[str] = sorted(actionNames)
+            lastIndexedBlockNum: int = self.update(contractAccount=contractAccount,
+                                                   actionNames=actionNamesSorted,
+                                                   startBlockNum=startBlockNum,
+                                                   endBlockNum=endBlockNum)
+
+            toReturn: dict = {}
+            for actionName in actionNamesSorted:
+                chainActions: list[ChainAction] = self.database.getChainActions(
+                    contractAccount=contractAccount,
+                    actionName=actionName,
+                    startBlockNum=startBlockNum,
+                    endBlockNum=min(endBlockNum, lastIndexedBlockNum))
+                toReturn[actionName] = [json.loads(chainAction.trace) for chainAction in chainActions]
+                LOG.debug("Action '" + actionName + "'; from index: " + str(len(toReturn[actionName])))
+
+            if endBlockNum > lastIndexedBlockNum:
+                # tail after the last irreversible block - not stored, always fetched; only votes are read from
+                # reversible blocks, other actions are returned when they become irreversible
+                graphql: GraphQLApi = self.edenData.graphqlApi
+                for irreversibleOnly in (False, True):
+                    tailActionNames: list[str] = [actionName for actionName in actionNamesSorted
+                                                  if (actionName in REVERSIBLE_ACTIONS) is not irreversibleOnly]
+                    if len(tailActionNames) == 0:
+                        continue
+                    tail: Response = graphql.getActions(account=contractAccount,
+                                                        actionNames=tailActionNames,
+                                                        startBlockNum=max(startBlockNum, lastIndexedBlockNum + 1),
+                                                        endBlockNum=endBlockNum,
+                                                        irreversibleOnly=irreversibleOnly)
+                    if isinstance(tail, ResponseError):
+                        return tail
+                    for actionName, results in demultiplexActions(report=tail.data,
+                                                                  actionNames=tailActionNames).items():
+                        LOG.debug("Action '" + actionName + "'; from blocks after the index: " + str(len(results)))
+                        toReturn[actionName].extend(results)
+            return ResponseSuccessful(data=toReturn)
+        except Exception as e:
+            LOG.exception("Error in ActionIndex.getActionsByBlockRange: " + str(e))
+            return ResponseError("Error in ActionIndex.getActionsByBlockRange: " + str(e))
+
+    def getActionsOfMany(self, contractAccount: str, actionNames: set[str], startTime: datetime, endTime: datetime) \
+            -> Response:
+        """Returns {actionName: results} for all actions in the same time range"""
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionNames, set), "actionNames must be type of set"
+        assert isinstance(startTime, datetime), "startTime must be type of datetime"
+        assert isinstance(endTime, datetime), "endTime must be type of datetime"
+        try:
+            if startTime > endTime:
+                return ResponseError("Start time is after end time")
+
+            startTimeResponse = self.edenData.getBlockNumOfTimestamp(timestamp=startTime)
+            if isinstance(startTimeResponse, ResponseSuccessful) is False:
+                return ResponseError("Could not get block number of start time:" + str(startTime))
+
+            endTimeResponse = self.edenData.getBlockNumOfTimestamp(timestamp=endTime)
+            if isinstance(endTimeResponse, ResponseSuccessful) is False:
+                return ResponseError("Could not get block number of end time:" + str(endTime))
+
+            if isinstance(startTimeResponse.data, int) is False or isinstance(endTimeResponse.data, int) is False:
+                return ResponseError("Could not get block number of start time or end time - wrong type")
+
+            return self.getActionsByBlockRange(contractAccount=contractAccount,
+                                               actionNames=actionNames,
+                                               startBlockNum=startTimeResponse.data,
+                                               endBlockNum=endTimeResponse.data)
+        except Exception as e:
+            LOG.exception("Error in ActionIndex.getActionsOfMany: " + str(e))
+            return ResponseError("Error in ActionIndex.getActionsOfMany: " + str(e))
+
+    def getActions(self, contractAccount: str, actionName: str, startTime: datetime, endTime: datetime) -> Response:
+        """Returns results of one action in the same format as graphql server returns them"""
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionName, str), "actionName must be type of str"
+        assert isinstance(startTime, datetime), "startTime must be type of datetime"
+        assert isinstance(endTime, datetime), "endTime must be type of datetime"
+        response: Response = self.getActionsOfMany(contractAccount=contractAccount,
+                                                   actionNames={actionName},
+                                                   startTime=startTime,
+                                                   endTime=endTime)
+        if isinstance(response, ResponseError):
+            return response
+        return ResponseSuccessful(data=response.data[actionName])
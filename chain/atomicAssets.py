@@ -1,9 +1,7 @@
 import json
 from datetime import datetime
 
-import requests
-
-from chain.dfuse import DfuseConnection, ResponseError, Response, ResponseSuccessful
+from chain.dfuse import DfuseConnection, ResponseError, Response, ResponseSuccessful, Upstream
 from constants import atomic_assets_account, dfuse_api_key, atomic_assets_url
 from database import Database
 from log.log import Log
@@ -70,7 +68,9 @@ class AtomicAssetsData:
 
             COLLECTION_NAME = 'genesis.eden'
             #url = requests.get("https://eos.api.atomicassets.io/atomicassets/v1/templates/" + COLLECTION_NAME + "/" + str(templateID))
-            url = requests.get(atomic_assets_url + "/atomicassets/v1/templates/" + COLLECTION_NAME + "/" + str(templateID))
+            url = self.dfuseConnection.session(Upstream.ATOMIC_ASSETS).get(
+                atomic_assets_url + "/atomicassets/v1/templates/" + COLLECTION_NAME + "/" + str(templateID),
+                timeout=self.dfuseConnection.timeout)
 
             if url.status_code == 200:
                 jsonData = json.loads(url.text)
@@ -95,7 +95,9 @@ class AtomicAssetsData:
             LOG.info("Get participant telegram ID on height: " + str(height) if height is not None else "<current/live>")
 
 
-            url = requests.get(atomic_assets_url + "/atomicmarket/v1/assets/" + asset_id)
+            url = self.dfuseConnection.session(Upstream.ATOMIC_ASSETS).get(
+                atomic_assets_url + "/atomicmarket/v1/assets/" + asset_id,
+                timeout=self.dfuseConnection.timeout)
 
             if url.status_code == 200:
                 jsonData = json.loads(url.text)
@@ -144,8 +146,9 @@ class AtomicAssetsData:
         try:
             LOG.info("Get template from templateID: " + str(templateID) + " and collection: " + collectionName)
 
-            url = requests\
-                .get(atomic_assets_url + "/atomicassets/v1/templates/" + collectionName + "/" + str(templateID))
+            url = self.dfuseConnection.session(Upstream.ATOMIC_ASSETS)\
+                .get(atomic_assets_url + "/atomicassets/v1/templates/" + collectionName + "/" + str(templateID),
+                     timeout=self.dfuseConnection.timeout)
             if url.status_code == 200:
                 jsonData = json.loads(url.text)
                 if jsonData['success']:
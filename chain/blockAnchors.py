@@ -0,0 +1,108 @@
+import bisect
+import math
+import threading
+from datetime import datetime, timedelta
+
+from constants import eos_block_interval, block_anchor_tolerance, block_anchor_max_extrapolation
+from database import Database, BlockAnchor
+from log import Log
+
+LOG = Log(className="BlockAnchors")
+
+# anchors kept in memory - the oldest are dropped first (they are still in database when persisted)
+MAX_ANCHORS_IN_MEMORY: int = 10000
+
+
+class BlockAnchors:
+    """Known (block number, block timestamp) pairs - kept in memory and in database. Block number of timestamp is
+    calculated by interpolation between two anchors (or extrapolation from the last one) when result is precise
+    enough, otherwise None is returned and caller should ask the server (and add the answer as new anchor)"""
+
+    def __init__(self, database: Database, blockInterval: float = eos_block_interval,
+                 tolerance: int = block_anchor_tolerance, maxExtrapolation: int = block_anchor_max_extrapolation):
+        assert isinstance(database, Database), "database must be type of Database"
+        assert isinstance(blockInterval, float), "blockInterval must be type of float"
+        assert isinstance(tolerance, int), "tolerance must be type of int"
+        assert isinstance(maxExtrapolation, int), "maxExtrapolation must be type of int"
+        self.database = database
+        self.blockInterval = blockInterval
+        self.tolerance = tolerance
+        self.maxExtrapolation = maxExtrapolation
+
+        self._lock = threading.Lock()
+        # sorted by timestamp (and block number - both grow together)
+        self._timestamps: list[datetime] = []
+        self._blockNums: list[int] = []
+
+    def _addToMemory(self, blockNum: int, timestamp: datetime):
+        with self._lock:
+            index: int = bisect.bisect_left(self._timestamps, timestamp)
+            if index < len(self._timestamps) and self._timestamps[index] == timestamp:
+                return
+            self._timestamps.insert(index, timestamp)
+            self._blockNums.insert(index, blockNum)
+            if len(self._timestamps) > MAX_ANCHORS_IN_MEMORY:
+                del self._timestamps[0]
+                del self._blockNums[0]
+
+    def add(self, blockNum: int, timestamp: datetime, persist: bool = True):
+        assert isinstance(blockNum, int), "blockNum must be type of int"
+        assert isinstance(timestamp, datetime), "timestamp must be type of datetime"
+        assert isinstance(persist, bool), "persist must be type of bool"
+        self._addToMemory(blockNum=blockNum, timestamp=timestamp)
+        if persist:
+            self.database.saveBlockAnchor(blockNum=blockNum, timestamp=timestamp)
+
+    def _aroundInMemory(self, timestamp: datetime) -> tuple:
+        with self._lock:
+            index: int = bisect.bisect_right(self._timestamps, timestamp)
+            before = (self._blockNums[index - 1], self._timestamps[index - 1]) if index > 0 else None
+            if before is not None and before[1] == timestamp:
+                return before, before
+            after = (self._blockNums[index], self._timestamps[index]) if index < len(self._timestamps) else None
+            return before, after
+
+    def calculate(self, timestamp: datetime, before: tuple, after: tuple) -> int:
+        """Block number of first block at or after timestamp; before/after are (blockNum, timestamp) or None.
+        Returns None when anchors are not close enough"""
+        if before is not None and before[1] == timestamp:
+            return before[0]
+        if after is not None and after[1] == timestamp:
+            return after[0]
+        if before is None:
+            return None
+
+        slots: int = math.ceil((timestamp - before[1]).total_seconds() / self.blockInterval)
+        blockNum: int = before[0] + slots
+        if after is not None:
+            # every slot without block (missed by producer) moves result for max. one block
+            expectedBlocks: int = round((after[1] - before[1]).total_seconds() / self.blockInterval)
+            missed: int = expectedBlocks - (after[0] - before[0])
+            if missed > self.tolerance:
+                return None
+            return min(blockNum, after[0])
+        if timestamp - before[1] > timedelta(seconds=self.maxExtrapolation):
+            return None
+        return blockNum
+
+    def getBlockNum(self, timestamp: datetime) -> int:
+        """Returns block number of timestamp or None if it cannot be calculated from known anchors"""
+        assert isinstance(timestamp, datetime), "timestamp must be type of datetime"
+        before, after = self._aroundInMemory(timestamp=timestamp)
+        blockNum: int = self.calculate(timestamp=timestamp, before=before, after=after)
+        if blockNum is not None:
+            LOG.debug("Block number of " + str(timestamp) + " calculated from anchors (memory): " + str(blockNum))
+            return blockNum
+
+        anchorBefore, anchorAfter = self.database.getBlockAnchorsAround(timestamp=timestamp)
+        for anchor in (anchorBefore, anchorAfter):
+            if isinstance(anchor, BlockAnchor):
+                self._addToMemory(blockNum=int(anchor.blockNum), timestamp=anchor.timestamp)
+        blockNum = self.calculate(timestamp=timestamp,
+                                  before=(int(anchorBefore.blockNum), anchorBefore.timestamp)
+                                  if anchorBefore is not None else None,
+                                  after=(int(anchorAfter.blockNum), anchorAfter.timestamp)
+                                  if anchorAfter is not None else None)
+        if blockNum is not None:
+            LOG.debug("Block number of " + str(timestamp) + " calculated from anchors (database): " + str(blockNum))
+        return blockNum
@@ -0,0 +1,45 @@
+import os
+import threading
+from datetime import datetime
+
+from chain.dfuse import Response, ResponseSuccessful
+from log import Log
+
+LOG = Log(className="ChainSnapshot")
+
+
+class ChainSnapshot:
+    """Chain data read in one tick of the bot - every table (account, table, scope, height, primary key) and head
+    info is fetched only once per tick and shared between all managers. Snapshot is valid only in the process (and
+    tick) where it was created"""
+
+    def __init__(self):
+        self.created: datetime = datetime.now()
+        self._pid: int = os.getpid()
+        self._lock = threading.Lock()
+        self._data: dict = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def isValid(self) -> bool:
+        return self._pid == os.getpid()
+
+    def get(self, key: tuple, fetch) -> Response:
+        """Returns stored response or calls fetch() and stores its response; errors are never stored"""
+        assert isinstance(key, tuple), "key must be type of tuple"
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                return self._data[key]
+        response = fetch()
+        with self._lock:
+            self.misses += 1
+            if isinstance(response, ResponseSuccessful):
+                self._data[key] = response
+        return response
+
+    def __str__(self):
+        return "ChainSnapshot created: " + str(self.created) + \
+               ", entries: " + str(len(self._data)) + \
+               ", hits: " + str(self.hits) + \
+               ", misses: " + str(self.misses)
@@ -3,7 +3,9 @@ from .connection import DfuseConnection, \
     ResponseError, \
     DfuseError, \
     ResponseException, \
-    Response
+    Response, \
+    Upstream, \
+    parseChainTimestamp
 
 from .graphqlApi import GraphQLApi, GraphQLApiException
 
@@ -14,6 +16,8 @@ __all__ = [
     'Response',
     'DfuseError',
     'ResponseException',
+    'Upstream',
+    'parseChainTimestamp',
     'GraphQLApi',
     'GraphQLApiException'
 ]
\ No newline at end of file
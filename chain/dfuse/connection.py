@@ -1,11 +1,19 @@
 import json
+import os
+import threading
 from datetime import date, timedelta, datetime
+from enum import Enum
 import time as t
 from http.client import HTTPSConnection
 import requests as requests
+from requests.adapters import HTTPAdapter
 from abieos import EosAbiSerializer
 
-from constants import dfuse_url, dfuse_api_key, eos_node_url
+import grpc
+from chain.dfuse.graphqlV1 import graphql_pb2_grpc
+
+from constants import dfuse_url, dfuse_api_key, eos_node_url, dfuse_graphql_url, http_pool_connections, \
+    http_pool_max_size, http_connect_timeout, http_read_timeout
 from database.database import Database as Database1
 
 from log import Log
@@ -73,11 +81,33 @@ class ResponseError(Response):
     def error(self) -> str:
         return self._error
 
+class Upstream(Enum):
+    """Servers we are talking to over http - every server has its own keep-alive session"""
+    DFUSE = 1
+    EOS_NODE = 2
+    ATOMIC_ASSETS = 3
+
+
+def parseChainTimestamp(timestamp: str) -> datetime:
+    """Parse block timestamp returned by dfuse/eos node; '2022-10-08T14:59:00.500Z' (fraction and 'Z' are
+    optional) - returned datetime is naive and in UTC as every other chain time in the bot"""
+    assert isinstance(timestamp, str), "timestamp must be type of str"
+    timestamp = timestamp.rstrip('Z')
+    if '.' in timestamp:
+        return datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%f')
+    return datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S')
+
+
 class DfuseConnection:
     dfuseToken: str = None
 
-    def __init__(self, dfuseApiKey: str, database: Database1):
+    def __init__(self, dfuseApiKey: str, database: Database1, poolConnections: int = http_pool_connections,
+                 poolMaxSize: int = http_pool_max_size,
+                 timeout: tuple[float, float] = (http_connect_timeout, http_read_timeout)):
         assert isinstance(database, Database1), "database must be type of Database"
+        assert isinstance(poolConnections, int), "poolConnections must be type of int"
+        assert isinstance(poolMaxSize, int), "poolMaxSize must be type of int"
+        assert isinstance(timeout, tuple) and len(timeout) == 2, "timeout must be tuple (connect, read)"
         if len(dfuseApiKey) == 0:
             LOG.exception("API key is null")
             raise DfuseError("API key is null")
@@ -86,6 +116,20 @@ class DfuseConnection:
         # initialize counter
         self.counter = Counter()
 
+        # keep-alive sessions (one per upstream server); created on first use
+        self.poolConnections = poolConnections
+        self.poolMaxSize = poolMaxSize
+        self.timeout = timeout
+        self._sessions: dict[Upstream, requests.Session] = {}
+        self._sessionsPid: int = os.getpid()
+
+        # long-lived gRPC channel to dfuse graphql server; rebuilt only when dfuse token rotates
+        self._grpcLock = threading.Lock()
+        self._grpcChannel: grpc.Channel = None
+        self._grpcStub: graphql_pb2_grpc.GraphQLStub = None
+        self._grpcToken: str = None
+        self._grpcPid: int = None
+
         ########
         # TODO: make this more universal! to work with more accounts, more heights, etc
         #account="genesis.eden"
@@ -162,6 +206,67 @@ class DfuseConnection:
         except Exception as e:
             LOG.exception("Exception thrown when called initContractDeserializer; Description: " + str(e))
 
+    def session(self, upstream: Upstream) -> requests.Session:
+        """Returns pooled keep-alive session for the upstream server. Sessions are not shared between processes -
+        after fork (pyrogram handler process) new sessions are created, so sockets are never used by two processes"""
+        assert isinstance(upstream, Upstream), "upstream must be type of Upstream"
+        if self._sessionsPid != os.getpid():
+            LOG.debug("Process changed, dropping inherited http sessions")
+            self._sessions = {}
+            self._sessionsPid = os.getpid()
+
+        session = self._sessions.get(upstream)
+        if session is None:
+            LOG.debug("Creating http session for upstream: " + str(upstream.name))
+            session = requests.Session()
+            # retrying is done by DfuseConnection.retry, adapter should not retry on its own
+            adapter = HTTPAdapter(pool_connections=self.poolConnections,
+                                  pool_maxsize=self.poolMaxSize,
+                                  max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._sessions[upstream] = session
+        return session
+
+    def closeSessions(self):
+        for upstream, session in self._sessions.items():
+            try:
+                session.close()
+            except Exception as e:
+                LOG.exception("Exception thrown when closing session " + str(upstream.name) + "; Description: " +
+                              str(e))
+        self._sessions = {}
+
+    def graphqlStub(self) -> graphql_pb2_grpc.GraphQLStub:
+        """Returns stub on the shared gRPC channel. Channel is (re)built when there is none yet, when dfuse token
+        has been changed since the channel was created or when we are in another process (after fork)"""
+        if self.dfuseToken is None:
+            LOG.exception("Dfuse token is not set, cannot create gRPC channel")
+            raise DfuseError("Dfuse token is not set, cannot create gRPC channel")
+
+        with self._grpcLock:
+            if self._grpcStub is not None and \
+                    self._grpcToken == self.dfuseToken and \
+                    self._grpcPid == os.getpid():
+                return self._grpcStub
+
+            if self._grpcChannel is not None and self._grpcPid == os.getpid():
+                LOG.debug("Dfuse token rotated, closing old gRPC channel")
+                try:
+                    self._grpcChannel.close()
+                except Exception as e:
+                    LOG.exception("Exception thrown when closing gRPC channel; Description: " + str(e))
+
+            LOG.debug("Creating gRPC channel for dfuse graphql server")
+            credentials = grpc.access_token_call_credentials(self.dfuseToken)
+            self._grpcChannel = grpc.secure_channel(target=dfuse_graphql_url,
+                                                    credentials=grpc.composite_channel_credentials(
+                                                        grpc.ssl_channel_credentials(), credentials))
+            self._grpcStub = graphql_pb2_grpc.GraphQLStub(self._grpcChannel)
+            self._grpcToken = self.dfuseToken
+            self._grpcPid = os.getpid()
+            return self._grpcStub
+
     def headers(self) -> {}:
         return {'Authorization': 'Bearer ' + self.dfuseToken}
 
@@ -205,10 +310,10 @@ class DfuseConnection:
                 parameters.update({"block_num": height})
 
             LOG.debug("Request.get on path:" + path)
-            result = DfuseConnection.retry(lambda: requests.get(
+            result = DfuseConnection.retry(lambda: self.session(Upstream.DFUSE).get(
                 self.link(path=path),
                 params=parameters,
-                headers=self.headers(), verify=False),
+                headers=self.headers(), verify=False, timeout=self.timeout),
                 counterObj=self.counter)
 
             abiHex = json.loads(result.text)
@@ -291,10 +396,10 @@ class DfuseConnection:
                 parameters.update({"block_num": height})
 
             LOG.debug("Request.get on path:" + path)
-            result = DfuseConnection.retry(lambda: requests.get(
+            result = DfuseConnection.retry(lambda: self.session(Upstream.DFUSE).get(
                 self.link(path=path),
                 params=parameters,
-                headers=self.headers(), verify=False),
+                headers=self.headers(), verify=False, timeout=self.timeout),
                 counterObj=self.counter)
             j = json.loads(result.text)
             if result.status_code == 200:
@@ -312,11 +417,12 @@ class DfuseConnection:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getTableRows; Description: " + str(e))
 
-    def getBlockHeightFromTimestamp(self, timestamp: datetime) -> Response:
+    def getBlockFromTimestamp(self, timestamp: datetime) -> Response:
+        """Returns (block number, block timestamp) of the first block produced at or after timestamp"""
         try:
             path = '/v0/block_id/by_time'
             LOG.info("Path: " + path)
-            LOG.info("Get block height from timestamp: " + timestamp.isoformat())
+            LOG.info("Get block from timestamp: " + timestamp.isoformat())
 
             parameters = dict({
                 'time': timestamp.isoformat(),
@@ -324,23 +430,32 @@ class DfuseConnection:
             })
 
             LOG.debug("Request.get on path:" + path)
-            result = DfuseConnection.retry(lambda: requests.get(
+            result = DfuseConnection.retry(lambda: self.session(Upstream.DFUSE).get(
                 self.link(path=path),
                 params=parameters,
-                headers=self.headers(), verify=False),
+                headers=self.headers(), verify=False, timeout=self.timeout),
                 counterObj=self.counter)
 
             j = json.loads(result.text)
             if result.status_code == 200:
                 LOG.success("Status code:200")
-                return ResponseSuccessful(data=j.get('block').get('num'))
+                block: dict = j.get('block')
+                blockTime: datetime = parseChainTimestamp(block.get('time')) if block.get('time') is not None \
+                    else None
+                return ResponseSuccessful(data=(block.get('num'), blockTime))
             else:
                 LOG.error("Status code: " + str(result.status_code) + " Error: " + j.get("message") + " " +
                           json.dumps(j.get("details")))
                 return ResponseError(j.get("message") + " " + json.dumps(j.get("details")))
         except Exception as e:
             LOG.exception(str(e))
-            return ResponseError("Exception thrown when called getBlockHeightFromTimestamp; Description: " + str(e))
+            return ResponseError("Exception thrown when called getBlockFromTimestamp; Description: " + str(e))
+
+    def getBlockHeightFromTimestamp(self, timestamp: datetime) -> Response:
+        response: Response = self.getBlockFromTimestamp(timestamp=timestamp)
+        if isinstance(response, ResponseSuccessful):
+            return ResponseSuccessful(data=response.data[0])
+        return response
 
 
     def getTable(self, account: str, table: str, scope: str = None, height: int = None, dateTime: datetime = None,
@@ -370,10 +485,10 @@ class DfuseConnection:
                 parameters.update({"block_num": height})
 
             LOG.debug("Request.get on path:" + path)
-            result = DfuseConnection.retry(lambda: requests.get(
+            result = DfuseConnection.retry(lambda: self.session(Upstream.DFUSE).get(
                 self.link(path=path),
                 params=parameters,
-                headers=self.headers(), verify=False),
+                headers=self.headers(), verify=False, timeout=self.timeout),
                 counterObj=self.counter)
             j = json.loads(result.text)
             if result.status_code == 200:
@@ -405,10 +520,10 @@ class DfuseConnection:
             LOG.info("Search transaction")
 
             LOG.debug("Request.get on path:" + path)
-            result = DfuseConnection.retry(lambda: requests.get(
+            result = DfuseConnection.retry(lambda: self.session(Upstream.DFUSE).get(
                 self.link(path=path),
                 params={},
-                headers=self.headers(), verify=False),
+                headers=self.headers(), verify=False, timeout=self.timeout),
                 counterObj=self.counter)
             j = json.loads(result.text)
             if result.status_code == 200:
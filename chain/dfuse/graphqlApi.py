@@ -3,12 +3,10 @@ import json
 from google.protobuf.struct_pb2 import Struct
 
 from chain.dfuse import DfuseConnection, ResponseError, Response, ResponseSuccessful
-from constants import dfuse_graphql_url
+from constants import graphql_page_size
 from log import Log
 import ssl
 
-import grpc
-from chain.dfuse.graphqlV1 import graphql_pb2_grpc
 from chain.dfuse.graphqlV1.graphql_pb2 import Request
 
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -20,370 +18,292 @@ class GraphQLApiException(Exception):
     pass
 
 
+_ACTION: str = "searchTransactionsForward"
+_CURSOR: str = "cursor"
+_RESULTS: str = "results"
+
+# fields selectors - what we want to get back from every search result
+FIELDS_ACTIONS_DATA: str = '''
+    trace {
+      id
+      matchingActions {
+        data
+      }
+    }
+'''
+
+FIELDS_BLOCK_ACTIONS_DATA: str = '''
+    trace {
+      block {
+        num
+        confirmed
+        timestamp
+      }
+      id
+      matchingActions {
+        data
+      }
+    }
+'''
+
+FIELDS_BLOCK_ACTIONS_CREATED_ACTIONS_DATA: str = '''
+    trace {
+      block {
+        num
+        confirmed
+        timestamp
+      }
+      id
+      matchingActions {
+        data
+        createdActions {
+          data
+        }
+      }
+    }
+'''
+
+# the same as above plus name of matching action - needed when more actions are searched at once
+FIELDS_BLOCK_NAMED_ACTIONS_CREATED_ACTIONS_DATA: str = '''
+    trace {
+      block {
+        num
+        confirmed
+        timestamp
+      }
+      id
+      matchingActions {
+        name
+        data
+        createdActions {
+          data
+        }
+      }
+    }
+'''
+
+FIELDS_BLOCK: str = '''
+    trace {
+      block {
+        num
+        confirmed
+        timestamp
+      }
+    }
+'''
+
+
+def actionsQuery(account: str, actionNames: list[str]) -> str:
+    """Search query for one or more actions on the same account; 'account:a action:(b OR c)'"""
+    assert isinstance(account, str), "account must be type of str"
+    assert isinstance(actionNames, list), "actionNames must be type of list"
+    if len(actionNames) == 0:
+        raise GraphQLApiException("actionNames must not be empty")
+    if len(actionNames) == 1:
+        return "account:" + account + " action:" + actionNames[0]
+    return "account:" + account + " action:(" + " OR ".join(actionNames) + ")"
+
+
+def demultiplexActions(report: list, actionNames: list[str]) -> dict:
+    """Split results of combined search (fields with matchingActions.name) into {actionName: results}. Every
+    result keeps only matching actions with the same name, so it has the same shape as single action result"""
+    assert isinstance(report, list), "report must be type of list"
+    assert isinstance(actionNames, list), "actionNames must be type of list"
+    TRACE = 'trace'
+    MATCHING_ACTION = 'matchingActions'
+    NAME = 'name'
+
+    toReturn: dict = {actionName: [] for actionName in actionNames}
+    for result in report:
+        if TRACE not in result or MATCHING_ACTION not in result[TRACE]:
+            LOG.error("demultiplexActions; Trace not in result: " + str(result))
+            continue
+        for actionName in actionNames:
+            matchingActions: list = [matchingAction for matchingAction in result[TRACE][MATCHING_ACTION]
+                                     if matchingAction.get(NAME) == actionName]
+            if len(matchingActions) == 0:
+                continue
+            trace: dict = dict(result[TRACE])
+            trace[MATCHING_ACTION] = matchingActions
+            toReturn[actionName].append({TRACE: trace})
+    return toReturn
+
+
 class GraphQLApi:
     def __init__(self, dfuseConnection: DfuseConnection):
         assert isinstance(dfuseConnection, DfuseConnection), "dfuseConnection must be type of DfuseConnection"
-        try:
-            LOG.info("Init GraphQLApi")
-            self.dfuseConnection = dfuseConnection
-            credentials = grpc.access_token_call_credentials(self.dfuseConnection.dfuseToken)
+        LOG.info("Init GraphQLApi")
+        self.dfuseConnection = dfuseConnection
 
-            channel = grpc.secure_channel(target=dfuse_graphql_url,
-                                          credentials=grpc.composite_channel_credentials(
-                                              grpc.ssl_channel_credentials(), credentials))
-
-            LOG.debug("GraphQLApi.init: channel is successfully initialized")
-            self.stub = graphql_pb2_grpc.GraphQLStub(channel)
-            LOG.debug("GraphQLApi.init: stub is successfully initialized")
+    @property
+    def stub(self):
+        # channel is owned by DfuseConnection - shared between all calls and rebuilt only when token rotates
+        try:
+            return self.dfuseConnection.graphqlStub()
         except Exception as e:
-            LOG.exception("Error in GraphQLApi: " + str(e))
-            raise GraphQLApiException("Error in GraphQLApi.init: " + str(e))
-
-    def getActionsVideoUploaded(self, account: str, startBlockNum: int, endBlockNum: int) -> list:
-        assert isinstance(account, str), "account must be type of str"  # where smart contract is deployed
+            LOG.exception("Error in GraphQLApi.stub: " + str(e))
+            raise GraphQLApiException("Error in GraphQLApi.stub: " + str(e))
+
+    def searchTransactionsForward(self, query: str, startBlockNum: int, endBlockNum: int, fields: str,
+                                  pageSize: int = graphql_page_size, irreversibleOnly: bool = True):
+        """Generator; yields decoded results page by page (list of json objects per page) until the range is
+        exhausted. Raises GraphQLApiException when server returns an error"""
+        assert isinstance(query, str), "query must be type of str"
         assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
         assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
-        try:
-            #function returns list of json objects
-            LOG.debug("Check if video is uploaded on account: " + account +
-                      " from block: " + str(startBlockNum) +
-                      " to block: " + str(endBlockNum))
-
-            graphQlStub = self.stub
-
-            _ACTION: str = "searchTransactionsForward"
-            _CURSOR: str = "cursor"
-
-            query: str = '''
-                query ($query: String!, $cursor: String, $limit: Int64, $low: Int64, $high: Int64) {
-                  ''' + _ACTION + '''(query: $query, lowBlockNum: $low, highBlockNum: $high, 
-                    limit: $limit, cursor: $cursor, irreversibleOnly: true) {
-                    cursor
-                    results {
-                      trace {
-                        id
-                        matchingActions {
-                          data
-                        }
-                      }
-                    }
-                  }
+        assert isinstance(fields, str), "fields must be type of str"
+        assert isinstance(pageSize, int), "pageSize must be type of int"
+        assert isinstance(irreversibleOnly, bool), "irreversibleOnly must be type of bool"
+        if pageSize < 1:
+            raise GraphQLApiException("pageSize must be greater than 0")
+
+        LOG.debug("Search transactions forward; query: '" + query +
+                  "' from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum) +
+                  " page size: " + str(pageSize))
+
+        graphQlQuery: str = '''
+            query ($query: String!, $cursor: String, $limit: Int64, $low: Int64, $high: Int64) {
+              ''' + _ACTION + '''(query: $query, lowBlockNum: $low, highBlockNum: $high,
+                limit: $limit, cursor: $cursor, irreversibleOnly: ''' + str(irreversibleOnly).lower() + ''') {
+                cursor
+                results {
+                  ''' + fields + '''
                 }
-            '''
-
+              }
+            }
+        '''
+
+        variables = Struct()
+        variables["query"] = query
+        variables["low"] = startBlockNum
+        variables["high"] = endBlockNum
+        variables[_CURSOR] = ""  # at the beginning cursor is empty
+        variables["limit"] = pageSize
+
+        pageIndex: int = 0
+        while True:
+            queryResponse = self.stub.Execute(Request(query=graphQlQuery, variables=variables))
+            for rawResult in queryResponse:
+                if rawResult.errors:
+                    # something went wrong
+                    LOG.error("An error occurred while getting data from GraphQL" + str(rawResult.errors))
+                    raise GraphQLApiException("An error occurred while getting data from GraphQL" +
+                                              str(rawResult.errors))
+
+                result = json.loads(rawResult.data)
+                page: list = result[_ACTION][_RESULTS]
+                if len(page) == 0:
+                    # no more data
+                    LOG.debug("Search transactions forward finished after " + str(pageIndex) + " page(s)")
+                    return
+                pageIndex += 1
+                yield page
+                # continue from the last cursor
+                variables[_CURSOR] = result[_ACTION][_CURSOR]
+
+    def searchTransactionsForwardAll(self, query: str, startBlockNum: int, endBlockNum: int, fields: str,
+                                     pageSize: int = graphql_page_size, irreversibleOnly: bool = True) -> Response:
+        """Collects all pages of searchTransactionsForward into one list - wrapped in Response object"""
+        try:
             toReturn: list = []
-
-            variables = Struct()
-            variables["query"] = "account:" + account + " action:electvideo"
-            variables["low"] = startBlockNum
-            variables["high"] = endBlockNum
-            variables[_CURSOR] = ''  # at the beginning cursor is empty
-            variables["limit"] = 10
-
-            while True:
-                queryResponse = graphQlStub.Execute(Request(query=query, variables=variables))  # variables=variables
-
-                for rawResult in queryResponse:
-                    if rawResult.errors:
-                        # something went wrong
-                        LOG.error("An error occurred while getting data from GraphQL" + str(rawResult.errors))
-                        return ResponseError(error="An error occurred while getting data from GraphQL" +
-                                                   str(rawResult.errors))
-                    else:
-                        # everything is ok
-                        result = json.loads(rawResult.data)
-                        if len(result[_ACTION]['results']) == 0:
-                            # no more data - return what we have
-                            return ResponseSuccessful(data=toReturn)
-                        else:
-                            # there is more data - add it to the list and continue from the last cursor
-                            toReturn.extend(result[_ACTION]['results'])
-                            variables[_CURSOR] = result[_ACTION][_CURSOR]
+            for page in self.searchTransactionsForward(query=query,
+                                                       startBlockNum=startBlockNum,
+                                                       endBlockNum=endBlockNum,
+                                                       fields=fields,
+                                                       pageSize=pageSize,
+                                                       irreversibleOnly=irreversibleOnly):
+                toReturn.extend(page)
+            return ResponseSuccessful(data=toReturn)
         except Exception as e:
-            LOG.exception("Error in GraphQLApi.getActionsVideoUploaded: " + str(e))
-            return ResponseError(error="Error in GraphQLApi.getActionsVideoUploaded: " + str(e))
+            LOG.exception("Error in GraphQLApi.searchTransactionsForwardAll: " + str(e))
+            return ResponseError(error="Error in GraphQLApi.searchTransactionsForwardAll: " + str(e))
 
-    def getGivenSBT(self, account: str, startBlockNum: int, endBlockNum: int) -> Response:
+    def getActions(self, account: str, actionNames: list[str], startBlockNum: int, endBlockNum: int,
+                   pageSize: int = graphql_page_size, irreversibleOnly: bool = True) -> Response:
+        """One search for all actions - results must be demultiplexed by matchingActions.name"""
         assert isinstance(account, str), "account must be type of str"  # where smart contract is deployed
+        assert isinstance(actionNames, list), "actionNames must be type of list"
         assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
         assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
-        try:
-            # function returns list of json objects
-            LOG.debug("Get all given SBT : " + account +
-                      " from block: " + str(startBlockNum) +
-                      " to block: " + str(endBlockNum))
-
-            graphQlStub = self.stub
-
-            _ACTION: str = "searchTransactionsForward"
-            _CURSOR: str = "cursor"
-
-            query: str = '''
-                query ($query: String!, $cursor: String, $limit: Int64, $low: Int64, $high: Int64) {
-                    ''' + _ACTION + '''(query: $query, lowBlockNum: $low, highBlockNum: $high, 
-                    limit: $limit, cursor: $cursor, irreversibleOnly: true) {
-                            cursor,
-                            results {
-                              trace {
-                                block {
-                                  num
-                                  confirmed
-                                  timestamp
-                                }
-                                id
-                                matchingActions {
-                                  data
-                                  createdActions {
-                                    data
-                                  }
-                                }
-                              }
-                            }
-                          }
-                    }
-                '''
-
-            toReturn: list = []
-
-            variables = Struct()
-            variables["query"] = "account:" + account + " action:givesbt"
-            variables["low"] = startBlockNum
-            variables["high"] = endBlockNum
-            variables[_CURSOR] = ""  # at the beginning cursor is empty
-            variables["limit"] = 9
-
-            while True:
-                #LOG.success("Vars: " + str(variables))
-
-                queryResponse = graphQlStub.Execute(Request(query=query, variables=variables))  # variables=variables
-                LOG.info("Query response: " + str(queryResponse))
-                for rawResult in queryResponse:
-                    if rawResult.errors:
-                        # something went wrong
-                        result = json.loads(rawResult.data)
-                        LOG.error("An error occurred while getting data from GraphQL" + str(rawResult.errors))
-                        return ResponseError(error="An error occurred while getting data from GraphQL" +
-                                                   str(rawResult.errors))
-                    else:
-                        # everything is ok
-                        result = json.loads(rawResult.data)
-                        if len(result[_ACTION]['results']) == 0:
-                            # no more data - return what we have
-                            return ResponseSuccessful(data=toReturn)
-                        else:
-                            # there is more data - add it to the list and continue from the last cursor\
-                            LOG.success("-------->Result: " + str(result[_ACTION]['results']))
-                            LOG.success("-------->Cursor: " + str(result[_ACTION][_CURSOR]))
-                            toReturn.extend(result[_ACTION]['results'])
-                            variables[_CURSOR] = result[_ACTION][_CURSOR]
-
-        except Exception as e:
-            LOG.exception("Error in GraphQLApi.getGivenSBT: " + str(e))
-            return ResponseError(error="Error in GraphQLApi.getGivenSBT: " + str(e))
-
-    def getActionsInducted(self, account: str, startBlockNum: int, endBlockNum: int) -> Response:
+        LOG.debug("Get actions " + str(actionNames) + " : " + account +
+                  " from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum))
+        return self.searchTransactionsForwardAll(query=actionsQuery(account=account, actionNames=actionNames),
+                                                 startBlockNum=startBlockNum,
+                                                 endBlockNum=endBlockNum,
+                                                 fields=FIELDS_BLOCK_NAMED_ACTIONS_CREATED_ACTIONS_DATA,
+                                                 pageSize=pageSize,
+                                                 irreversibleOnly=irreversibleOnly)
+
+    def getActionsVideoUploaded(self, account: str, startBlockNum: int, endBlockNum: int,
+                                pageSize: int = graphql_page_size) -> Response:
         assert isinstance(account, str), "account must be type of str"  # where smart contract is deployed
         assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
         assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
-        try:
-            # function returns list of json objects
-            LOG.debug("Get all call of action 'inducted' : " + account +
-                      " from block: " + str(startBlockNum) +
-                      " to block: " + str(endBlockNum))
-
-            graphQlStub = self.stub
-
-            _ACTION: str = "searchTransactionsForward"
-            _CURSOR: str = "cursor"
-
-            query: str = '''
-                query ($query: String!, $cursor: String, $limit: Int64, $low: Int64, $high: Int64) {
-                  ''' + _ACTION + '''(query: $query, lowBlockNum: $low, highBlockNum: $high, 
-                  limit: $limit, cursor: $cursor, irreversibleOnly: true) {
-                          cursor,
-                          results {
-                            trace {
-                              block {
-                                num
-                                confirmed
-                                timestamp
-                              }
-                              matchingActions {
-                                data
-                                }
-                              }
-                            }
-                          }
-                        }
-                '''
-
-            toReturn: list = []
-
-            variables = Struct()
-            variables["query"] = "account:" + account + " action:inducted"
-            variables["low"] = startBlockNum
-            variables["high"] = endBlockNum
-            variables[_CURSOR] = ""  # at the beginning cursor is empty
-            variables["limit"] = 9
-
-            while True:
-                queryResponse = graphQlStub.Execute(Request(query=query, variables=variables))  # variables=variables
-                LOG.info("Query response: " + str(queryResponse))
-                for rawResult in queryResponse:
-                    if rawResult.errors:
-                        # something went wrong
-                        result = json.loads(rawResult.data)
-                        LOG.error("An error occurred while getting data from GraphQL" + str(rawResult.errors))
-                        return ResponseError(error="An error occurred while getting data from GraphQL" +
-                                                   str(rawResult.errors))
-                    else:
-                        # everything is ok
-                        result = json.loads(rawResult.data)
-                        if len(result[_ACTION]['results']) == 0:
-                            # no more data - return what we have
-                            return ResponseSuccessful(data=toReturn)
-                        else:
-                            # there is more data - add it to the list and continue from the last cursor\
-                            LOG.success("-------->Result: " + str(result[_ACTION]['results']))
-                            LOG.success("-------->Cursor: " + str(result[_ACTION][_CURSOR]))
-                            toReturn.extend(result[_ACTION]['results'])
-                            variables[_CURSOR] = result[_ACTION][_CURSOR]
-
-        except Exception as e:
-            LOG.exception("Error in GraphQLApi.getActionInducted: " + str(e))
-            return ResponseError(error="Error in GraphQLApi.getActionInducted: " + str(e))
-
-    def getActionElectVote(self, account: str, startBlockNum: int, endBlockNum: int) -> Response:
+        LOG.debug("Check if video is uploaded on account: " + account +
+                  " from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum))
+        return self.searchTransactionsForwardAll(query="account:" + account + " action:electvideo",
+                                                 startBlockNum=startBlockNum,
+                                                 endBlockNum=endBlockNum,
+                                                 fields=FIELDS_ACTIONS_DATA,
+                                                 pageSize=pageSize)
+
+    def getGivenSBT(self, account: str, startBlockNum: int, endBlockNum: int,
+                    pageSize: int = graphql_page_size) -> Response:
         assert isinstance(account, str), "account must be type of str"  # where smart contract is deployed
         assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
         assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
-        try:
-            # function returns list of json objects
-            LOG.debug("Get all elections votes 'action:electVote' : " + account +
-                      " from block: " + str(startBlockNum) +
-                      " to block: " + str(endBlockNum))
-
-            graphQlStub = self.stub
-
-            _ACTION: str = "searchTransactionsForward"
-            _CURSOR: str = "cursor"
-
-            query: str = '''
-                        query ($query: String!, $cursor: String, $limit: Int64, $low: Int64, $high:Int64) {
-                          ''' + _ACTION + '''(query: $query, limit: $limit, cursor: $cursor, lowBlockNum: $low, highBlockNum: $high) {
-                          cursor,
-                            results {
-                              trace {
-                                matchingActions {
-                                  data
-                                }
-                              } 
-                            }
-                            cursor
-                          }
-                        }
-                '''
-
-            toReturn: list = []
-
-            variables = Struct()
-            variables["query"] = "account:" + account + " action:electvote"
-            variables["low"] = startBlockNum
-            variables["high"] = endBlockNum
-            variables[_CURSOR] = ""  # at the beginning cursor is empty
-            variables["limit"] = 30
-
-            while True:
-                queryResponse = graphQlStub.Execute(Request(query=query, variables=variables))  # variables=variables
-                LOG.info("Query response: " + str(queryResponse))
-                for rawResult in queryResponse:
-                    if rawResult.errors:
-                        # something went wrong
-                        result = json.loads(rawResult.data)
-                        LOG.error("An error occurred while getting data from GraphQL" + str(rawResult.errors))
-                        return ResponseError(error="An error occurred while getting data from GraphQL" +
-                                                   str(rawResult.errors))
-                    else:
-                        # everything is ok
-                        result = json.loads(rawResult.data)
-                        if len(result[_ACTION]['results']) == 0:
-                            # no more data - return what we have
-                            return ResponseSuccessful(data=toReturn)
-                        else:
-                            # there is more data - add it to the list and continue from the last cursor\
-                            LOG.success("-------->Result: " + str(result[_ACTION]['results']))
-                            LOG.success("-------->Cursor: " + str(result[_ACTION][_CURSOR]))
-                            toReturn.extend(result[_ACTION]['results'])
-                            variables[_CURSOR] = result[_ACTION][_CURSOR]
-
-        except Exception as e:
-            LOG.exception("Error in GraphQLApi.getActionElectVote: " + str(e))
-            return ResponseError(error="Error in GraphQLApi.getActionElectVote: " + str(e))
-
-    def getActionElectSeed(self, account: str, startBlockNum: int, endBlockNum: int) -> Response:
+        LOG.debug("Get all given SBT : " + account +
+                  " from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum))
+        return self.searchTransactionsForwardAll(query="account:" + account + " action:givesbt",
+                                                 startBlockNum=startBlockNum,
+                                                 endBlockNum=endBlockNum,
+                                                 fields=FIELDS_BLOCK_ACTIONS_CREATED_ACTIONS_DATA,
+                                                 pageSize=pageSize)
+
+    def getActionsInducted(self, account: str, startBlockNum: int, endBlockNum: int,
+                           pageSize: int = graphql_page_size) -> Response:
         assert isinstance(account, str), "account must be type of str"  # where smart contract is deployed
         assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
         assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
-        try:
-            # function returns list of json objects
-            LOG.debug("Get all electSeed actions 'action:electVote' : " + account +
-                      " from block: " + str(startBlockNum) +
-                      " to block: " + str(endBlockNum))
-
-            graphQlStub = self.stub
-
-            _ACTION: str = "searchTransactionsForward"
-            _CURSOR: str = "cursor"
-
-            query: str = '''
-                        query ($query: String!, $cursor: String, $limit: Int64, $low: Int64, $high:Int64) {
-                          ''' + _ACTION + '''(query: $query, limit: $limit, cursor: $cursor, lowBlockNum: $low, highBlockNum: $high) {
-                          cursor,
-                            results {
-                              trace {
-                                block {
-                                  num
-                                  confirmed
-                                  timestamp
-                                }
-                              }
-                            }
-                          }
-                    }
-                '''
-
-            toReturn: list = []
-
-            variables = Struct()
-            variables["query"] = "account:" + account + " action:electseed"
-            variables["low"] = startBlockNum
-            variables["high"] = endBlockNum
-            variables[_CURSOR] = ""  # at the beginning cursor is empty
-            variables["limit"] = 30
-
-            while True:
-                queryResponse = graphQlStub.Execute(Request(query=query, variables=variables))  # variables=variables
-                LOG.info("Query response: " + str(queryResponse))
-                for rawResult in queryResponse:
-                    if rawResult.errors:
-                        # something went wrong
-                        result = json.loads(rawResult.data)
-                        LOG.error("An error occurred while getting data from GraphQL" + str(rawResult.errors))
-                        return ResponseError(error="An error occurred while getting data from GraphQL" +
-                                                   str(rawResult.errors))
-                    else:
-                        # everything is ok
-                        result = json.loads(rawResult.data)
-                        if len(result[_ACTION]['results']) == 0:
-                            # no more data - return what we have
-                            return ResponseSuccessful(data=toReturn)
-                        else:
-                            # there is more data - add it to the list and continue from the last cursor\
-                            LOG.success("-------->Result: " + str(result[_ACTION]['results']))
-                            LOG.success("-------->Cursor: " + str(result[_ACTION][_CURSOR]))
-                            toReturn.extend(result[_ACTION]['results'])
-                            variables[_CURSOR] = result[_ACTION][_CURSOR]
-
-        except Exception as e:
-            LOG.exception("Error in GraphQLApi.getActionElectSeed: " + str(e))
-            return ResponseError(error="Error in GraphQLApi.getActionElectSeed: " + str(e))
\ No newline at end of file
+        LOG.debug("Get all call of action 'inducted' : " + account +
+                  " from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum))
+        return self.searchTransactionsForwardAll(query="account:" + account + " action:inducted",
+                                                 startBlockNum=startBlockNum,
+                                                 endBlockNum=endBlockNum,
+                                                 fields=FIELDS_BLOCK_ACTIONS_DATA,
+                                                 pageSize=pageSize)
+
+    def getActionElectVote(self, account: str, startBlockNum: int, endBlockNum: int,
+                           pageSize: int = graphql_page_size) -> Response:
+        assert isinstance(account, str), "account must be type of str"  # where smart contract is deployed
+        assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
+        assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
+        LOG.debug("Get all elections votes 'action:electVote' : " + account +
+                  " from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum))
+        return self.searchTransactionsForwardAll(query="account:" + account + " action:electvote",
+                                                 startBlockNum=startBlockNum,
+                                                 endBlockNum=endBlockNum,
+                                                 fields=FIELDS_ACTIONS_DATA,
+                                                 pageSize=pageSize,
+                                                 irreversibleOnly=False)
+
+    def getActionElectSeed(self, account: str, startBlockNum: int, endBlockNum: int,
+                           pageSize: int = graphql_page_size) -> Response:
+        assert isinstance(account, str), "account must be type of str"  # where smart contract is deployed
+        assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
+        assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
+        LOG.debug("Get all electSeed actions 'action:electseed' : " + account +
+                  " from block: " + str(startBlockNum) +
+                  " to block: " + str(endBlockNum))
+        return self.searchTransactionsForwardAll(query="account:" + account + " action:electseed",
+                                                 startBlockNum=startBlockNum,
+                                                 endBlockNum=endBlockNum,
+                                                 fields=FIELDS_BLOCK,
+                                                 pageSize=pageSize,
+                                                 irreversibleOnly=False)
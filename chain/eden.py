@@ -7,14 +7,15 @@ from datetime import datetime, timedelta
 
 from chain.dfuse.graphqlApi import GraphQLApi
 
-from chain.dfuse import DfuseConnection, ResponseError, Response, ResponseSuccessful
+from chain.dfuse import DfuseConnection, ResponseError, Response, ResponseSuccessful, Upstream
+from chain.blockAnchors import BlockAnchors
+from chain.chainSnapshot import ChainSnapshot
 from constants import eden_account, dfuse_api_key
 from database import Database
 from database.participant import Participant
 from database.comunityParticipant import CommunityParticipant as CommunityParticipantDB
 from sbt import SBT
 from log.log import Log
-import requests as requests
 import json
 import schedule
 
@@ -25,6 +26,12 @@ class ResponseException(Exception):
 
 LOG = Log(className="EdenChain")
 
+# actions on eden contract that are searched in history
+ACTION_ELECT_VOTE: str = "electvote"
+ACTION_GIVE_SBT: str = "givesbt"
+ACTION_INDUCTED: str = "inducted"
+ACTION_ELECT_VIDEO: str = "electvideo"
+
 
 class EdenData:
     # dfusConnection and database should be initialized at the beginning of the program - because of the threading
@@ -35,6 +42,12 @@ class EdenData:
         assert isinstance(dfuseConnection, DfuseConnection), "dfuseConnection is not of type DfuseConnection"
         # assert isinstance(database, Database), "database is not of type Database"
         self.dfuseConnection = dfuseConnection
+        # gRPC channel lives in dfuseConnection, GraphQLApi object can be reused for all queries
+        self.graphqlApi: GraphQLApi = GraphQLApi(dfuseConnection=dfuseConnection)
+        # known blocks - most of the timestamps are resolved to block number without asking the server
+        self.blockAnchors: BlockAnchors = BlockAnchors(database=dfuseConnection.database)
+        # chain data of current tick (see startSnapshot)
+        self.snapshot: ChainSnapshot = None
 
         # update api key
         self.updateDfuseApiKey(database=dfuseConnection.database)
@@ -67,6 +80,21 @@ class EdenData:
         continuous_thread.start()
         return cease_continuous_run
 
+    def startSnapshot(self):
+        """From now on every table and head info is read from the chain only once - until stopSnapshot"""
+        self.snapshot = ChainSnapshot()
+
+    def stopSnapshot(self):
+        if self.snapshot is not None:
+            LOG.debug(str(self.snapshot))
+        self.snapshot = None
+
+    def fromSnapshot(self, key: tuple, fetch) -> Response:
+        snapshot: ChainSnapshot = self.snapshot
+        if snapshot is None or snapshot.isValid() is False:
+            return fetch()
+        return snapshot.get(key=key, fetch=fetch)
+
     def getElectionState(self, height: int = None) -> Response:
         try:
             LOG.info("Get election state on height: " + str(height) if height is not None else "<current/live>")
@@ -75,11 +103,12 @@ class EdenData:
             PRIMARY_KEY = 'elect.state'
             SCOPE = None
 
-            return self.dfuseConnection.getTableRow(account=ACCOUNT,
-                                                    table=TABLE,
-                                                    primaryKey=PRIMARY_KEY,
-                                                    scope=SCOPE,
-                                                    height=height)
+            return self.fromSnapshot(key=(ACCOUNT, TABLE, SCOPE, height, PRIMARY_KEY),
+                                     fetch=lambda: self.dfuseConnection.getTableRow(account=ACCOUNT,
+                                                                                    table=TABLE,
+                                                                                    primaryKey=PRIMARY_KEY,
+                                                                                    scope=SCOPE,
+                                                                                    height=height))
         except Exception as e:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getElectionState; Description: " + str(e))
@@ -92,11 +121,12 @@ class EdenData:
             PRIMARY_KEY = 'elect.curr'
             SCOPE = None
 
-            return self.dfuseConnection.getTableRow(account=ACCOUNT,
-                                                    table=TABLE,
-                                                    primaryKey=PRIMARY_KEY,
-                                                    scope=SCOPE,
-                                                    height=height)
+            return self.fromSnapshot(key=(ACCOUNT, TABLE, SCOPE, height, PRIMARY_KEY),
+                                     fetch=lambda: self.dfuseConnection.getTableRow(account=ACCOUNT,
+                                                                                    table=TABLE,
+                                                                                    primaryKey=PRIMARY_KEY,
+                                                                                    scope=SCOPE,
+                                                                                    height=height))
         except Exception as e:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getCurrentElectionState; Description: " + str(e))
@@ -124,11 +154,12 @@ class EdenData:
             TABLE = 'votes'
             SCOPE = None
 
-            return self.dfuseConnection.getTable(account=ACCOUNT,
-                                                 table=TABLE,
-                                                 scope=SCOPE,
-                                                 height=height,
-                                                 propagateJson=True)
+            return self.fromSnapshot(key=(ACCOUNT, TABLE, SCOPE, height, None),
+                                     fetch=lambda: self.dfuseConnection.getTable(account=ACCOUNT,
+                                                                                 table=TABLE,
+                                                                                 scope=SCOPE,
+                                                                                 height=height,
+                                                                                 propagateJson=True))
         except Exception as e:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getParticipants; Description: " + str(e))
@@ -140,10 +171,11 @@ class EdenData:
             TABLE = 'member'
             SCOPE = None
 
-            return self.dfuseConnection.getTable(account=ACCOUNT,
-                                                 table=TABLE,
-                                                 scope=SCOPE,
-                                                 height=height)
+            return self.fromSnapshot(key=(ACCOUNT, TABLE, SCOPE, height, None),
+                                     fetch=lambda: self.dfuseConnection.getTable(account=ACCOUNT,
+                                                                                 table=TABLE,
+                                                                                 scope=SCOPE,
+                                                                                 height=height))
         except Exception as e:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getMembers; Description: " + str(e))
@@ -152,7 +184,17 @@ class EdenData:
         try:
             assert isinstance(timestamp, datetime), "timestamp is not of type datetime"
             LOG.info("Get block number on datetime: " + timestamp.strftime("%Y-%m-%d %H:%M:%S"))
-            return self.dfuseConnection.getBlockHeightFromTimestamp(timestamp=timestamp)
+            blockNum: int = self.blockAnchors.getBlockNum(timestamp=timestamp)
+            if blockNum is not None:
+                return ResponseSuccessful(data=blockNum)
+
+            response: Response = self.dfuseConnection.getBlockFromTimestamp(timestamp=timestamp)
+            if isinstance(response, ResponseError):
+                return response
+            blockNum, blockTimestamp = response.data
+            if blockTimestamp is not None:
+                self.blockAnchors.add(blockNum=blockNum, timestamp=blockTimestamp)
+            return ResponseSuccessful(data=blockNum)
         except Exception as e:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getBlockNumOfTimestamp; Description: " + str(e))
@@ -164,11 +206,12 @@ class EdenData:
             TABLE = 'votes'
             SCOPE = None
 
-            return self.dfuseConnection.getTable(account=ACCOUNT,
-                                                 table=TABLE,
-                                                 scope=SCOPE,
-                                                 height=height,
-                                                 propagateJson=True)
+            return self.fromSnapshot(key=(ACCOUNT, TABLE, SCOPE, height, None),
+                                     fetch=lambda: self.dfuseConnection.getTable(account=ACCOUNT,
+                                                                                 table=TABLE,
+                                                                                 scope=SCOPE,
+                                                                                 height=height,
+                                                                                 propagateJson=True))
 
 
         except Exception as e:
@@ -196,41 +239,68 @@ class EdenData:
             path = '/v1/chain/get_block'
             LOG.info("Path: " + path)
 
-            resultTable = requests.post(self.dfuseConnection.linkNode(path=path), json={"block_num_or_id": blockNum})
+            resultTable = self.dfuseConnection.session(Upstream.EOS_NODE).post(
+                self.dfuseConnection.linkNode(path=path),
+                json={"block_num_or_id": blockNum},
+                timeout=self.dfuseConnection.timeout)
             j = json.loads(resultTable.text)
-            return datetime.fromisoformat(j['timestamp'])
+            timestamp: datetime = datetime.fromisoformat(j['timestamp'])
+            if isinstance(blockNum, int):
+                self.blockAnchors.add(blockNum=blockNum, timestamp=timestamp)
+            return timestamp
         except Exception as e:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getTimestampOfBlock; Description: " + str(e))
 
-    def getChainHeadBlockNumber(self):
+    def getChainHeadInfo(self) -> Response:
+        """One get_info call (per tick when snapshot is started); data: {'headBlockNum': int,
+        'headBlockTime': datetime, 'lastIrreversibleBlockNum': int}"""
+        return self.fromSnapshot(key=('get_info',), fetch=self.getChainHeadInfoFromNode)
+
+    def getChainHeadInfoFromNode(self) -> Response:
         try:
             path = '/v1/chain/get_info'
-            LOG.info("Path (getChainHeadBlockNumber): " + path)
+            LOG.info("Path (getChainHeadInfo): " + path)
 
-            resultTable = requests.get(self.dfuseConnection.linkNode(path=path))
+            resultTable = self.dfuseConnection.session(Upstream.EOS_NODE).get(
+                self.dfuseConnection.linkNode(path=path),
+                timeout=self.dfuseConnection.timeout)
 
             j = json.loads(resultTable.text)
             LOG.debug("Result: " + str(j))
-            return int(j['head_block_num'])
+            headInfo: dict = {
+                'headBlockNum': int(j['head_block_num']),
+                'headBlockTime': datetime.fromisoformat(j['head_block_time']),
+                'lastIrreversibleBlockNum': int(j['last_irreversible_block_num'])
+            }
+            # head block is known block - free anchor (only in memory, it changes every call)
+            self.blockAnchors.add(blockNum=headInfo['headBlockNum'], timestamp=headInfo['headBlockTime'],
+                                  persist=False)
+            return ResponseSuccessful(data=headInfo)
         except Exception as e:
             LOG.exception(str(e))
-            return ResponseError("Exception thrown when called getChainDatetime; Description: " + str(e))
-
-    def getChainDatetime(self):
-        try:
-            path = '/v1/chain/get_info'
-            LOG.info("Path (getChainDatetime): " + path)
-
-            resultTable = requests.get(self.dfuseConnection.linkNode(path=path))
+            return ResponseError("Exception thrown when called getChainHeadInfo; Description: " + str(e))
 
-            j = json.loads(resultTable.text)
-            LOG.debug("Result: " + str(j))
-            return datetime.fromisoformat(j['head_block_time'])
+    def getChainHeadBlockNumber(self):
+        headInfo: Response = self.getChainHeadInfo()
+        if isinstance(headInfo, ResponseError):
+            return ResponseError("Exception thrown when called getChainHeadBlockNumber; Description: " +
+                                 str(headInfo.error))
+        return headInfo.data['headBlockNum']
+
+    def getChainLastIrreversibleBlockNumber(self):
+        headInfo: Response = self.getChainHeadInfo()
+        if isinstance(headInfo, ResponseError):
+            return ResponseError("Exception thrown when called getChainLastIrreversibleBlockNumber; Description: " +
+                                 str(headInfo.error))
+        return headInfo.data['lastIrreversibleBlockNum']
 
-        except Exception as e:
-            LOG.exception(str(e))
-            return ResponseError("Exception thrown when called getChainDatetime; Description: " + str(e))
+    def getChainDatetime(self):
+        headInfo: Response = self.getChainHeadInfo()
+        if isinstance(headInfo, ResponseError):
+            return ResponseError("Exception thrown when called getChainDatetime; Description: " +
+                                 str(headInfo.error))
+        return headInfo.data['headBlockTime']
 
     def updateDfuseApiKey1(self, database: Database):
         LOG.debug("Update dfuse api key. Scheduled function.")
@@ -304,7 +374,7 @@ class EdenData:
             if isinstance(startTimeBlockNum, int) == False or isinstance(endTimeBlockNum, int) == False:
                 return ResponseError("Could not get block number of start time or end time - wrong type")
 
-            graphql: GraphQLApi = GraphQLApi(dfuseConnection=self.dfuseConnection)
+            graphql: GraphQLApi = self.graphqlApi
             return graphql.getGivenSBT(account=contractAccount,
                                        startBlockNum= startTimeBlockNum,
                                        endBlockNum= endTimeBlockNum
@@ -313,6 +383,21 @@ class EdenData:
             LOG.exception(str(e))
             return ResponseError("Exception thrown when called getGivenSBT; Description: " + str(e))
 
+    def parseActions(self, reports: dict) -> dict:
+        """Parse demultiplexed reports ({actionName: results}) with parser of every action"""
+        assert isinstance(reports, dict), "reports must be type of dict"
+        parsers: dict = {
+            ACTION_ELECT_VOTE: self.actionElectVoteParser,
+            ACTION_INDUCTED: self.actionInductedParser,
+            ACTION_GIVE_SBT: self.SBTParser,
+        }
+        toReturn: dict = {}
+        for actionName, report in reports.items():
+            if actionName not in parsers:
+                raise ResponseException("There is no parser for action: " + str(actionName))
+            toReturn[actionName] = parsers[actionName](report)
+        return toReturn
+
     def getActionsVideoUploaded(self, contractAccount: str, startTime: datetime, endTime: datetime):
         assert isinstance(contractAccount, str), "contractAccount is not of type str"
         assert isinstance(startTime, datetime), "startTime is not of type datetime"
@@ -336,7 +421,7 @@ class EdenData:
             if isinstance(startTimeBlockNum, int) == False or isinstance(endTimeBlockNum, int) == False:
                 return ResponseError("Could not get block number of start time or end time - wrong type")
 
-            graphql: GraphQLApi = GraphQLApi(dfuseConnection=self.dfuseConnection)
+            graphql: GraphQLApi = self.graphqlApi
             return graphql.getActionsVideoUploaded(account=contractAccount,
                                                    startBlockNum=startTimeBlockNum,
                                                    endBlockNum=endTimeBlockNum)
@@ -367,7 +452,7 @@ class EdenData:
             if isinstance(startTimeBlockNum, int) == False or isinstance(endTimeBlockNum, int) == False:
                 return ResponseError("Could not get block number of start time or end time - wrong type")
 
-            graphql: GraphQLApi = GraphQLApi(dfuseConnection=self.dfuseConnection)
+            graphql: GraphQLApi = self.graphqlApi
             return graphql.getActionsInducted(account=contractAccount,
                                               startBlockNum=startTimeBlockNum,
                                               endBlockNum=endTimeBlockNum)
@@ -398,7 +483,7 @@ class EdenData:
             if isinstance(startTimeBlockNum, int) == False or isinstance(endTimeBlockNum, int) == False:
                 return ResponseError("Could not get block number of start time or end time - wrong type")
 
-            graphql: GraphQLApi = GraphQLApi(dfuseConnection=self.dfuseConnection)
+            graphql: GraphQLApi = self.graphqlApi
             return graphql.getActionElectVote(account=contractAccount,
                                               startBlockNum=startTimeBlockNum,
                                               endBlockNum=endTimeBlockNum)
@@ -429,7 +514,7 @@ class EdenData:
             if isinstance(startTimeBlockNum, int) == False or isinstance(endTimeBlockNum, int) == False:
                 return ResponseError("Could not get block number of start time or end time - wrong type")
 
-            graphql: GraphQLApi = GraphQLApi(dfuseConnection=self.dfuseConnection)
+            graphql: GraphQLApi = self.graphqlApi
             return graphql.getActionElectSeed(account=contractAccount,
                                               startBlockNum=startTimeBlockNum,
                                               endBlockNum=endTimeBlockNum)
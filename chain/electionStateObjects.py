@@ -55,6 +55,10 @@ class CurrentElectionStateHandler:
         LOG.debug("No custom actions defined")
         pass
 
+    def getDeadlines(self) -> list[datetime]:
+        """Override this method to return times (from the state data) when something is going to happen"""
+        return []
+
 
 # Data['current_election_state_registration_v1', {'start_time': '2022-10-08T13:00:00.000', 'election_threshold': 1000, 'election_schedule_version': 1}]
 class CurrentElectionStateHandlerRegistratrionV1(CurrentElectionStateHandler):
@@ -70,6 +74,9 @@ class CurrentElectionStateHandlerRegistratrionV1(CurrentElectionStateHandler):
     def getelectionScheduleVersion(self):
         return self.data["election_schedule_version"]
 
+    def getDeadlines(self) -> list[datetime]:
+        return [datetime.fromisoformat(self.getStartTime())]
+
     def customActions(self, election: Election, database: Database, groupManagement: GroupManagement,
                       edenData: EdenData,
                       communication: Communication,
@@ -181,6 +188,9 @@ class CurrentElectionStateHandlerSeedingV1(CurrentElectionStateHandler):
     def getElectionScheduleVersion(self):
         return self.data["election_schedule_version"]
 
+    def getDeadlines(self) -> list[datetime]:
+        return [datetime.fromisoformat(self.getSeedEndTime())]
+
     def customActions(self, election: Election, database: Database, groupManagement: GroupManagement,
                       contract: str,
                       edenData: EdenData,
@@ -300,6 +310,9 @@ class CurrentElectionStateHandlerActive(CurrentElectionStateHandler):
     def getConfigRoundEnd(self):
         return self.data["round_end"]
 
+    def getDeadlines(self) -> list[datetime]:
+        return [datetime.fromisoformat(self.getConfigRoundEnd())]
+
     def customActions(self,
                       election: Election,
                       groupManagement: GroupManagement,
@@ -401,6 +414,9 @@ class CurrentElectionStateHandlerFinal(CurrentElectionStateHandler):
     def getSeedEndTime(self):
         return self.data["seed"]["end_time"]
 
+    def getDeadlines(self) -> list[datetime]:
+        return [datetime.fromisoformat(self.getSeedEndTime())]
+
     def customActions(self, election: Election, groupManagement: GroupManagement,
                       contract: str,
                       modeDemo: ModeDemo = None):
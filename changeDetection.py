@@ -0,0 +1,72 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from constants import full_tick_max_interval
+from log import Log
+
+LOG = Log(className="ChangeDetection")
+
+
+class ChangeDetectionException(Exception):
+    pass
+
+
+class ChangeDetection:
+    """Decides if the tick of the bot must do the full work (database, telegram) or can be skipped. Work is needed
+    when hash of the chain state changed, a deadline passed since the last full tick or the last full tick is older
+    than maxInterval (per mode of the bot). Everything is in memory - fast path does not touch database"""
+
+    def __init__(self, maxInterval: int = full_tick_max_interval):
+        assert isinstance(maxInterval, int), "maxInterval must be type of int"
+        self.maxInterval: timedelta = timedelta(seconds=maxInterval)
+        self.lastHash: str = None
+        self.lastRun: datetime = None
+        self.deadlines: list[datetime] = []
+
+    @staticmethod
+    def hash(data) -> str:
+        """Content hash of (json serializable) state"""
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+    def nextDeadline(self, now: datetime) -> datetime:
+        """The closest deadline after now (or None)"""
+        assert isinstance(now, datetime), "now must be type of datetime"
+        upcoming: list[datetime] = [deadline for deadline in self.deadlines if deadline > now]
+        return min(upcoming) if len(upcoming) > 0 else None
+
+    def isWorkNeeded(self, stateHash: str, now: datetime, maxInterval: int = None) -> bool:
+        """maxInterval (in seconds) overrides the default one - it depends on the mode of the bot"""
+        assert isinstance(stateHash, str), "stateHash must be type of str"
+        assert isinstance(now, datetime), "now must be type of datetime"
+        assert isinstance(maxInterval, (int, type(None))), "maxInterval must be type of int or None"
+        maxIntervalDelta: timedelta = timedelta(seconds=maxInterval) if maxInterval is not None else self.maxInterval
+        if self.lastHash is None or self.lastRun is None:
+            LOG.debug("No full tick yet")
+            return True
+        if stateHash != self.lastHash:
+            LOG.debug("Chain state changed")
+            return True
+        if now < self.lastRun or now - self.lastRun >= maxIntervalDelta:
+            LOG.debug("Last full tick is too old: " + str(self.lastRun))
+            return True
+        for deadline in self.deadlines:
+            if self.lastRun < deadline <= now:
+                LOG.debug("Deadline passed: " + str(deadline))
+                return True
+        return False
+
+    def markRun(self, stateHash: str, now: datetime, deadlines: list[datetime]):
+        """Call after full tick is done"""
+        assert isinstance(stateHash, str), "stateHash must be type of str"
+        assert isinstance(now, datetime), "now must be type of datetime"
+        assert isinstance(deadlines, list), "deadlines must be type of list"
+        self.lastHash = stateHash
+        self.lastRun = now
+        self.deadlines = sorted(deadline for deadline in deadlines if isinstance(deadline, datetime))
+        LOG.debug("Full tick done at " + str(now) + "; next deadline: " + str(self.nextDeadline(now=now)))
+
+    def reset(self):
+        """Next tick is going to be full"""
+        self.lastHash = None
+        self.lastRun = None
@@ -11,7 +11,8 @@ from constants import telegram_bot_name, telegram_admins_id
 from database.participant import Participant
 from log import Log
 
-from chain import EdenData
+from chain import EdenData, ActionIndex
+from chain.eden import ACTION_INDUCTED, ACTION_ELECT_VOTE
 from sbt import SBT
 from text.textManagement import CommunityGroupManagement, Button
 from transmission import Communication, SessionType
@@ -45,6 +46,8 @@ class CommunityGroup:
         self.communication = communication
         self.mode = mode
         self.testing = testing
+        # actions are indexed in database - only new blocks are fetched from the chain
+        self.actionIndex = ActionIndex(edenData=edenData, database=database)
 
     # def givenSBTParser(self):
 
@@ -291,11 +294,14 @@ class CommunityGroup:
             LOG.exception("Error in getUsersWithNFT: " + str(e))
             raise CommunityGroupException("Error in getUsersWithNFT: " + str(e))"""
 
-    def getUsersWhoVote(self, contractAccount: str, executionTime: datetime, rangeInDays: int) -> \
+    def getUsersWhoVote(self, contractAccount: str, executionTime: datetime, rangeInDays: int,
+                        votes: list[dict] = None) -> \
             list[CommunityParticipant]:
+        """votes - already parsed electvote actions (getActionsElectVoteAndInducted); fetched when not given"""
         assert isinstance(contractAccount, str), "contractAccount must be type of str"
         assert isinstance(executionTime, datetime), "executionTime must be type of datetime"
         assert isinstance(rangeInDays, int), "endDate must be type of int"
+        assert isinstance(votes, (list, type(None))), "votes must be type of list or None"
         try:
             if rangeInDays < 0:
                 raise CommunityGroupException("rangeInDays must be positive")
@@ -307,7 +313,7 @@ class CommunityGroup:
 
             LOG.debug("Get NFT between " + str(startDate) + " and " + str(endDate))
             membersRank: dict = self.getMembersRankFromChain()
-            communityParticipantsVotes: list[dict] = \
+            communityParticipantsVotes: list[dict] = votes if votes is not None else \
                 self.getActionElectVote(contractAccount=contractAccount,
                                         executionTime=executionTime,
                                         rangeInDays=rangeInDays)
@@ -334,11 +340,14 @@ class CommunityGroup:
     def getActionInducted(self,
                           contractAccount: str,
                           executionTime: datetime,
-                          rangeInDays: int) -> \
+                          rangeInDays: int,
+                          accounts: list[str] = None) -> \
             list[Participant]:
+        """accounts - already parsed inducted actions (getActionsElectVoteAndInducted); fetched when not given"""
         assert isinstance(contractAccount, str), "contractAccount must be type of str"
         assert isinstance(executionTime, datetime), "executionTime must be type of datetime"
         assert isinstance(rangeInDays, int), "endDate must be type of int"
+        assert isinstance(accounts, (list, type(None))), "accounts must be type of list or None"
         try:
             if rangeInDays < 0:
                 raise CommunityGroupException("rangeInDays must be positive")
@@ -350,18 +359,21 @@ class CommunityGroup:
 
             LOG.debug("Get actions between " + str(startDate) + " and " + str(endDate))
 
-            inductedActions: Response = self.edenData.getActionsInducted(contractAccount=contractAccount,
-                                                                  startTime=startDate,
-                                                                  endTime=endDate)
-            if isinstance(inductedActions, ResponseError):
-                raise CommunityGroupException("There was an error when getting actions: " + str(inductedActions.error))
-
-            #get accounts(eos) from indcuted actions in range
-            accounts: list[str] = self.edenData.actionInductedParser(report=inductedActions.data)
-
             if accounts is None:
-                raise CommunityGroupException("There was an error when parsing inducted actions: "
-                                              + str(inductedActions.error))
+                inductedActions: Response = self.actionIndex.getActions(contractAccount=contractAccount,
+                                                                       actionName=ACTION_INDUCTED,
+                                                                       startTime=startDate,
+                                                                       endTime=endDate)
+                if isinstance(inductedActions, ResponseError):
+                    raise CommunityGroupException("There was an error when getting actions: " +
+                                                  str(inductedActions.error))
+
+                #get accounts(eos) from indcuted actions in range
+                accounts = self.edenData.actionInductedParser(report=inductedActions.data)
+
+                if accounts is None:
+                    raise CommunityGroupException("There was an error when parsing inducted actions: "
+                                                  + str(inductedActions.error))
             LOG.debug("Accounts have been parsed. Number of participants: " + str(len(accounts)))
 
             participants: list[Participant] = self.getUsersFromDatabase(contractAccount=contractAccount,
@@ -399,9 +411,10 @@ class CommunityGroup:
 
             LOG.debug("Get actions between " + str(startDate) + " and " + str(endDate))
 
-            votesActions: Response = self.edenData.getActionElectVote(contractAccount=contractAccount,
-                                                                  startTime=startDate,
-                                                                  endTime=endDate)
+            votesActions: Response = self.actionIndex.getActions(contractAccount=contractAccount,
+                                                                 actionName=ACTION_ELECT_VOTE,
+                                                                 startTime=startDate,
+                                                                 endTime=endDate)
             if isinstance(votesActions, ResponseError):
                 raise CommunityGroupException("There was an error when getting actions: " + str(votesActions.error))
 
@@ -427,6 +440,65 @@ class CommunityGroup:
             LOG.exception("Error in getActionElectVote: " + str(e))
             return None
 
+    def filterActionsByTime(self, report: list, startTime: datetime) -> list:
+        """Keep only results (with block timestamp) that happened at or after startTime"""
+        assert isinstance(report, list), "report must be type of list"
+        assert isinstance(startTime, datetime), "startTime must be type of datetime"
+        toReturn: list = []
+        for action in report:
+            try:
+                timestamp: str = action['trace']['block']['timestamp']
+                try:
+                    dt = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ')
+                except ValueError:
+                    dt = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ')
+                if dt >= startTime:
+                    toReturn.append(action)
+            except Exception as e:
+                LOG.error("filterActionsByTime; Timestamp not in action: " + str(action) + "; " + str(e))
+        return toReturn
+
+    def getActionsElectVoteAndInducted(self,
+                                       contractAccount: str,
+                                       executionTime: datetime,
+                                       rangeInDaysVotes: int,
+                                       rangeInDaysInducted: int) -> dict:
+        """One search (over the wider range) for electvote and inducted actions. Returns parsed actions
+        {ACTION_ELECT_VOTE: list[dict], ACTION_INDUCTED: list[str]}"""
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(executionTime, datetime), "executionTime must be type of datetime"
+        assert isinstance(rangeInDaysVotes, int), "rangeInDaysVotes must be type of int"
+        assert isinstance(rangeInDaysInducted, int), "rangeInDaysInducted must be type of int"
+        try:
+            if rangeInDaysVotes < 0 or rangeInDaysInducted < 0:
+                raise CommunityGroupException("rangeInDaysVotes and rangeInDaysInducted must be positive")
+
+            endDate: datetime = executionTime.replace(microsecond=0)
+            startDate: datetime = endDate - timedelta(days=max(rangeInDaysVotes, rangeInDaysInducted))
+            LOG.debug("Get electvote and inducted actions between " + str(startDate) + " and " + str(endDate))
+
+            response: Response = self.actionIndex.getActionsOfMany(contractAccount=contractAccount,
+                                                                   actionNames={ACTION_ELECT_VOTE, ACTION_INDUCTED},
+                                                                   startTime=startDate,
+                                                                   endTime=endDate)
+            if isinstance(response, ResponseError):
+                raise CommunityGroupException("There was an error when getting actions: " + str(response.error))
+
+            reports: dict = response.data
+            # each action has its own time range
+            reports[ACTION_ELECT_VOTE] = self.filterActionsByTime(
+                report=reports[ACTION_ELECT_VOTE], startTime=endDate - timedelta(days=rangeInDaysVotes))
+            reports[ACTION_INDUCTED] = self.filterActionsByTime(
+                report=reports[ACTION_INDUCTED], startTime=endDate - timedelta(days=rangeInDaysInducted))
+
+            parsed: dict = self.edenData.parseActions(reports=reports)
+            LOG.debug("Actions have been parsed. Votes: " + str(len(parsed[ACTION_ELECT_VOTE])) +
+                      "; inducted: " + str(len(parsed[ACTION_INDUCTED])))
+            return parsed
+        except Exception as e:
+            LOG.exception("Error in getActionsElectVoteAndInducted: " + str(e))
+            raise CommunityGroupException("Error in getActionsElectVoteAndInducted: " + str(e))
+
     def addGroupToKnownUsersAndCheckAdminRight(self, communityGroupID: int):
         assert isinstance(communityGroupID, int), "communityGroupID must be type of int"
         try:
@@ -1159,10 +1231,17 @@ class CommunityGroup:
             #                        executionTime=executionTime,
             #                        rangeInDays=RANGE_IN_DAYS_NFT)
 
+            # votes and inducted actions are fetched in one pass
+            actions: dict = self.getActionsElectVoteAndInducted(contractAccount=contactAccount,
+                                                                executionTime=executionTime,
+                                                                rangeInDaysVotes=RANGE_IN_DAYS_NFT,
+                                                                rangeInDaysInducted=RANGE_IN_DAYS_INDUCTED)
+
             participantsGoalState: list[CommunityParticipant] = \
                 self.getUsersWhoVote(contractAccount=contactAccount,
                                      rangeInDays=RANGE_IN_DAYS_NFT,
-                                     executionTime=executionTime
+                                     executionTime=executionTime,
+                                     votes=actions[ACTION_ELECT_VOTE]
                                      )
 
             """participantsGoalState: list[CommunityParticipant] = \
@@ -1179,7 +1258,8 @@ class CommunityGroup:
             LOG.debug("...getting participants who called inducted method on contract(last 3 months)...")
             inductedAccounts: list[Participant] = self.getActionInducted(contractAccount=contactAccount,
                                    executionTime=executionTime,
-                                   rangeInDays=RANGE_IN_DAYS_INDUCTED)
+                                   rangeInDays=RANGE_IN_DAYS_INDUCTED,
+                                   accounts=actions[ACTION_INDUCTED])
             #only important thing in inductedAccounts are parameters telegram and account name
 
             if inductedAccounts is None:
@@ -1,7 +1,7 @@
 from .database import Database
 from .database import DatabaseExceptionConnection
 from .database import Abi, ElectionStatus, Election, Reminder, ReminderSent, ReminderSendStatus, TokenService, \
-KnownUser, RoomAction
+KnownUser, RoomAction, ChainAction, ChainActionCursor, BlockAnchor, OutboxMessage, OutboxStatus
 from .extendedParticipant import ExtendedParticipant
 #from .comunityParticipant import CommunityParticipant
 from .extendedRoom import ExtendedRoom
@@ -24,6 +24,11 @@ __all__ = [
     "ReminderSendStatus",
     "TokenService",
     "KnownUser",
-    "RoomAction"
+    "RoomAction",
+    "ChainAction",
+    "ChainActionCursor",
+    "BlockAnchor",
+    "OutboxMessage",
+    "OutboxStatus"
 ]
 
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Column, BigInteger
+from sqlalchemy.dialects import mysql
+
+from database.base import Base
+
+
+class BlockAnchor(Base):
+    __tablename__ = 'blockAnchor'
+    """Class for storing known (block number, block timestamp) pairs - used to calculate block number of timestamp
+     without asking the server"""
+    blockNum = Column(BigInteger, primary_key=True, autoincrement=False)
+    # blocks are produced every 0.5s - fraction of the second must be stored
+    timestamp = Column(DateTime().with_variant(mysql.DATETIME(fsp=3), "mysql"), nullable=False, index=True)
+
+    def __init__(self, blockNum: int, timestamp: datetime):
+        """Initialization object"""
+        assert isinstance(blockNum, int), "blockNum must be int"
+        assert isinstance(timestamp, datetime), "timestamp must be datetime"
+
+        self.blockNum = blockNum
+        self.timestamp = timestamp
+
+    def __str__(self):
+        return "blockNum: " + str(self.blockNum) + ", timestamp: " + str(self.timestamp)
@@ -0,0 +1,77 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Column, Integer, BigInteger, CHAR, Text, Index, UniqueConstraint
+
+from database.base import Base
+
+
+class ChainAction(Base):
+    __tablename__ = 'chainAction'
+    """Class for storing (indexed) actions from the chain - one row per transaction trace"""
+    chainActionID = Column(Integer, primary_key=True, autoincrement=True)
+    contractAccount = Column(CHAR(32), nullable=False)
+    actionName = Column(CHAR(16), nullable=False)
+    blockNum = Column(BigInteger, nullable=False)
+    transactionID = Column(CHAR(64), nullable=False)
+    trace = Column(Text, nullable=False)  # json of the trace as it is returned by graphql server
+
+    __table_args__ = (
+        UniqueConstraint('contractAccount', 'actionName', 'transactionID', name='uqChainActionTransaction'),
+        Index('ixChainActionBlockNum', 'contractAccount', 'actionName', 'blockNum'),
+    )
+
+    def __init__(self, contractAccount: str, actionName: str, blockNum: int, transactionID: str, trace: str,
+                 chainActionID: int = None):
+        """Initialization object"""
+        assert isinstance(contractAccount, str), "contractAccount must be str"
+        assert isinstance(actionName, str), "actionName must be str"
+        assert isinstance(blockNum, int), "blockNum must be int"
+        assert isinstance(transactionID, str), "transactionID must be str"
+        assert isinstance(trace, str), "trace must be str"
+        assert isinstance(chainActionID, (int, type(None))), "chainActionID must be int or None"
+
+        self.chainActionID = chainActionID
+        self.contractAccount = contractAccount
+        self.actionName = actionName
+        self.blockNum = blockNum
+        self.transactionID = transactionID
+        self.trace = trace
+
+    def __str__(self):
+        return "ChainActionID: " + str(self.chainActionID) + \
+               ", contractAccount: " + str(self.contractAccount) + \
+               ", actionName: " + str(self.actionName) + \
+               ", blockNum: " + str(self.blockNum) + \
+               ", transactionID: " + str(self.transactionID)
+
+
+class ChainActionCursor(Base):
+    __tablename__ = 'chainActionCursor'
+    """Class for storing indexed block range (per contract and action) - everything between firstBlockNum and
+     lastBlockNum (both included) is already in table chainAction"""
+    contractAccount = Column(CHAR(32), primary_key=True)
+    actionName = Column(CHAR(16), primary_key=True)
+    firstBlockNum = Column(BigInteger, nullable=False)
+    lastBlockNum = Column(BigInteger, nullable=False)
+    lastUpdate = Column(DateTime, nullable=False)
+
+    def __init__(self, contractAccount: str, actionName: str, firstBlockNum: int, lastBlockNum: int,
+                 lastUpdate: datetime = None):
+        """Initialization object"""
+        assert isinstance(contractAccount, str), "contractAccount must be str"
+        assert isinstance(actionName, str), "actionName must be str"
+        assert isinstance(firstBlockNum, int), "firstBlockNum must be int"
+        assert isinstance(lastBlockNum, int), "lastBlockNum must be int"
+        assert isinstance(lastUpdate, (datetime, type(None))), "lastUpdate must be datetime or None"
+
+        self.contractAccount = contractAccount
+        self.actionName = actionName
+        self.firstBlockNum = firstBlockNum
+        self.lastBlockNum = lastBlockNum
+        self.lastUpdate = lastUpdate if lastUpdate is not None else datetime.now()
+
+    def __str__(self):
+        return "contractAccount: " + str(self.contractAccount) + \
+               ", actionName: " + str(self.actionName) + \
+               ", firstBlockNum: " + str(self.firstBlockNum) + \
+               ", lastBlockNum: " + str(self.lastBlockNum) + \
+               ", lastUpdate: " + str(self.lastUpdate)
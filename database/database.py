@@ -1,18 +1,21 @@
 import copy
+import os
 import random
+from contextlib import contextmanager
 from enum import Enum
 
 import sqlalchemy
-from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy.pool import QueuePool
 
 from constants import CurrentElectionState, ReminderGroup
 from constants.electionState import ElectionStatusFromKey
 
 from log import *
 from constants.parameters import database_name, database_user, database_password, database_host, database_port, \
-    alert_message_time_election_is_coming
-from sqlalchemy import create_engine, func, or_, nullslast
+    alert_message_time_election_is_coming, database_pool_size, database_pool_max_overflow, database_pool_timeout, \
+    database_pool_recycle, token_cache_ttl
+from sqlalchemy import create_engine, func, or_, and_, nullslast, event, exc, case, update
 from sqlalchemy.engine.url import URL
 
 from datetime import datetime, timedelta
@@ -20,6 +23,7 @@ from datetime import datetime, timedelta
 import database.base
 from database.abi import Abi
 from database.tokenService import TokenService
+from database.tokenCache import TokenCache
 from database.election import Election, ElectionRound
 from database.electionStatus import ElectionStatus
 from database.participant import Participant
@@ -27,8 +31,12 @@ from database.extendedParticipant import ExtendedParticipant
 from database.extendedRoom import ExtendedRoom
 from database.room import Room, ROOM_PREDISPOSED_BY_PROCESS
 from database.roomAction import RoomAction
-from database.knownUser import KnownUser
+from database.knownUser import KnownUser, KnownUserVersion, KNOWN_USER_VERSION_ID
 from database.reminder import Reminder, ReminderSent, ReminderSendStatus
+from database.outboxMessage import OutboxMessage, OutboxStatus
+from database.chainAction import ChainAction, ChainActionCursor
+from database.blockAnchor import BlockAnchor
+from database.unitOfWork import UnitOfWork, UnitOfWorkSession, UnitOfWorkRegistry
 
 LOG = Log(className="Database")
 
@@ -44,9 +52,34 @@ class Singleton(type):
 
 ABIexception = "ABIexception"
 
+# max. participants updated with one statement
+PARTICIPANT_UPDATE_CHUNK_SIZE: int = 500
+# max. account names in one IN query
+PARTICIPANT_LOOKUP_CHUNK_SIZE: int = 500
+# max. idempotency keys in one IN query
+OUTBOX_LOOKUP_CHUNK_SIZE: int = 500
+
+
+def addForkProtection(engine: sqlalchemy.engine.Engine):
+    """Connections from the pool must not be shared between processes (pyrogram handler process is forked) - a
+    connection created in another process is invalidated on checkout and the pool creates a new one"""
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapiConnection, connectionRecord):
+        connectionRecord.info['pid'] = os.getpid()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapiConnection, connectionRecord, connectionProxy):
+        pid = os.getpid()
+        if connectionRecord.info['pid'] != pid:
+            connectionRecord.dbapi_connection = connectionProxy.dbapi_connection = None
+            raise exc.DisconnectionError("Connection record belongs to pid " + str(connectionRecord.info['pid']) +
+                                         ", attempting to check out in pid " + str(pid))
+
 
 class Database(metaclass=Singleton):
-    _conn: sqlalchemy.engine.base.Connection
+    _engine: sqlalchemy.engine.Engine
+    _sessionMaker: sessionmaker
     _localDict = {"1": Abi(accountName="1", lastUpdate=datetime.now(), contract="2")}
 
     __instance = None
@@ -67,20 +100,29 @@ class Database(metaclass=Singleton):
             LOG.debug("Initializing database")
             driver = 'mysql+pymysql'
             url = URL.create(driver, database_user, database_password, database_host, database_port, database_name)
-            # mysql connection
-            self._engine = create_engine(url, pool_recycle=3600, pool_pre_ping=True, #echo_pool=True, echo=True,
-                                         poolclass=NullPool)
-            self._conn = self._engine.connect()
-            # self._session = scoped_session(sessionmaker(bind=self._engine, expire_on_commit=False))
-            LOG.debug("Database initialized")
-            connection = self._engine.connect()
-            # self.SessionMaker = sessionmaker(bind=connection)
-            # self.session = self.SessionMaker(autoflush=True)
-            # self.session = scoped_session(self.SessionMaker)
+            # mysql connection pool; sessions check out a connection and return it on close
+            self._engine = create_engine(url,
+                                         poolclass=QueuePool,
+                                         pool_size=database_pool_size,
+                                         max_overflow=database_pool_max_overflow,
+                                         pool_timeout=database_pool_timeout,
+                                         pool_recycle=database_pool_recycle,
+                                         pool_pre_ping=True)  # echo_pool=True, echo=True,
+            addForkProtection(engine=self._engine)
+            # one session factory for all sessions
+            self._sessionMaker = sessionmaker(bind=self._engine)
+            # active unit of work (per thread)
+            self._unitOfWorkRegistry = UnitOfWorkRegistry()
+            # tokens are read from memory
+            self._tokenCache: TokenCache = TokenCache(ttl=token_cache_ttl)
+            # election statuses never change after fillElectionStatuses - loaded once
+            self._electionStatuses: dict[CurrentElectionState, ElectionStatus] = {}
+            self._electionStatusesByID: dict[int, ElectionStatus] = {}
             LOG.debug("Database initialized")
 
             # create tables if not exists
-            self.createTables(connection=connection)
+            with self._engine.begin() as connection:
+                self.createTables(connection=connection)
 
         except Exception as e:
             LOG.exception("I am unable to connect to the database: " + str(e))
@@ -90,31 +132,83 @@ class Database(metaclass=Singleton):
         try:
             LOG.debug("Creating tables if not exists")
             database.base.Base.metadata.create_all(connection, checkfirst=True)
+            self.createColumns(connection=connection)
+            self.createIndexes(connection=connection)
+            if connection.execute(sqlalchemy.select(KnownUserVersion.version)
+                                  .where(KnownUserVersion.knownUserVersionID == KNOWN_USER_VERSION_ID)).first() is None:
+                connection.execute(sqlalchemy.insert(KnownUserVersion)
+                                   .values(knownUserVersionID=KNOWN_USER_VERSION_ID, version=0))
         except Exception as e:
             LOG.exception("Problem occurred when creating tables: " + str(e))
             raise DatabaseExceptionConnection(str(e))
 
-    def createCsesion(self, expireOnCommit: bool = True) -> scoped_session:
+    def createColumns(self, connection: sqlalchemy.engine.base.Connection):
+        """create_all does not add columns to existing tables - add (nullable) columns declared in models but missing"""
+        inspector = sqlalchemy.inspect(connection)
+        for table in database.base.Base.metadata.sorted_tables:
+            existing: set = set(column['name'] for column in inspector.get_columns(table.name))
+            for column in table.columns:
+                if column.name not in existing:
+                    if column.nullable is False:
+                        LOG.error("Column " + column.name + " of table " + table.name + " is missing and cannot be "
+                                  "added automatically (not nullable)")
+                        continue
+                    LOG.info("Adding column " + column.name + " to table " + table.name)
+                    connection.execute(sqlalchemy.text(
+                        "ALTER TABLE `" + table.name + "` ADD COLUMN `" + column.name + "` " +
+                        column.type.compile(dialect=connection.dialect) + " NULL"))
+
+    def createIndexes(self, connection: sqlalchemy.engine.base.Connection):
+        """create_all does not add indexes to existing tables - create the ones declared in models but missing"""
+        inspector = sqlalchemy.inspect(connection)
+        for table in database.base.Base.metadata.sorted_tables:
+            existing: set = set(index['name'] for index in inspector.get_indexes(table.name))
+            for index in table.indexes:
+                if index.name not in existing:
+                    LOG.info("Creating index " + str(index.name) + " on table " + table.name)
+                    index.create(connection)
+
+    @contextmanager
+    def unitOfWork(self, batch: bool = False):
+        """All database methods called in the block share one session and are committed together at the end"""
+        assert isinstance(batch, bool), "batch must be type of bool"
+        if self._unitOfWorkRegistry.get() is not None:
+            # nested unit of work joins the outer one
+            yield self._unitOfWorkRegistry.get()
+            return
+        unitOfWork: UnitOfWork = UnitOfWork(session=self._sessionMaker(expire_on_commit=False), batch=batch)
+        self._unitOfWorkRegistry.set(unitOfWork)
+        try:
+            yield unitOfWork
+            unitOfWork.commit()
+        except Exception as e:
+            LOG.exception("Exception in unit of work - rollback. Description: " + str(e))
+            unitOfWork.rollback()
+            raise
+        finally:
+            self._unitOfWorkRegistry.set(None)
+            unitOfWork.close()
+
+    def checkpointUnitOfWork(self):
+        """Commit the work of the active unit of work before external side effects; no-op without unit of work"""
+        unitOfWork: UnitOfWork = self._unitOfWorkRegistry.get()
+        if unitOfWork is not None:
+            unitOfWork.checkpoint()
+
+    def createCsesion(self, expireOnCommit: bool = True) -> Session:
         try:
-            connection = self._engine.connect()
-            # self.SessionMaker = sessionmaker(bind=self._conn , expire_on_commit=expireOnCommit)
-            sessionMaker = sessionmaker(bind=connection, expire_on_commit=expireOnCommit)
-            # sessionMaker = sessionmaker(bind=self._conn, expire_on_commit=expireOnCommit)
-            Csession = scoped_session(sessionMaker)
-            csession = Csession()
-            return csession
+            unitOfWork: UnitOfWork = self._unitOfWorkRegistry.get()
+            if unitOfWork is not None:
+                return UnitOfWorkSession(unitOfWork=unitOfWork)
+            # connection is checked out from the pool on first query and returned to the pool in removeCcession
+            return self._sessionMaker(expire_on_commit=expireOnCommit)
         except Exception as e:
             LOG.exception(message="Problem occurred when creating session: " + str(e))
             raise DatabaseExceptionConnection("Problem occurred when creating session: " + str(e))
 
-    def createCsesionNotScoped(self, expireOnCommit: bool = True) -> scoped_session:
+    def createCsesionNotScoped(self, expireOnCommit: bool = True) -> Session:
         try:
-            # connection = self._engine.connect()
-            csessionMaker = sessionmaker(bind=self._conn, expire_on_commit=expireOnCommit)
-            csession = csessionMaker(autoflush=True)
-            # sessionMaker = sessionmaker(bind=connection, expire_on_commit=expireOnCommit)
-            # csession = scoped_session(sessionMaker)
-            return csession
+            return self._sessionMaker(expire_on_commit=expireOnCommit, autoflush=True)
         except Exception as e:
             LOG.exception(message="Problem occurred when creating session: " + str(e))
             raise DatabaseExceptionConnection("Problem occurred when creating session: " + str(e))
@@ -179,6 +273,7 @@ class Database(metaclass=Singleton):
                                            status=CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS))
                 session.commit()
             self.removeCcession(session=session)
+            self.loadElectionStatuses()
         except Exception as e:
             session.rollback()
             self.removeCcession(session=session)
@@ -222,6 +317,8 @@ class Database(metaclass=Singleton):
             session = self.createCsesion(expireOnCommit=False)
             tokenService: TokenService = TokenService(name=name, value=value, expireBy=expireBy)
             LOG.error("TOKEN EXPIRES WRITING:" + str(expireBy))
+            # check in database - cached token can be written by other process in the meantime
+            self._tokenCache.invalidate(name=name)
             if self.getToken(name) is None:
                 session.add(tokenService)
                 session.flush()
@@ -232,84 +329,114 @@ class Database(metaclass=Singleton):
                     .update({TokenService.value: value, TokenService.expireBy: expireBy})
                 session.flush()
                 session.commit()
+            if self._unitOfWorkRegistry.get() is not None:
+                # commit in unit of work only releases savepoint - token is not written until the unit is committed
+                self._tokenCache.invalidate(name=name)
+            else:
+                self._tokenCache.set(name=name, token=(value, expireBy))
             self.removeCcession(session=session)
         except Exception as e:
+            self._tokenCache.invalidate(name=name)
             session.rollback()
             self.removeCcession(session=session)
             LOG.exception(message="Problem occurred when writing token: " + str(e))
             raise DatabaseExceptionConnection("Problem occurred when writing token: " + str(e))
 
-    def getToken(self, name: str) -> str:
+    def loadToken(self, name: str) -> tuple[str, datetime]:
+        """Token (value, expireBy) from database or None if it does not exist; exception is raised on error"""
+        session = self.createCsesion()
         try:
-            session = self.createCsesion()
             tokenService = session.query(TokenService) \
                 .filter(TokenService.name == name) \
                 .first()
-
             LOG.info(message="Token: " + str(tokenService))
-            toReturn = tokenService.value if tokenService is not None else None
+            return (tokenService.value, tokenService.expireBy) if tokenService is not None else None
+        finally:
             self.removeCcession(session=session)
-            return toReturn
+
+    def getCachedToken(self, name: str) -> tuple[str, datetime]:
+        """Token (value, expireBy) or None - read from memory, database is read only when not cached (or too old)"""
+        return self._tokenCache.get(name=name, load=lambda: self.loadToken(name=name))
+
+    def getToken(self, name: str) -> str:
+        try:
+            token: tuple[str, datetime] = self.getCachedToken(name=name)
+            return token[0] if token is not None else None
         except Exception as e:
-            self.removeCcession(session=session)
             LOG.exception(message="Problem occurred when getting token: " + str(e))
             return None
 
     def checkIfTokenExists(self, name: str) -> bool:
         try:
-            session = self.createCsesion()
             LOG.debug(message="Checking if token exists: " + name)
-
-            tokenService = session.query(TokenService) \
-                .filter(TokenService.name == name) \
-                .first()
-            toReturn = False if tokenService is None else True
-            self.removeCcession(session=session)
-            return toReturn
+            return self.getCachedToken(name=name) is not None
         except Exception as e:
-            self.removeCcession(session=session)
             LOG.exception(message="Problem occurred when checking if token exists: " + str(e))
             return False
 
     def checkIfTokenExpired(self, name: str, executionTime: datetime) -> bool:
         try:
             LOG.debug("Checking if token expired")
-            session = self.createCsesion()
-            tokenService = session.query(TokenService) \
-                .filter(TokenService.name == name) \
-                .first()
-
-            if tokenService is None:
-                self.removeCcession(session=session)
-                return True
-            elif tokenService.expireBy < executionTime:
-                self.removeCcession(session=session)
+            token: tuple[str, datetime] = self.getCachedToken(name=name)
+            if token is None:
                 return True
-            else:
-                self.removeCcession(session=session)
-                # LOG.error(str(executionTime) +" checkIfTokenExpired. TOKEN EXPIRES:" + str(tokenService.expireBy))
-                return False
+            # LOG.error(str(executionTime) +" checkIfTokenExpired. TOKEN EXPIRES:" + str(token[1]))
+            return token[1] < executionTime
         except Exception as e:
-            self.removeCcession(session=session)
             LOG.exception(message="Problem occurred when checking if token expired: " + str(e))
             return True
 
-    def getElectionStatus(self, currentElectionState: CurrentElectionState) -> ElectionStatus:
+    def getTokenExpireBy(self, name: str) -> datetime:
         try:
-            session = self.createCsesion()
-            electionStatus = session.query(ElectionStatus) \
-                .filter(ElectionStatus.status == currentElectionState.value) \
-                .first()
+            token: tuple[str, datetime] = self.getCachedToken(name=name)
+            return token[1] if token is not None else None
+        except Exception as e:
+            LOG.exception(message="Problem occurred when getting token expiration: " + str(e))
+            return None
 
-            LOG.info(message="Election status: " + str(electionStatus))
-            toReturn = electionStatus
+    def loadElectionStatuses(self):
+        """Read (immutable) election statuses into memory"""
+        try:
+            session = self.createCsesion(expireOnCommit=False)
+            electionStatuses: list[ElectionStatus] = session.query(ElectionStatus).all()
             self.removeCcession(session=session)
-            return toReturn
+            self._electionStatuses = {ElectionStatusFromKey(value=electionStatus.status): electionStatus
+                                      for electionStatus in electionStatuses}
+            self._electionStatusesByID = {electionStatus.electionStatusID: electionStatus
+                                          for electionStatus in electionStatuses}
+            LOG.debug("Election statuses loaded: " + str(len(electionStatuses)))
         except Exception as e:
             self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when loading election statuses: " + str(e))
+            raise DatabaseExceptionConnection("Problem occurred when loading election statuses: " + str(e))
+
+    def getElectionStatus(self, currentElectionState: CurrentElectionState) -> ElectionStatus:
+        try:
+            if currentElectionState not in self._electionStatuses:
+                self.loadElectionStatuses()
+            electionStatus: ElectionStatus = self._electionStatuses.get(currentElectionState)
+            LOG.info(message="Election status: " + str(electionStatus))
+            return electionStatus
+        except Exception as e:
             LOG.exception(message="Problem occurred when getting election status: " + str(e))
             return None
 
+    def getElectionStatusByID(self, electionStatusID: int) -> ElectionStatus:
+        try:
+            if electionStatusID not in self._electionStatusesByID:
+                self.loadElectionStatuses()
+            return self._electionStatusesByID.get(electionStatusID)
+        except Exception as e:
+            LOG.exception(message="Problem occurred when getting election status by id: " + str(e))
+            return None
+
+    def electionStatusID(self, currentElectionState: CurrentElectionState) -> int:
+        """ID of election status - used instead of join with electionStatus table"""
+        electionStatus: ElectionStatus = self.getElectionStatus(currentElectionState=currentElectionState)
+        if electionStatus is None:
+            raise DatabaseException("Election status " + str(currentElectionState.value) + " not found")
+        return electionStatus.electionStatusID
+
     def updateElectionColumnElectionStateIfChanged(self,
                                                    election: Election,
                                                    currentElectionState: CurrentElectionState
@@ -320,29 +447,24 @@ class Database(metaclass=Singleton):
         try:
             # function return PREVIOUS election state - not current. If election state was not changed, return None
             session = self.createCsesion(expireOnCommit=False)
-            result = session.query(Election, ElectionStatus) \
-                .join(ElectionStatus, Election.status == ElectionStatus.electionStatusID) \
+            election: Election = session.query(Election) \
                 .filter(Election.electionID == election.electionID) \
                 .first()
+            electionStatus: ElectionStatus = self.getElectionStatusByID(electionStatusID=election.status) \
+                if election is not None else None
 
-            if result is None:
-                LOG.debug("Election " + str(election.electionID) + " not found")
+            if election is None or electionStatus is None:
+                LOG.debug("Election not found")
                 self.removeCcession(session=session)
                 return None
 
-            election: Election = result.Election
-            electionStatus: ElectionStatus = result.ElectionStatus
-
             if electionStatus.status == currentElectionState.value:
                 self.removeCcession(session=session)
                 return None
             else:
                 LOG.info("Election state changed from " + str(election.status) + " to " +
                          str(currentElectionState.value))
-                # getElectionStatus
-                newElectionStatus = session.query(ElectionStatus) \
-                    .filter(ElectionStatus.status == currentElectionState.value) \
-                    .first()
+                newElectionStatus: ElectionStatus = self.getElectionStatus(currentElectionState=currentElectionState)
 
                 if newElectionStatus is None or newElectionStatus.electionStatusID is None:
                     LOG.error("Election status is None ...")
@@ -369,18 +491,16 @@ class Database(metaclass=Singleton):
         try:
             session = self.createCsesion(expireOnCommit=False)
 
-            result = session.query(Election, ElectionStatus) \
-                .join(ElectionStatus, Election.status == ElectionStatus.electionStatusID) \
+            electionFromDB: Election = session.query(Election) \
                 .filter(Election.electionID == election.electionID) \
                 .first()
 
-            if result is None:
+            if electionFromDB is None:
                 LOG.debug("Election " + str(election.electionID) + " not found")
                 self.removeCcession(session=session)
                 return None
 
-            electionFromDB: Election = result.Election
-            electionStatusFromDB: ElectionStatus = result.ElectionStatus
+            electionStatusFromDB: ElectionStatus = self.getElectionStatusByID(electionStatusID=electionFromDB.status)
             if electionStatusFromDB is None or electionStatusFromDB.isLive == False:
                 # not live elections
                 self.removeCcession(session=session)
@@ -450,18 +570,149 @@ class Database(metaclass=Singleton):
             LOG.exception(message="Problem occurred when creating reminder sent record: " + str(e))
             # raise DatabaseExceptionConnection("Problem occurred when creating reminder sent record: " + str(e))
 
+    def writeReminderSentRecords(self, session, records: list[tuple[int, str, int, ReminderSendStatus]]):
+        """Writes many reminderSent records in given session (without commit); record is (reminderID, accountName,
+        round, sendStatus). One select for existing records, one multi-row insert and one update per send status"""
+        # the last status of the same (reminderID, accountName, round) wins
+        statuses: dict = {}
+        for reminderID, accountName, round, sendStatus in records:
+            assert isinstance(sendStatus, ReminderSendStatus), "sendStatus must be type of ReminderSendStatus"
+            statuses[(reminderID, accountName, round)] = sendStatus
+
+        existing: dict = {}
+        for reminderSentID, reminderID, accountName, round in \
+                session.query(ReminderSent.reminderSentID, ReminderSent.reminderID, ReminderSent.accountName,
+                              ReminderSent.round) \
+                        .filter(ReminderSent.reminderID.in_(set(key[0] for key in statuses))) \
+                        .filter(ReminderSent.accountName.in_(set(key[1] for key in statuses))) \
+                        .all():
+            existing[(reminderID, accountName, round)] = reminderSentID
+
+        toInsert: list[dict] = []
+        toUpdate: dict = {}  # sendStatus value -> list of reminderSentIDs
+        for key, sendStatus in statuses.items():
+            if key in existing:
+                toUpdate.setdefault(sendStatus.value, []).append(existing[key])
+            else:
+                toInsert.append({'reminderID': key[0], 'accountName': key[1], 'round': key[2],
+                                 'sendStatus': sendStatus.value})
+
+        if len(toInsert) > 0:
+            session.bulk_insert_mappings(ReminderSent, toInsert)
+        for sendStatusValue, reminderSentIDs in toUpdate.items():
+            session.query(ReminderSent) \
+                .filter(ReminderSent.reminderSentID.in_(reminderSentIDs)) \
+                .update({ReminderSent.sendStatus: sendStatusValue}, synchronize_session=False)
+        LOG.info("ReminderSent records saved; inserted: " + str(len(toInsert)) +
+                 ", updated: " + str(len(statuses) - len(toInsert)))
+
+    def enqueueOutboxMessages(self, messages: list[OutboxMessage]) -> int:
+        """Adds messages to the outbox; messages with idempotency key that is already in the outbox are skipped.
+        Joins the unit of work - messages are committed together with the rows they refer to (reminders,
+        participants) and sent after the commit. Returns number of new messages or None on error"""
+        assert isinstance(messages, list), "messages must be type of list"
+        if len(messages) == 0:
+            return 0
+        try:
+            session = self.createCsesion(expireOnCommit=False)
+            keys: list[str] = list(dict.fromkeys(message.idempotencyKey for message in messages))
+            existing: set = set()
+            for i in range(0, len(keys), OUTBOX_LOOKUP_CHUNK_SIZE):
+                existing.update(item[0] for item in session.query(OutboxMessage.idempotencyKey)
+                                .filter(OutboxMessage.idempotencyKey.in_(keys[i:i + OUTBOX_LOOKUP_CHUNK_SIZE]))
+                                .all())
+
+            toInsert: list[dict] = []
+            for message in messages:
+                assert isinstance(message, OutboxMessage), "message must be type of OutboxMessage"
+                if message.idempotencyKey in existing:
+                    continue
+                existing.add(message.idempotencyKey)
+                toInsert.append(message.toMapping())
+
+            if len(toInsert) > 0:
+                session.bulk_insert_mappings(OutboxMessage, toInsert)
+            session.commit()
+            LOG.info("Outbox; enqueued: " + str(len(toInsert)) + ", already in outbox: " +
+                     str(len(messages) - len(toInsert)))
+            self.removeCcession(session=session)
+            return len(toInsert)
+        except Exception as e:
+            session.rollback()
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when enqueuing outbox messages: " + str(e))
+            return None
+
+    def getDueOutboxMessages(self, now: datetime, limit: int) -> list[OutboxMessage]:
+        """Pending outbox messages with next attempt before 'now', the oldest first"""
+        assert isinstance(now, datetime), "now must be type of datetime"
+        assert isinstance(limit, int), "limit must be type of int"
+        try:
+            session = self.createCsesionNotScoped(expireOnCommit=False)
+            messages = session.query(OutboxMessage) \
+                .filter(OutboxMessage.status == OutboxStatus.PENDING.value,
+                        OutboxMessage.nextAttempt <= now) \
+                .order_by(OutboxMessage.outboxMessageID) \
+                .limit(limit) \
+                .all()
+            self.removeCcession(session=session)
+            return messages
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting due outbox messages: " + str(e))
+            return None
+
+    def getNextOutboxAttempt(self) -> datetime:
+        """The earliest next attempt of pending outbox messages; None when there is nothing to send"""
+        try:
+            session = self.createCsesionNotScoped(expireOnCommit=False)
+            nextAttempt = session.query(func.min(OutboxMessage.nextAttempt)) \
+                .filter(OutboxMessage.status == OutboxStatus.PENDING.value) \
+                .scalar()
+            self.removeCcession(session=session)
+            return nextAttempt
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting next outbox attempt: " + str(e))
+            raise DatabaseException("Problem occurred when getting next outbox attempt: " + str(e))
+
+    def updateOutboxMessages(self, updates: list[dict],
+                             reminderSentRecords: list[tuple[int, str, int, ReminderSendStatus]]) -> bool:
+        """Writes outcome of sent batch in one transaction: update is dict with outboxMessageID, status, attempts and
+        nextAttempt; reminderSent records of delivered (or finally failed) reminders are written together with it"""
+        assert isinstance(updates, list), "updates must be type of list"
+        assert isinstance(reminderSentRecords, list), "reminderSentRecords must be type of list"
+        if len(updates) == 0 and len(reminderSentRecords) == 0:
+            return True
+        try:
+            session = self.createCsesionNotScoped(expireOnCommit=False)
+            if len(updates) > 0:
+                session.bulk_update_mappings(OutboxMessage, updates)
+            if len(reminderSentRecords) > 0:
+                self.writeReminderSentRecords(session=session, records=reminderSentRecords)
+            session.commit()
+            self.removeCcession(session=session)
+            return True
+        except Exception as e:
+            session.rollback()
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when updating outbox messages: " + str(e))
+            return False
+
+    def queryParticipantsWithoutReminderSentRecord(self, session, reminder: Reminder):
+        """Anti-join: participants without successfully sent record of the reminder"""
+        return session.query(Participant.accountName, Participant.telegramID, Participant.participationStatus) \
+            .outerjoin(ReminderSent, and_(ReminderSent.accountName == Participant.accountName,
+                                          ReminderSent.reminderID == reminder.reminderID,
+                                          ReminderSent.sendStatus == ReminderSendStatus.SEND.value)) \
+            .filter(ReminderSent.reminderSentID == None)
+
     def getParticipantsWithoutReminderSentRecord(self, reminder: Reminder) -> list[tuple[str, str, bool]]:
         # returns list of tuples (accountName, telegramID, isVoter)
         assert isinstance(reminder, Reminder)
         try:
             session = self.createCsesion()
-            reminderSendRecords = session.query(ReminderSent.accountName) \
-                .filter(ReminderSent.reminderID == reminder.reminderID,
-                        ReminderSent.sendStatus == ReminderSendStatus.SEND.value)
-
-            participants = session.query(Participant.accountName, Participant.telegramID,
-                                         Participant.participationStatus) \
-                .filter(Participant.accountName.notin_(reminderSendRecords)).all()
+            participants = self.queryParticipantsWithoutReminderSentRecord(session=session, reminder=reminder).all()
 
             toReturn = participants
             self.removeCcession(session=session)
@@ -593,6 +844,26 @@ class Database(metaclass=Singleton):
             LOG.exception(message="Problem occurred when getting reminders: " + str(e))
             return None
 
+    def getReminderDatetimes(self, fromDatetime: datetime, limit: int = 10) -> list[datetime]:
+        """Returns the closest (send) times of reminders after fromDatetime - of any election"""
+        assert isinstance(fromDatetime, datetime), "fromDatetime is not datetime"
+        assert isinstance(limit, int), "limit is not int"
+        try:
+            session = self.createCsesion()
+            cs = session.query(Reminder.dateTimeBefore) \
+                .filter(Reminder.dateTimeBefore > fromDatetime) \
+                .order_by(Reminder.dateTimeBefore) \
+                .distinct() \
+                .limit(limit) \
+                .all()
+            toReturn = [item[0] for item in cs]
+            self.removeCcession(session=session)
+            return toReturn
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting reminder datetimes: " + str(e))
+            return []
+
     def getRemindersCount(self, election: Election, reminderGroup1: ReminderGroup,
                           reminderGroup2: ReminderGroup = None) -> int:
         assert isinstance(election, Election), "election is not Election"
@@ -638,6 +909,29 @@ class Database(metaclass=Singleton):
             LOG.exception(message="Problem occurred when getting participant: " + str(e))
             return None
 
+    def getParticipantsByAccountNames(self, accountNames: list[str],
+                                      chunkSize: int = PARTICIPANT_LOOKUP_CHUNK_SIZE) -> dict[str, Participant]:
+        """Participants of many accounts with one IN query per chunk; the same row as getParticipant returns (the
+        first one) is kept for every account. Accounts not in the database are not in the result"""
+        assert isinstance(accountNames, list), "accountNames is not a list"
+        assert isinstance(chunkSize, int) and chunkSize > 0, "chunkSize must be type of int and greater than 0"
+        try:
+            session = self.createCsesion()
+            uniqueNames: list[str] = list(dict.fromkeys(accountNames))
+            toReturn: dict[str, Participant] = {}
+            for i in range(0, len(uniqueNames), chunkSize):
+                for participant in session.query(Participant) \
+                        .filter(Participant.accountName.in_(uniqueNames[i:i + chunkSize])) \
+                        .order_by(Participant.accountName, Participant.roomID) \
+                        .all():
+                    toReturn.setdefault(participant.accountName, participant)
+            self.removeCcession(session=session)
+            return toReturn
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting participants: " + str(e))
+            return None
+
     def getParticipantByTelegramID(self, telegramID: str) -> Participant:
         assert isinstance(telegramID, str), "telegramID is not a string"
         try:
@@ -672,11 +966,11 @@ class Database(metaclass=Singleton):
             result = session.query(Participant) \
                 .join(Room, Room.roomID == Participant.roomID) \
                 .join(Election, Election.electionID == Room.electionID) \
-                .join(ElectionStatus, ElectionStatus.electionStatusID == Election.status) \
                 .order_by(Election.date.desc()) \
                 .filter(Election.date >= fromDate,
                         Election.contract == contractAccount,
-                        ElectionStatus.status == CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS.value
+                        Election.status ==
+                        self.electionStatusID(CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS)
                         ) \
                 .all()
 
@@ -701,6 +995,48 @@ class Database(metaclass=Singleton):
             LOG.exception(message="Problem occurred when getting known users: " + str(e))
             return None
 
+    def nextKnownUserVersion(self, session) -> int:
+        """Increments version counter in the session's transaction (row stays locked until commit)"""
+        session.execute(update(KnownUserVersion)
+                        .where(KnownUserVersion.knownUserVersionID == KNOWN_USER_VERSION_ID)
+                        .values(version=func.last_insert_id(KnownUserVersion.version + 1)))
+        return session.execute(sqlalchemy.select(func.last_insert_id())).scalar()
+
+    def getKnownUsersWithVersion(self, botName: str) -> tuple[int, list[KnownUser]]:
+        """All known users of the bot and version counter read in the same transaction (snapshot) - later changes
+        are read with getKnownUsersChangedAfter(version)"""
+        assert isinstance(botName, str), "botName is not a string"
+        try:
+            session = self.createCsesionNotScoped()
+            version: int = session.query(KnownUserVersion.version) \
+                .filter(KnownUserVersion.knownUserVersionID == KNOWN_USER_VERSION_ID) \
+                .scalar()
+            knownUsers: list[KnownUser] = session.query(KnownUser).filter(KnownUser.botName == botName).all()
+            self.removeCcession(session=session)
+            return version if version is not None else 0, knownUsers
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting known users with version: " + str(e))
+            return None
+
+    def getKnownUsersChangedAfter(self, botName: str, version: int) -> list[KnownUser]:
+        """Known users of the bot changed after given version, ordered by version"""
+        assert isinstance(botName, str), "botName is not a string"
+        assert isinstance(version, int), "version is not an int"
+        try:
+            session = self.createCsesionNotScoped()
+            knownUsers: list[KnownUser] = session.query(KnownUser) \
+                .filter(KnownUser.botName == botName,
+                        KnownUser.version > version) \
+                .order_by(KnownUser.version) \
+                .all()
+            self.removeCcession(session=session)
+            return knownUsers
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting changed known users: " + str(e))
+            return None
+
     def getKnownUser(self, botName: str, telegramID: str) -> KnownUser:
         assert isinstance(botName, str), "botName is not a string"
         assert isinstance(telegramID, str), "telegramID is not a string"
@@ -722,18 +1058,21 @@ class Database(metaclass=Singleton):
         assert isinstance(telegramID, str), "telegramID is not a string"
         assert isinstance(isKnown, bool), "isKnown is not a bool"
         try:
-            session = self.createCsesion()
+            # own transaction - version counter is locked until commit, it must not wait for the unit of work
+            session = self.createCsesionNotScoped()
+            version: int = self.nextKnownUserVersion(session=session)
 
             knownUser: KnownUser = session.query(KnownUser).filter(KnownUser.botName == botName,
                                                                    KnownUser.userID == telegramID.lower()).first()
             if knownUser is None:
-                participant = KnownUser(botName=botName, userID=telegramID.lower(), isKnown=isKnown)
+                participant = KnownUser(botName=botName, userID=telegramID.lower(), isKnown=isKnown, version=version)
                 session.add(participant)
                 session.commit()
                 self.removeCcession(session=session)
                 return True
             else:
                 knownUser.isKnown = isKnown
+                knownUser.version = version
                 session.commit()
                 self.removeCcession(session=session)
                 return True
@@ -1129,24 +1468,19 @@ class Database(metaclass=Singleton):
             electionFromDB = None
             if electionStatus.status == CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS.value:
                 LOG.debug("Election is dummy.")
-                result = session.query(Election, ElectionStatus) \
-                    .join(ElectionStatus, Election.status == ElectionStatus.electionStatusID) \
+                electionFromDB = session.query(Election) \
                     .filter(Election.date == election.date,
                             Election.contract == election.contract,
-                            ElectionStatus.status == electionStatus.status) \
+                            Election.status == electionStatus.electionStatusID) \
                     .first()
-                if result is not None:
-                    electionFromDB = result.Election
             else:
                 LOG.debug("Real election.")
-                result = session.query(Election, ElectionStatus) \
-                    .join(ElectionStatus, Election.status == ElectionStatus.electionStatusID) \
+                electionFromDB = session.query(Election) \
                     .filter(Election.date == election.date,
                             Election.contract == election.contract,
-                            ElectionStatus.status != CurrentElectionState.CURRENT_ELECTION_STATE_INIT_VOTERS_V1.value) \
+                            Election.status !=
+                            self.electionStatusID(CurrentElectionState.CURRENT_ELECTION_STATE_INIT_VOTERS_V1)) \
                     .first()
-                if result is not None:
-                    electionFromDB = result.Election
 
             # in the future remove this useless if statement
             if electionFromDB is None:
@@ -1218,6 +1552,55 @@ class Database(metaclass=Singleton):
             LOG.exception(message="Problem occurred when getting information if group were created: " + str(e))
             return None
 
+    def getCreatedRoomIndexes(self, election: Election, round: int) -> set[int]:
+        """Indexes of (not archived) rooms created for election and round - isGroupCreated for all indexes at once"""
+        assert isinstance(election, Election), "election must be type of Election"
+        assert isinstance(round, int), "round must be type of int"
+        try:
+            session = self.createCsesion()
+            roomIndexes = session.query(Room.roomIndex) \
+                .filter(Room.electionID == election.electionID,
+                        Room.round == round,
+                        Room.isArchived == False) \
+                .distinct() \
+                .all()
+            toReturn = set(item[0] for item in roomIndexes)
+            self.removeCcession(session=session)
+            return toReturn
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting indexes of created rooms: " + str(e))
+            return None
+
+    def getFreeRoomsElectionFilteredByRound(self, election: Election, round: int, predisposedBy: str) \
+            -> dict[int, Room]:
+        """Free (pre-created) rooms of the round by room index - getRoomElectionFilteredByRoundAndIndex for all
+        indexes at once"""
+        assert isinstance(election, Election), "election must be type of Election"
+        assert isinstance(round, int), "round must be type of int"
+        assert isinstance(predisposedBy, str), "predisposedBy must be type of str"
+        try:
+            session = self.createCsesion()
+            rooms = session.query(Room) \
+                .order_by(Room.roomIndex.desc()) \
+                .filter(Room.electionID == election.electionID,
+                        Room.predisposedBy == predisposedBy,
+                        Room.round == round,
+                        Room.predisposedDateTime != None,
+                        Room.isArchived == False).all()
+            toReturn: dict[int, Room] = {}
+            for room in rooms:
+                toReturn.setdefault(room.roomIndex, room)
+            LOG.debug("Free rooms (round: " + str(round) + ") for election " + str(election.electionID) + ": " +
+                      str(len(toReturn)))
+            self.removeCcession(session=session)
+            return toReturn
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred (getFreeRoomsElectionFilteredByRound) when getting rooms: "
+                                  + str(e))
+            return None
+
     def getDummyElection(self, election: Election) -> Election:
         assert isinstance(election, Election), "election is not a Election"
         try:
@@ -1226,12 +1609,12 @@ class Database(metaclass=Singleton):
 
             electionFromDB = (
                 session.query(Election)
-                .join(ElectionStatus, ElectionStatus.electionStatusID == Election.status)
                 .order_by(Election.date.desc())
                 .filter(
                     Election.date == election.date,
                     Election.contract == election.contract,
-                    ElectionStatus.status == CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS.value)
+                    Election.status ==
+                    self.electionStatusID(CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS))
                 .first()
             )
 
@@ -1251,11 +1634,10 @@ class Database(metaclass=Singleton):
             # get election
             electionFromDB = (
                 session.query(Election)
-                .join(ElectionStatus, ElectionStatus.electionStatusID == Election.status)
                 .order_by(Election.date.desc())
                 .filter(
                     Election.contract == contract,
-                    ElectionStatus.status == CurrentElectionState.CURRENT_ELECTION_STATE_ACTIVE.value)
+                    Election.status == self.electionStatusID(CurrentElectionState.CURRENT_ELECTION_STATE_ACTIVE))
                 .first()
             )
 
@@ -1280,11 +1662,11 @@ class Database(metaclass=Singleton):
             # get election
             electionFromDB = (
                 session.query(Election)
-                .join(ElectionStatus, ElectionStatus.electionStatusID == Election.status)
                 .order_by(Election.date.desc())
                 .filter(
                     Election.contract == contract,
-                    ElectionStatus.status != CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS.value)
+                    Election.status !=
+                    self.electionStatusID(CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS))
                 .first()
             )
 
@@ -1310,11 +1692,11 @@ class Database(metaclass=Singleton):
             # get election
             electionFromDB = (
                 session.query(Election)
-                .join(ElectionStatus, ElectionStatus.electionStatusID == Election.status)
                 .order_by(Election.date.desc())
                 .filter(
                     Election.contract == contract,
-                    ElectionStatus.status != CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS.value,
+                    Election.status !=
+                    self.electionStatusID(CurrentElectionState.CURRENT_ELECTION_STATE_CUSTOM_FREE_GROUPS),
                     Election.date == date
                 )
                 .first()
@@ -1426,61 +1808,56 @@ class Database(metaclass=Singleton):
                           ", IsArchived: " + str(roomFromDB.isArchived) +
                           " found.")
 
-            # get or create participant
-
-            for participant in participants:
-                participantfromDB = (
-                    session.query(Participant)
+            # create or update participants - existing rows of the room are loaded once and compared in memory
+            participantsByName: dict[str, Participant] = {participant.accountName: participant
+                                                          for participant in participants}
+            existing: dict[str, Participant] = {participant.accountName: participant for participant in
+                                                session.query(Participant)
+                                                .filter(Participant.roomID == roomFromDB.roomID)
+                                                .all()}
+
+            toInsert: list[dict] = []
+            toUpdate: list[Participant] = []
+            for accountName, participant in participantsByName.items():
+                participantFromDB: Participant = existing.get(accountName)
+                if participantFromDB is None:
+                    participant.roomID = roomFromDB.roomID
+                    toInsert.append({'accountName': participant.accountName,
+                                     'roomID': participant.roomID,
+                                     'participationStatus': participant.participationStatus,
+                                     'telegramID': participant.telegramID,
+                                     'nftTemplateID': participant.nftTemplateID,
+                                     'participantName': participant.participantName})
+                elif participant != participantFromDB:
+                    LOG.debug("Participant " + accountName + " data changed from " +
+                              str(participantFromDB.participationStatus) + " to " +
+                              str(participant.participationStatus))
+                    toUpdate.append(participant)
+
+            if len(toInsert) > 0:
+                session.bulk_insert_mappings(Participant, toInsert)
+            # participant can be moved to another room - primary key changes, it cannot be part of the bulk update
+            movedParticipants: list[Participant] = [participant for participant in toUpdate
+                                                    if participant.roomID is not None and
+                                                    participant.roomID != roomFromDB.roomID]
+            for participant in movedParticipants:
+                session.query(Participant) \
                     .filter(Participant.roomID == roomFromDB.roomID,
-                            Participant.accountName == participant.accountName)
-                    .first()
-                )
-                if participantfromDB is None:
-                    LOG.debug("Participant for election " + str(election.electionID) + " not found, creating new")
-                    participantfromDB = participant
-                    participantfromDB.roomID = roomFromDB.roomID
-                    session.add(participantfromDB)
-                    LOG.info("Participant; account name " + str(participant.accountName) +
-                             " roomID: " + str(participant.roomID) if participant.roomID is not None
-                             else "< unknown>" +
-                                  " participant status: " + str(
-                        participant.status) if participant.participationStatus is not None
-                    else "< unknown>" +
-                         " telegramID: " + str(participant.telegramID) if participant.telegramID is not None
-                    else "< unknown>" +
-                         " nft template id: " + str(participant.nftTemplateID) if participant.nftTemplateID is not None
-                    else "< unknown>" +
-                         " name: " + str(participant.name) if participant.name is not None
-                    else "< unknown>" +
-                         " created.")
-                else:
-                    LOG.info("Participant; account name " + str(participant.accountName) +
-                             " roomID: " + str(participant.roomID) if participant.roomID is not None
-                             else "< unknown>" +
-                                  " participant status: " + str(
-                        participant.status) if participant.participationStatus is not None
-                    else "< unknown>" +
-                         " telegramID: " + str(participant.telegramID) if participant.telegramID is not None
-                    else "< unknown>" +
-                         " nft template id: " + str(participant.nftTemplateID) if participant.nftTemplateID is not None
-                    else "< unknown>" +
-                         " name: " + str(participant.name) if participant.name is not None
-                    else "< unknown>" +
-                         " found.")
-
-                    if participant != participantfromDB:
-                        LOG.debug("Participant data changed from " + str(
-                            participantfromDB.participationStatus) + " to " + str(
-                            participant.participationStatus))
-
-                        session.query(Participant) \
-                            .filter(Participant.roomID == roomFromDB.roomID,
-                                    Participant.accountName == participant.accountName) \
-                            .update({Participant.participationStatus: participant.participationStatus,
-                                     Participant.telegramID: participant.telegramID,
-                                     Participant.nftTemplateID: participant.nftTemplateID,
-                                     Participant.roomID: participant.roomID,
-                                     Participant.participantName: participant.participantName})
+                            Participant.accountName == participant.accountName) \
+                    .update({Participant.participationStatus: participant.participationStatus,
+                             Participant.telegramID: participant.telegramID,
+                             Participant.nftTemplateID: participant.nftTemplateID,
+                             Participant.roomID: participant.roomID,
+                             Participant.participantName: participant.participantName},
+                            synchronize_session=False)
+            self.updateParticipantsInRoom(session=session,
+                                          roomID=roomFromDB.roomID,
+                                          participants=[participant for participant in toUpdate
+                                                        if all(participant is not moved
+                                                               for moved in movedParticipants)])
+            LOG.info("Participants in room " + str(roomFromDB.roomID) + "; created: " + str(len(toInsert)) +
+                     ", updated: " + str(len(toUpdate)) + ", unchanged: " +
+                     str(len(participantsByName) - len(toInsert) - len(toUpdate)))
             session.commit()
             self.removeCcession(session=session)
         except Exception as e:
@@ -1489,6 +1866,26 @@ class Database(metaclass=Singleton):
             LOG.exception(message="Problem occurred in function setMemberWithElectionIDAndWithRoomID: " + str(e))
             raise DatabaseException("Problem occurred in function setMemberWithElectionIDAndWithRoomID: " + str(e))
 
+    def updateParticipantsInRoom(self, session, roomID: int, participants: list[Participant],
+                                 chunkSize: int = PARTICIPANT_UPDATE_CHUNK_SIZE):
+        """Update participants of the room with one UPDATE ... CASE statement per chunk"""
+        assert isinstance(roomID, int), "roomID must be type of int"
+        assert isinstance(participants, list), "participants must be type of list"
+        for i in range(0, len(participants), chunkSize):
+            chunk: list[Participant] = participants[i:i + chunkSize]
+            accountNames: list[str] = [participant.accountName for participant in chunk]
+            session.query(Participant) \
+                .filter(Participant.roomID == roomID,
+                        Participant.accountName.in_(accountNames)) \
+                .update({column: case({participant.accountName: getattr(participant, column.key)
+                                       for participant in chunk},
+                                      value=Participant.accountName)
+                         for column in (Participant.participationStatus,
+                                        Participant.telegramID,
+                                        Participant.nftTemplateID,
+                                        Participant.participantName)},
+                        synchronize_session=False)
+
     def getMembers(self, election: Election) -> list[Participant]:
         assert isinstance(election, Election), "election is not of type Election"
         try:
@@ -1603,26 +2000,25 @@ class Database(metaclass=Singleton):
             LOG.exception(message="Problem occurred when getting members in specific rom: " + str(e))
             return None
 
+    def queryMembersInElectionRoundNotYetSend(self, session, reminder: Reminder):
+        """Anti-join: rooms and participants of the reminder's round without any sent record of the reminder (not
+        sent again, no matter of the reason)"""
+        return session.query(Room, Participant) \
+            .join(Participant, Participant.roomID == Room.roomID) \
+            .outerjoin(ReminderSent, and_(ReminderSent.accountName == Participant.accountName,
+                                          ReminderSent.reminderID == reminder.reminderID)) \
+            .order_by(Room.roomID.desc()) \
+            .filter(Room.round == reminder.round,
+                    Room.roomIndex >= 0,
+                    Room.isArchived == False,
+                    ReminderSent.reminderSentID == None)
+
     def getMembersInElectionRoundNotYetSend(self, election: Election, reminder: Reminder) -> list[Participant]:
         assert isinstance(election, Election), "election is not of type Election"
         assert isinstance(reminder, Reminder), "remionder is not of type Reminder"
         try:
             session = self.createCsesion()
-
-            reminderSentParticipant = session.query(ReminderSent.accountName) \
-                .filter(ReminderSent.reminderID == reminder.reminderID  # ,
-                        # ReminderSent.sendStatus == ReminderSendStatus.SEND.value #not send again, no matter of reason
-                        ).all()
-            reminderSentParticipant = [i[0] for i in reminderSentParticipant]
-
-            result = session.query(Room, Participant) \
-                .join(Participant, Participant.roomID == Room.roomID) \
-                .order_by(Room.roomID.desc()) \
-                .filter(Room.round == reminder.round,
-                        Room.roomIndex >= 0,
-                        Room.isArchived == False,
-                        Participant.accountName.notin_(reminderSentParticipant)
-                        ).all()
+            result = self.queryMembersInElectionRoundNotYetSend(session=session, reminder=reminder).all()
 
             toReturn = result
             self.removeCcession(session=session)
@@ -1771,6 +2167,129 @@ class Database(metaclass=Singleton):
         except Exception as e1:
             LOG.exception(message="Problem when gettting abi:" + str(e1))
 
+    def getChainActionCursor(self, contractAccount: str, actionName: str) -> ChainActionCursor:
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionName, str), "actionName must be type of str"
+        try:
+            session = self.createCsesion()
+            cs = session.query(ChainActionCursor) \
+                .filter(ChainActionCursor.contractAccount == contractAccount) \
+                .filter(ChainActionCursor.actionName == actionName) \
+                .first()
+            toReturn = cs
+            self.removeCcession(session=session)
+            return toReturn
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting chain action cursor: " + str(e))
+            raise DatabaseExceptionConnection("Problem occurred when getting chain action cursor: " + str(e))
+
+    def saveChainActions(self, contractAccount: str, actionName: str, chainActions: list[ChainAction],
+                         firstBlockNum: int, lastBlockNum: int):
+        """Save indexed actions and move the cursor (indexed block range) in the same transaction - cursor never
+        points past the actions that are stored"""
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionName, str), "actionName must be type of str"
+        assert isinstance(chainActions, list), "chainActions must be type of list"
+        assert isinstance(firstBlockNum, int), "firstBlockNum must be type of int"
+        assert isinstance(lastBlockNum, int), "lastBlockNum must be type of int"
+        try:
+            session = self.createCsesion(expireOnCommit=False)
+            if len(chainActions) > 0:
+                # the same transaction can be returned again when ranges are overlapping - skip already stored
+                existing: set = set(item[0] for item in session.query(ChainAction.transactionID)
+                                    .filter(ChainAction.contractAccount == contractAccount)
+                                    .filter(ChainAction.actionName == actionName)
+                                    .filter(ChainAction.transactionID.in_([chainAction.transactionID
+                                                                          for chainAction in chainActions]))
+                                    .all())
+                for chainAction in chainActions:
+                    if chainAction.transactionID in existing:
+                        continue
+                    existing.add(chainAction.transactionID)
+                    session.add(chainAction)
+
+            cursor: ChainActionCursor = session.query(ChainActionCursor) \
+                .filter(ChainActionCursor.contractAccount == contractAccount) \
+                .filter(ChainActionCursor.actionName == actionName) \
+                .first()
+            if cursor is None:
+                session.add(ChainActionCursor(contractAccount=contractAccount,
+                                              actionName=actionName,
+                                              firstBlockNum=firstBlockNum,
+                                              lastBlockNum=lastBlockNum))
+            else:
+                cursor.firstBlockNum = min(cursor.firstBlockNum, firstBlockNum)
+                cursor.lastBlockNum = max(cursor.lastBlockNum, lastBlockNum)
+                cursor.lastUpdate = datetime.now()
+            session.commit()
+            LOG.debug("Chain actions '" + actionName + "' saved: " + str(len(chainActions)) +
+                      "; indexed to block: " + str(lastBlockNum))
+            self.removeCcession(session=session)
+        except Exception as e:
+            session.rollback()
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when saving chain actions: " + str(e))
+            raise DatabaseExceptionConnection("Problem occurred when saving chain actions: " + str(e))
+
+    def getChainActions(self, contractAccount: str, actionName: str, startBlockNum: int, endBlockNum: int) \
+            -> list[ChainAction]:
+        assert isinstance(contractAccount, str), "contractAccount must be type of str"
+        assert isinstance(actionName, str), "actionName must be type of str"
+        assert isinstance(startBlockNum, int), "startBlockNum must be type of int"
+        assert isinstance(endBlockNum, int), "endBlockNum must be type of int"
+        try:
+            session = self.createCsesion()
+            cs = session.query(ChainAction) \
+                .filter(ChainAction.contractAccount == contractAccount) \
+                .filter(ChainAction.actionName == actionName) \
+                .filter(ChainAction.blockNum >= startBlockNum) \
+                .filter(ChainAction.blockNum <= endBlockNum) \
+                .order_by(ChainAction.blockNum, ChainAction.chainActionID) \
+                .all()
+            toReturn = cs
+            self.removeCcession(session=session)
+            return toReturn
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting chain actions: " + str(e))
+            raise DatabaseExceptionConnection("Problem occurred when getting chain actions: " + str(e))
+
+    def saveBlockAnchor(self, blockNum: int, timestamp: datetime):
+        assert isinstance(blockNum, int), "blockNum must be type of int"
+        assert isinstance(timestamp, datetime), "timestamp must be type of datetime"
+        try:
+            session = self.createCsesion(expireOnCommit=False)
+            if session.query(BlockAnchor).filter(BlockAnchor.blockNum == blockNum).first() is None:
+                session.add(BlockAnchor(blockNum=blockNum, timestamp=timestamp))
+                session.commit()
+            self.removeCcession(session=session)
+        except Exception as e:
+            session.rollback()
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when saving block anchor: " + str(e))
+
+    def getBlockAnchorsAround(self, timestamp: datetime) -> tuple[BlockAnchor, BlockAnchor]:
+        """Returns closest anchor before (or at) timestamp and closest anchor after (or at) timestamp; any of them
+        can be None"""
+        assert isinstance(timestamp, datetime), "timestamp must be type of datetime"
+        try:
+            session = self.createCsesion()
+            before = session.query(BlockAnchor) \
+                .filter(BlockAnchor.timestamp <= timestamp) \
+                .order_by(BlockAnchor.timestamp.desc()) \
+                .first()
+            after = session.query(BlockAnchor) \
+                .filter(BlockAnchor.timestamp >= timestamp) \
+                .order_by(BlockAnchor.timestamp.asc()) \
+                .first()
+            self.removeCcession(session=session)
+            return before, after
+        except Exception as e:
+            self.removeCcession(session=session)
+            LOG.exception(message="Problem occurred when getting block anchors: " + str(e))
+            return None, None
+
 
 class DatabaseException(Exception):
     """Base databasde class for other exceptions"""
@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, MetaData, Table, Column, Integer, ForeignKey, BOOLEAN, Text
+from sqlalchemy import DateTime, MetaData, Table, Column, Integer, ForeignKey, BOOLEAN, Text, Index
 from database.electionStatus import ElectionStatus
 from database.base import Base
 from datetime import datetime
@@ -11,8 +11,17 @@ class KnownUser(Base):
     botName = Column(Text)
     userID = Column(Text)
     isKnown = Column(BOOLEAN)
+    # value of KnownUserVersion counter at the last change; processes read only rows changed after their version
+    version = Column(Integer, nullable=True)
 
-    def __init__(self, botName: str, userID: str, isKnown: bool = True, knownUserID: int = None):
+    __table_args__ = (
+        # text columns - mysql needs prefix length
+        Index('ixKnownUserBotUser', 'botName', 'userID', mysql_length={'botName': 64, 'userID': 64}),
+        Index('ixKnownUserBotVersion', 'botName', 'version', mysql_length={'botName': 64}),
+    )
+
+    def __init__(self, botName: str, userID: str, isKnown: bool = True, knownUserID: int = None,
+                 version: int = None):
         """Initialization object"""
         assert isinstance(botName, str), "botName is not a string"
         assert isinstance(userID, str), "userID is not a string"
@@ -23,10 +32,30 @@ class KnownUser(Base):
         self.botName = botName
         self.userID = userID
         self.isKnown = isKnown
+        self.version = version
 
     def __str__(self):
         return "knownUserID: " + str(self.knownUserID) + \
                ", botName: " + str(self.botName) +\
                ", userID: " + str(self.userIDs) +\
-               ", isKnown: " + str(self.isKnown)
+               ", isKnown: " + str(self.isKnown) +\
+               ", version: " + str(self.version)
+
+
+KNOWN_USER_VERSION_ID: int = 1
+
+
+class KnownUserVersion(Base):
+    __tablename__ = 'knownUserVersion'
+    """Single row counter - incremented (and row locked until commit) by every change of known users, so versions
+    are committed in increasing order"""
+    knownUserVersionID = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+
+    def __init__(self, version: int = 0, knownUserVersionID: int = KNOWN_USER_VERSION_ID):
+        """Initialization object"""
+        assert isinstance(version, int), "version is not an int"
+        assert isinstance(knownUserVersionID, int), "knownUserVersionID is not an int"
+        self.knownUserVersionID = knownUserVersionID
+        self.version = version
 
@@ -0,0 +1,91 @@
+from enum import Enum
+from datetime import datetime
+from sqlalchemy import DateTime, Column, Integer, CHAR, Text, Index
+
+from database.base import Base
+
+
+class OutboxStatus(Enum):
+    """Enum for outbox message status"""
+    PENDING = 0
+    SENT = 1
+    FAILED = 2  # all attempts failed
+
+
+class OutboxMessage(Base):
+    __tablename__ = 'outboxMessage'
+    """Message waiting to be sent by OutboxDispatcher. Idempotency key is unique - the same message (i.e. reminder to
+    the member) is enqueued only once, even when the process restarts in the middle of the wave"""
+    outboxMessageID = Column(Integer, primary_key=True, autoincrement=True)
+    idempotencyKey = Column(CHAR(128), nullable=False, unique=True)
+    chatID = Column(CHAR(64), nullable=False)
+    text = Column(Text, nullable=False)
+    replyMarkup = Column(Text, nullable=True)  # json: rows of url buttons
+    photoPath = Column(Text, nullable=True)  # when set, message is sent as photo with text as caption
+    status = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    nextAttempt = Column(DateTime, nullable=False)
+    createdAt = Column(DateTime, nullable=False)
+    # time bound message (reminder) is not sent after this time - it is marked as failed
+    expiresAt = Column(DateTime, nullable=True)
+    # set when message is a reminder - reminderSent record is written after the delivery
+    reminderID = Column(Integer, nullable=True)
+    accountName = Column(CHAR(32), nullable=True)
+    round = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        # dispatcher: pending messages which are due
+        Index('ixOutboxMessageStatusNextAttempt', 'status', 'nextAttempt'),
+    )
+
+    def __init__(self, idempotencyKey: str, chatID: str, text: str, replyMarkup: str = None, photoPath: str = None,
+                 reminderID: int = None, accountName: str = None, round: int = None,
+                 status: OutboxStatus = OutboxStatus.PENDING, attempts: int = 0, nextAttempt: datetime = None,
+                 createdAt: datetime = None, expiresAt: datetime = None, outboxMessageID: int = None):
+        """Initialization object"""
+        assert isinstance(idempotencyKey, str), "idempotencyKey must be str"
+        assert len(idempotencyKey) <= 128, "idempotencyKey must be max. 128 characters long"
+        assert isinstance(chatID, str), "chatID must be str"
+        assert isinstance(text, str), "text must be str"
+        assert isinstance(replyMarkup, (str, type(None))), "replyMarkup must be str or None"
+        assert isinstance(photoPath, (str, type(None))), "photoPath must be str or None"
+        assert isinstance(reminderID, (int, type(None))), "reminderID must be int or None"
+        assert isinstance(accountName, (str, type(None))), "accountName must be str or None"
+        assert isinstance(round, (int, type(None))), "round must be int or None"
+        assert isinstance(status, OutboxStatus), "status must be OutboxStatus"
+        assert isinstance(attempts, int), "attempts must be int"
+        assert isinstance(nextAttempt, (datetime, type(None))), "nextAttempt must be datetime or None"
+        assert isinstance(createdAt, (datetime, type(None))), "createdAt must be datetime or None"
+        assert isinstance(expiresAt, (datetime, type(None))), "expiresAt must be datetime or None"
+        assert isinstance(outboxMessageID, (int, type(None))), "outboxMessageID must be int or None"
+
+        now: datetime = datetime.now()
+        self.outboxMessageID = outboxMessageID
+        self.idempotencyKey = idempotencyKey
+        self.chatID = chatID
+        self.text = text
+        self.replyMarkup = replyMarkup
+        self.photoPath = photoPath
+        self.reminderID = reminderID
+        self.accountName = accountName
+        self.round = round
+        self.status = status.value
+        self.attempts = attempts
+        self.nextAttempt = nextAttempt if nextAttempt is not None else now
+        self.createdAt = createdAt if createdAt is not None else now
+        self.expiresAt = expiresAt
+
+    def toMapping(self) -> dict:
+        """Column values for bulk insert"""
+        return {'idempotencyKey': self.idempotencyKey, 'chatID': self.chatID, 'text': self.text,
+                'replyMarkup': self.replyMarkup, 'photoPath': self.photoPath, 'reminderID': self.reminderID,
+                'accountName': self.accountName, 'round': self.round, 'status': self.status,
+                'attempts': self.attempts, 'nextAttempt': self.nextAttempt, 'createdAt': self.createdAt,
+                'expiresAt': self.expiresAt}
+
+    def __str__(self):
+        return "OutboxMessageID: " + str(self.outboxMessageID) + \
+               " IdempotencyKey: " + str(self.idempotencyKey) + \
+               " ChatID: " + str(self.chatID) + \
+               " Status: " + str(self.status) + \
+               " Attempts: " + str(self.attempts)
@@ -1,6 +1,6 @@
 from enum import Enum
 from datetime import datetime
-from sqlalchemy import DateTime, Column, Integer, ForeignKey, CHAR
+from sqlalchemy import DateTime, Column, Integer, ForeignKey, CHAR, Index
 
 from constants import ReminderGroup
 from database.participant import Participant
@@ -56,6 +56,11 @@ class ReminderSent(Base):
     sendStatus = Column(Integer)  # 0 - not sent, 1 - sent, 2 - error
     round = Column(Integer)
 
+    __table_args__ = (
+        # recipient queries: who already got the reminder
+        Index('ixReminderSentReminderAccountRound', 'reminderID', 'accountName', 'round'),
+    )
+
     def __init__(self, reminderID: int, accountName: str, sendStatus: ReminderSendStatus, round: int = None, reminderSentID: Reminder = None):
         """Initialization object"""
         assert isinstance(reminderSentID, (int, type(None)))
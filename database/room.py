@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Table, Column, Integer, ForeignKey, Text, CHAR, BOOLEAN, DateTime
+from sqlalchemy import String, Table, Column, Integer, ForeignKey, Text, CHAR, BOOLEAN, DateTime, Index
 from database.election import Election
 from database.base import Base
 
@@ -20,6 +20,10 @@ class Room(Base):
     shareLink = Column(CHAR(128))
     isArchived = Column(BOOLEAN, nullable=False)
 
+    __table_args__ = (
+        Index('ixRoomElectionRoundIndex', 'electionID', 'round', 'roomIndex'),
+    )
+
     def __init__(self,
                  electionID: int,
                  round: int,
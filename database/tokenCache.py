@@ -0,0 +1,48 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class TokenCache:
+    """In-memory copy of tokenService table: name -> (value, expireBy) or None when token does not exist.
+    Entry is replaced when token is written in this process and reloaded after ttl seconds, so writes from the other
+    process (pyrogram handler) are seen with max. ttl delay. Cache is dropped when used in forked process"""
+
+    def __init__(self, ttl: int):
+        assert isinstance(ttl, int), "ttl must be type of int"
+        self.ttl: int = ttl
+        self._lock = threading.Lock()
+        self._pid: int = os.getpid()
+        self._entries: dict = {}  # name -> (loadedAt, (value, expireBy) or None)
+
+    def _checkProcess(self):
+        if self._pid != os.getpid():
+            self._entries = {}
+            self._pid = os.getpid()
+
+    def get(self, name: str, load) -> tuple[str, datetime]:
+        """Returns (value, expireBy) or None; load() is called when entry is missing or too old"""
+        assert isinstance(name, str), "name must be type of str"
+        with self._lock:
+            self._checkProcess()
+            entry = self._entries.get(name)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+        token = load()
+        self.set(name=name, token=token)
+        return token
+
+    def set(self, name: str, token: tuple[str, datetime]):
+        assert isinstance(name, str), "name must be type of str"
+        assert isinstance(token, (tuple, type(None))), "token must be type of tuple or None"
+        with self._lock:
+            self._checkProcess()
+            self._entries[name] = (time.monotonic(), token)
+
+    def invalidate(self, name: str = None):
+        with self._lock:
+            if name is None:
+                self._entries = {}
+            else:
+                self._entries.pop(name, None)
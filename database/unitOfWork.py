@@ -0,0 +1,176 @@
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, ORMExecuteState
+
+from log import Log
+
+LOG = Log(className="UnitOfWork")
+
+
+class UnitOfWorkException(Exception):
+    pass
+
+
+class UnitOfWork:
+    """One session and one transaction shared by all Database methods called inside 'with database.unitOfWork()'.
+    Every method joins it through UnitOfWorkSession; transaction is committed once when the block ends.
+    Method gets a savepoint only when it writes (read-only methods cost no extra round trips). When batch is True
+    methods do not get savepoints - their work is flushed on commit; rollback of a method that wrote aborts the
+    whole unit"""
+
+    def __init__(self, session: Session, batch: bool = False):
+        assert isinstance(session, Session), "session must be type of Session"
+        assert isinstance(batch, bool), "batch must be type of bool"
+        self.session: Session = session
+        self.batch: bool = batch
+        self.pid: int = os.getpid()
+        self.commits: int = 0
+        self.aborted: bool = False
+        self.active: list = []  # open UnitOfWorkSessions - the last one is the method that runs now
+        # update/delete statements (i.e. query(...).update()) do not go through UnitOfWorkSession
+        event.listen(session, "do_orm_execute", self.onExecute)
+
+    def onExecute(self, state: ORMExecuteState):
+        if len(self.active) > 0 and (state.is_insert or state.is_update or state.is_delete):
+            self.active[-1].protect()
+
+    def commit(self):
+        if self.aborted:
+            raise UnitOfWorkException("Unit of work is aborted - it cannot be committed")
+        self.session.commit()
+        LOG.debug("Unit of work committed; joined commits: " + str(self.commits))
+
+    def checkpoint(self):
+        """Commit the work done so far (unit continues in a new transaction) - called before external side effects
+        (telegram), so their results are not lost if the rest of the unit is rolled back and locks are not held
+        during slow calls"""
+        if self.aborted:
+            raise UnitOfWorkException("Unit of work is aborted - no more side effects are allowed")
+        if len(self.active) > 0:
+            # inside of a Database method - its savepoint is not finished yet
+            return
+        self.session.commit()
+        LOG.debug("Unit of work checkpoint; joined commits: " + str(self.commits))
+
+    def rollback(self):
+        self.session.rollback()
+
+    def close(self):
+        self.session.close()
+
+
+class UnitOfWorkSession:
+    """Session handed to Database method when unit of work is active. Method's commit/rollback apply only to its own
+    part of the work (savepoint opened on the first write), close does not close the shared session - it detaches
+    objects loaded or added by the method, so callers get detached objects as with a closed session (their changes
+    are not written). Changes of loaded objects made before the first write can not be protected by the savepoint -
+    rollback after them aborts the unit"""
+
+    # session methods that write (or may write) - savepoint is opened before them
+    WRITE_METHODS: tuple = ('add', 'add_all', 'merge', 'delete', 'bulk_insert_mappings', 'bulk_update_mappings',
+                            'bulk_save_objects', 'execute', 'flush')
+
+    def __init__(self, unitOfWork: UnitOfWork):
+        assert isinstance(unitOfWork, UnitOfWork), "unitOfWork must be type of UnitOfWork"
+        if unitOfWork.aborted:
+            raise UnitOfWorkException("Unit of work is aborted - no more work is accepted")
+        self._unitOfWork: UnitOfWork = unitOfWork
+        # objects in the session before the method - loaded (and detached) by the outer method
+        self._knownKeys: set = set(unitOfWork.session.identity_map.keys())
+        self._savepoint = None
+        self._wrote: bool = False
+        self._unprotected: bool = False  # changes flushed outside of the savepoint
+        unitOfWork.active.append(self)
+
+    def __getattr__(self, name):
+        if name in UnitOfWorkSession.WRITE_METHODS:
+            self.protect()
+        return getattr(self._unitOfWork.session, name)
+
+    def _hasChanges(self) -> bool:
+        session: Session = self._unitOfWork.session
+        return len(session.new) > 0 or len(session.dirty) > 0 or len(session.deleted) > 0
+
+    def protect(self):
+        """Called before the write of the method"""
+        self._wrote = True
+        if self._unitOfWork.batch or self._savepoint is not None:
+            return
+        if self._hasChanges():
+            # begin_nested flushes them before SAVEPOINT
+            self._unprotected = True
+        self._savepoint = self._unitOfWork.session.begin_nested()
+
+    def abort(self, reason: str):
+        # earlier writes of the unit (and ids already returned to callers) would be lost - abort the unit instead
+        # of continuing on a half rolled back transaction; the unit of work rolls back everything at the end
+        self._unitOfWork.aborted = True
+        raise UnitOfWorkException(reason + " - the whole unit is aborted")
+
+    def commit(self):
+        self._unitOfWork.commits += 1
+        if self._savepoint is not None:
+            if self._savepoint.is_active:
+                self._savepoint.commit()
+            # next write of the method (method can commit more than once) gets its own savepoint
+            self._savepoint = None
+        elif self._hasChanges():
+            # objects are detached on close - their changes must be in the database before
+            self._unitOfWork.session.flush()
+        self._wrote = False
+        self._unprotected = False
+
+    def rollback(self):
+        session: Session = self._unitOfWork.session
+        if self._savepoint is not None:
+            if self._savepoint.is_active:
+                self._savepoint.rollback()
+            self._savepoint = None
+        elif self._wrote:
+            self.abort(reason="Rollback in batched unit of work")
+        if self._unprotected or len(session.deleted) > 0:
+            self.abort(reason="Rollback of changes written outside of the savepoint")
+        # nothing written yet - only changes in memory are discarded
+        for instance in list(session.new):
+            session.expunge(instance)
+        for instance in list(session.dirty):
+            session.expire(instance)
+        self._wrote = False
+
+    def close(self):
+        if self._savepoint is not None and self._savepoint.is_active:
+            # work of the method that was not committed is not part of the unit
+            self._savepoint.rollback()
+        self._savepoint = None
+        if self in self._unitOfWork.active:
+            self._unitOfWork.active.remove(self)
+        self._detach()
+
+    def _detach(self):
+        session: Session = self._unitOfWork.session
+        for identityKey, instance in list(session.identity_map.items()):
+            if identityKey not in self._knownKeys and instance in session:
+                session.expunge(instance)
+        # added by the method but not committed
+        for instance in list(session.new):
+            if instance in session:
+                session.expunge(instance)
+
+
+class UnitOfWorkRegistry:
+    """Active unit of work per thread (and process) - pyrogram handler threads never join the tick's unit of work"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self) -> UnitOfWork:
+        unitOfWork: UnitOfWork = getattr(self._local, 'unitOfWork', None)
+        if unitOfWork is not None and unitOfWork.pid != os.getpid():
+            return None
+        return unitOfWork
+
+    def set(self, unitOfWork: UnitOfWork):
+        assert isinstance(unitOfWork, (UnitOfWork, type(None))), "unitOfWork must be type of UnitOfWork or None"
+        self._local.unitOfWork = unitOfWork
@@ -0,0 +1,165 @@
+"""Benchmark of database paths used in every tick of the bot and EXPLAIN check of reminder recipient queries. Run it
+against development database only - it creates (and at the end removes) its own election, rooms and participants
+under contract BENCHMARK_CONTRACT.
+
+    python -m debugMode.benchmarkDatabase
+"""
+import time
+from datetime import datetime
+
+from sqlalchemy import event, text
+from sqlalchemy.dialects import mysql
+
+from constants import CurrentElectionState
+from database import Database, Election, ElectionStatus, Reminder
+from database.participant import Participant
+from database.room import Room
+from log import Log
+
+LOG = Log(className="BenchmarkDatabase")
+
+BENCHMARK_CONTRACT = "benchmark"
+MEMBER_COUNTS: tuple = (50, 500)
+# tables that must be read through an index in recipient queries
+RECIPIENT_INDEXED_TABLES: tuple = ("reminderSent", "participant")
+
+
+class StatementCounter:
+    """Counts statements sent to the server"""
+
+    def __init__(self, database: Database):
+        self.count: int = 0
+        event.listen(database._engine, "before_cursor_execute", self.before)
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def createParticipants(count: int, participationStatus: bool) -> list[Participant]:
+    return [Participant(accountName="bench" + str(i).zfill(6),
+                        roomID=None,
+                        participationStatus=participationStatus,
+                        telegramID="@bench" + str(i),
+                        nftTemplateID=i,
+                        participantName="Bench " + str(i))
+            for i in range(count)]
+
+
+def legacySetMembers(database: Database, room: Room, participants: list[Participant]):
+    """Previous implementation of the participant sync - one select (and update) per participant"""
+    session = database.createCsesion(expireOnCommit=False)
+    for participant in participants:
+        participantFromDB = session.query(Participant) \
+            .filter(Participant.roomID == room.roomID,
+                    Participant.accountName == participant.accountName) \
+            .first()
+        if participantFromDB is None:
+            participant.roomID = room.roomID
+            session.add(participant)
+        elif participant != participantFromDB:
+            session.query(Participant) \
+                .filter(Participant.roomID == room.roomID,
+                        Participant.accountName == participant.accountName) \
+                .update({Participant.participationStatus: participant.participationStatus})
+    session.commit()
+    database.removeCcession(session=session)
+
+
+def cleanUp(database: Database, election: Election):
+    session = database.createCsesion()
+    roomIDs: list[int] = [item[0] for item in session.query(Room.roomID)
+                          .filter(Room.electionID == election.electionID).all()]
+    session.query(Participant).filter(Participant.roomID.in_(roomIDs)).delete(synchronize_session=False)
+    session.query(Room).filter(Room.electionID == election.electionID).delete(synchronize_session=False)
+    session.query(Election).filter(Election.electionID == election.electionID).delete(synchronize_session=False)
+    session.commit()
+    database.removeCcession(session=session)
+
+
+def measure(counter: StatementCounter, function) -> tuple[int, float]:
+    counter.reset()
+    start: float = time.perf_counter()
+    function()
+    return counter.count, (time.perf_counter() - start) * 1000
+
+
+def benchmarkParticipantSync(database: Database, counter: StatementCounter, election: Election):
+    print("\nParticipant sync (setMemberWithElectionIDAndWithRoomID)")
+    print("members | path     | insert: statements, ms | update: statements, ms")
+    for index, count in enumerate(MEMBER_COUNTS):
+        for path in ("legacy", "setBased"):
+            room: Room = Room(electionID=election.electionID, round=index, roomIndex=0 if path == "legacy" else 1,
+                              roomNameShort="bench" + path, roomNameLong="benchmark " + path + " " + str(count))
+            if path == "legacy":
+                database.setMemberWithElectionIDAndWithRoomID(election=election, room=room,
+                                                              participants=createParticipants(1, True))
+                insert = measure(counter, lambda: legacySetMembers(
+                    database=database, room=room, participants=createParticipants(count, True)))
+                update = measure(counter, lambda: legacySetMembers(
+                    database=database, room=room, participants=createParticipants(count, False)))
+            else:
+                insert = measure(counter, lambda: database.setMemberWithElectionIDAndWithRoomID(
+                    election=election, room=room, participants=createParticipants(count, True)))
+                update = measure(counter, lambda: database.setMemberWithElectionIDAndWithRoomID(
+                    election=election, room=room, participants=createParticipants(count, False)))
+            print(str(count).rjust(7) + " | " + path.ljust(8) + " | " +
+                  (str(insert[0]) + ", " + str(round(insert[1]))).rjust(22) + " | " +
+                  (str(update[0]) + ", " + str(round(update[1]))).rjust(22))
+
+
+def explain(database: Database, query) -> list[dict]:
+    sql: str = str(query.statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+    session = database.createCsesion()
+    rows = session.execute(text("EXPLAIN " + sql)).mappings().all()
+    database.removeCcession(session=session)
+    return [dict(row) for row in rows]
+
+
+def checkRecipientQueries(database: Database, election: Election) -> bool:
+    """EXPLAIN of reminder recipient queries - no full scan of tables in RECIPIENT_INDEXED_TABLES"""
+    print("\nRecipient queries (EXPLAIN)")
+    reminder: Reminder = Reminder(dateTimeBefore=datetime(2000, 1, 1), electionID=election.electionID, round=0,
+                                  reminderID=0)
+    session = database.createCsesion()
+    queries: dict = {
+        "getParticipantsWithoutReminderSentRecord":
+            database.queryParticipantsWithoutReminderSentRecord(session=session, reminder=reminder),
+        "getMembersInElectionRoundNotYetSend":
+            database.queryMembersInElectionRoundNotYetSend(session=session, reminder=reminder)
+    }
+    database.removeCcession(session=session)
+
+    isOk: bool = True
+    for name, query in queries.items():
+        for row in explain(database=database, query=query):
+            table: str = row.get('table')
+            isFullScan: bool = row.get('type') == 'ALL'
+            if table in RECIPIENT_INDEXED_TABLES and isFullScan:
+                isOk = False
+            print(name.ljust(42) + " | " + str(table).ljust(14) + " | type: " + str(row.get('type')).ljust(6) +
+                  " | key: " + str(row.get('key')).ljust(36) + " | rows: " + str(row.get('rows')) +
+                  (" <- FULL SCAN" if table in RECIPIENT_INDEXED_TABLES and isFullScan else ""))
+    print("Recipient queries use indexes: " + ("OK" if isOk else "FAILED"))
+    return isOk
+
+
+def main():
+    database: Database = Database()
+    counter: StatementCounter = StatementCounter(database=database)
+    status: ElectionStatus = database.getElectionStatus(CurrentElectionState.CURRENT_ELECTION_STATE_PENDING_DATE)
+    election: Election = database.setElection(election=Election(date=datetime(2000, 1, 1),
+                                                                status=status,
+                                                                contract=BENCHMARK_CONTRACT),
+                                              electionStatus=status)
+    try:
+        benchmarkParticipantSync(database=database, counter=counter, election=election)
+        checkRecipientQueries(database=database, election=election)
+    finally:
+        cleanUp(database=database, election=election)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from log import Log
 from enum import Enum
 from chain import EdenData
+from chain.dfuse import Response, ResponseError
+from constants import eos_block_interval, live_mode_verify_block_every
 
 
 class Mode(Enum):
@@ -94,11 +96,13 @@ class ModeDemo:
 
         cls.edenObj = edenObj
         cls.stepBack = stepBack
-        cls.currentBlockHeight = cls.edenObj.getChainHeadBlockNumber() - cls.stepBack
-        cls.currentBlockTimestamp = cls.edenObj.getTimestampOfBlock(blockNum=cls.currentBlockHeight)
-        return cls(edenObj=edenObj,
-                   startAndEndDatetime=[(datetime(2022, 10, 8, 14, 59), datetime(2022, 10, 8, 15, 3))],
-                   fromLive = True)
+        cls.liveStepCounter = 0
+        cls.liveTimestampOffset = timedelta(seconds=0)
+        selfObject = cls(edenObj=edenObj,
+                         startAndEndDatetime=[(datetime(2022, 10, 8, 14, 59), datetime(2022, 10, 8, 15, 3))],
+                         fromLive = True)
+        selfObject.setNextLiveBlockAndTimestamp()
+        return selfObject
 
 
 
@@ -107,9 +111,29 @@ class ModeDemo:
 
     #works only when demoMode is called by DemoMode.live(...)
     def setNextLiveBlockAndTimestamp(self):
+        """Timestamp of block (head - stepBack) is calculated from head block time (one get_info call). Every n-th
+        step it is verified with the real block - difference (missed blocks) is used until next verification"""
         assert (self.liveMode is True), "LiveMode should be True when you call 'ModeDemo.setNextLiveBlockAndTimestamp'"
-        self.currentBlockHeight = self.edenObj.getChainHeadBlockNumber() - self.stepBack
-        self.currentBlockTimestamp = self.edenObj.getTimestampOfBlock(blockNum=self.currentBlockHeight)
+        headInfo: Response = self.edenObj.getChainHeadInfo()
+        if isinstance(headInfo, ResponseError):
+            LOG.exception("ModeDemo; Head info is not available: " + str(headInfo.error))
+            raise ModeDemoException("Head info is not available: " + str(headInfo.error))
+
+        self.currentBlockHeight = headInfo.data['headBlockNum'] - self.stepBack
+        calculatedTimestamp: datetime = headInfo.data['headBlockTime'] - \
+                                        timedelta(seconds=self.stepBack * eos_block_interval)
+
+        if self.liveStepCounter % live_mode_verify_block_every == 0:
+            blockTimestamp = self.edenObj.getTimestampOfBlock(blockNum=self.currentBlockHeight)
+            if isinstance(blockTimestamp, datetime):
+                self.liveTimestampOffset = blockTimestamp - calculatedTimestamp
+                LOG.debug("ModeDemo; Verified timestamp of block; offset: " + str(self.liveTimestampOffset))
+            else:
+                LOG.error("ModeDemo; Timestamp of block " + str(self.currentBlockHeight) +
+                          " is not available, use calculated one")
+        self.liveStepCounter += 1
+
+        self.currentBlockTimestamp = calculatedTimestamp + self.liveTimestampOffset
         LOG.debug("Block: " + str(self.currentBlockHeight) + ", timestamp" + str(self.currentBlockTimestamp))
 
     def setStartBlockHeight(self, height: int):
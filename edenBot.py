@@ -12,18 +12,23 @@ from chain.memberState import MemberState
 from chain.stateElectionState import ElectCurrTable
 from community import CommunityList, CommunityListState, CommunityGroup
 from constants import dfuse_api_key, telegram_api_id, telegram_api_hash, telegram_bot_token, CurrentElectionState, \
-    eden_account, telegram_user_bot_name, telegram_bot_name, community_group_id, community_group_testing
+    eden_account, telegram_user_bot_name, telegram_bot_name, community_group_id, community_group_testing, \
+    database_unit_of_work_batch, full_tick_max_interval, full_tick_max_interval_not_election
 from database import Database, Election, ElectionStatus, Reminder
 from database.comunityParticipant import CommunityParticipant
 from transmissionCustom import CustomMember, AdminRights, MemberStatus, Promotion
 from sbt import SBT
 from database.election import ElectionRound
+from database.unitOfWork import UnitOfWorkException
 from log import Log
 from datetime import datetime, timedelta
 from debugMode.modeDemo import ModeDemo, Mode
 from groupManagement import GroupManagement
+from changeDetection import ChangeDetection
+from scheduler import Scheduler
 
 from transmission import Communication, SessionType
+from transmission.outboxDispatcher import OutboxDispatcher
 
 from multiprocessing import Process
 
@@ -39,6 +44,17 @@ REPEAT_TIME = {
     EdenBotMode.NOT_ELECTION: 60 * 10  # every half hour 60 seconds  x 10 minutes
 }
 
+# full tick is done at least every n seconds, even if nothing changed
+FULL_TICK_MAX_INTERVAL = {
+    EdenBotMode.ELECTION: full_tick_max_interval,
+    EdenBotMode.NOT_ELECTION: full_tick_max_interval_not_election
+}
+
+# max sleep time in demo mode
+REPEAT_TIME_DEMO = 10
+
+TOKEN_GROUP_MAINTENANCE = "groupMaintenance"
+
 
 class EdenBot:
     botMode: EdenBotMode
@@ -87,6 +103,10 @@ class EdenBot:
             self.communication.startComm(apiId=telegramApiID,
                                          apiHash=telegramApiHash,
                                          botToken=botToken)
+            # sends messages which were not sent before restart and retries failed ones
+            self.outboxDispatcher: OutboxDispatcher = OutboxDispatcher(database=database,
+                                                                       communication=self.communication)
+            self.outboxDispatcher.loadNextDue()
 
             LOG.debug("Creating first communication session user bot to bot if not yet created")
             self.sayHelloFromUserBotToBot(userBotUsername=telegram_user_bot_name,
@@ -114,7 +134,11 @@ class EdenBot:
             LOG.debug("... is finished")
             # set current election state
             self.currentElectionStateHandler: CurrentElectionStateHandler = None
-            self.setCurrentElectionStateAndCallCustomActions(contract=eden_account, database=self.database)
+            # skipping ticks when nothing changed
+            self.changeDetection: ChangeDetection = ChangeDetection()
+            # sleep time between ticks
+            self.scheduler: Scheduler = Scheduler()
+            self.tick()
         except Exception as e:
             LOG.exception("Exception in EdenBot.init. Description: " + str(e))
 
@@ -302,7 +326,7 @@ class EdenBot:
             # when we are trying to search until current time
             executionTime = self.modeDemo.getCurrentBlockTimestamp() if self.modeDemo.isLiveMode() is True \
                 else datetime.now() - timedelta(hours=3)
-            TOKEN_NAME = "groupMaintenance"
+            TOKEN_NAME = TOKEN_GROUP_MAINTENANCE
 
             #if testing is true, run it no matter what
             needToRun: bool = False if self.communityGroupManagement.testing == False else True
@@ -421,8 +445,104 @@ class EdenBot:
 
             if election is None:
                 raise EdenBotException("Election is still None - not set in database")
+            return True
+        except UnitOfWorkException:
+            # aborted unit of work must not be committed - the tick is stopped
+            raise
         except Exception as e:
             LOG.exception("Exception in setCurrentElectionStateAndCallCustomActions. Description: " + str(e))
+            return False
+
+    def getExecutionTime(self) -> datetime:
+        if self.modeDemo is not None:
+            return self.modeDemo.getCurrentBlockTimestamp()
+        chainTime = self.edenData.getChainDatetime()
+        if isinstance(chainTime, ResponseError):
+            LOG.error("Error when called eden.getChainDatetime; Description: " + chainTime.error)
+            return None
+        return chainTime
+
+    def getDeadlines(self, executionTime: datetime) -> list[datetime]:
+        """Times when the bot needs to do something even if chain state is not changed"""
+        deadlines: list[datetime] = []
+        if self.currentElectionStateHandler is not None:
+            deadlines.extend(self.currentElectionStateHandler.getDeadlines())
+        deadlines.extend(self.database.getReminderDatetimes(fromDatetime=executionTime))
+        groupMaintenanceExpireBy: datetime = self.database.getTokenExpireBy(name=TOKEN_GROUP_MAINTENANCE)
+        if groupMaintenanceExpireBy is not None:
+            deadlines.append(groupMaintenanceExpireBy)
+        return deadlines
+
+    def getStateHash(self, electionState: Response, height: int = None) -> str:
+        """Hash of elect.curr, members (participation in election) and votes (participants of the rounds) tables;
+        None when any of them is not available - tick must be full"""
+        if isinstance(electionState, ResponseSuccessful) is False:
+            return None
+        members: Response = self.edenData.getMembers(height=height)
+        participants: Response = self.edenData.getParticipants(height=height)
+        if isinstance(members, ResponseSuccessful) is False or isinstance(participants, ResponseSuccessful) is False:
+            return None
+        return ChangeDetection.hash({'electCurr': electionState.data,
+                                     'members': members.data,
+                                     'votes': participants.data})
+
+    def tick(self):
+        """One pass of the bot; chain tables and head info are read only once and shared by all managers. When
+        election state is not changed and no deadline passed, work is skipped (no database, no telegram - unless
+        outbox messages are due)"""
+        self.edenData.startSnapshot()
+        try:
+            if self.modeDemo is not None and self.modeDemo.isLiveMode():
+                self.modeDemo.setNextLiveBlockAndTimestamp()
+
+            # read in snapshot - setCurrentElectionStateAndCallCustomActions gets the same response
+            electionState: Response = self.edenData.getCurrentElectionState(
+                height=self.modeDemo.currentBlockHeight if self.modeDemo is not None else None)
+            executionTime: datetime = self.getExecutionTime()
+            self.scheduler.tickDone(executionTime=executionTime)
+            stateHash: str = self.getStateHash(
+                electionState=electionState,
+                height=self.modeDemo.currentBlockHeight if self.modeDemo is not None else None) \
+                if executionTime is not None else None
+            edenBotMode: EdenBotMode = self.currentElectionStateHandler.edenBotMode \
+                if self.currentElectionStateHandler is not None else EdenBotMode.ELECTION
+
+            if stateHash is not None and \
+                    self.changeDetection.isWorkNeeded(stateHash=stateHash,
+                                                      now=executionTime,
+                                                      maxInterval=FULL_TICK_MAX_INTERVAL[edenBotMode]) is False:
+                LOG.debug("Election state is not changed and no deadline passed - skip the tick")
+            else:
+                # whole tick is one database transaction
+                with self.database.unitOfWork(batch=database_unit_of_work_batch):
+                    if self.setCurrentElectionStateAndCallCustomActions(contract=eden_account,
+                                                                        database=self.database) \
+                            and stateHash is not None:
+                        self.changeDetection.markRun(stateHash=stateHash,
+                                                     now=executionTime,
+                                                     deadlines=self.getDeadlines(executionTime=executionTime))
+                    else:
+                        self.changeDetection.reset()
+
+            # after the unit of work is committed - outbox records refer to rows written in it
+            self.outboxDispatcher.drainIfDue()
+        except Exception:
+            # aborted unit of work - nothing is saved, next tick does the full work again
+            self.changeDetection.reset()
+            raise
+        finally:
+            self.edenData.stopSnapshot()
+
+    def sleepUntilNextTick(self, maxSleep: int):
+        nextDeadline: datetime = None
+        now: datetime = self.scheduler.estimatedNow()
+        if now is not None:
+            nextDeadline = self.changeDetection.nextDeadline(now=now - self.scheduler.deadlineMargin)
+            if OutboxDispatcher.nextDueAt is not None:
+                # outbox works in local time, deadlines in chain time
+                outboxDue: datetime = now + max(OutboxDispatcher.nextDueAt - datetime.now(), timedelta(0))
+                nextDeadline = outboxDue if nextDeadline is None else min(nextDeadline, outboxDue)
+        self.scheduler.sleep(maxSleep=maxSleep, nextDeadline=nextDeadline)
 
     def start(self):
         LOG.info("Starting EdenBot")
@@ -430,19 +550,23 @@ class EdenBot:
             i = 0
             while True:
                 try:
-                    # sleep time depends on bot mode
+                    # sleep until the next deadline; max sleep time depends on bot mode
                     if self.mode == Mode.LIVE:
-                        time.sleep(REPEAT_TIME[self.currentElectionStateHandler.edenBotMode])
+                        self.sleepUntilNextTick(maxSleep=REPEAT_TIME[self.currentElectionStateHandler.edenBotMode]
+                                                if self.currentElectionStateHandler is not None
+                                                else REPEAT_TIME[EdenBotMode.ELECTION])
 
                     elif self.mode == Mode.DEMO and self.modeDemo is not None:
                         # Mode.DEMO
-                        LOG.debug("Demo mode: sleep time: " + str(10))
-                        time.sleep(10)  # in demo mode sleep 3
-
                         if self.modeDemo.isLiveMode():
-                            self.modeDemo.setNextLiveBlockAndTimestamp()
-
+                            self.sleepUntilNextTick(maxSleep=REPEAT_TIME_DEMO)
                         else:
+                            # simulated time - deadlines are not related to real time
+                            LOG.debug("Demo mode: sleep time: " + str(REPEAT_TIME_DEMO))
+                            time.sleep(REPEAT_TIME_DEMO)
+
+                        # live mode moves to the next block in tick()
+                        if self.modeDemo.isLiveMode() is False:
                             if self.modeDemo.isNextTimestampInLimit(seconds=60):
                                 self.modeDemo.setNextTimestamp(seconds=60)
                             else:
@@ -455,7 +579,7 @@ class EdenBot:
                     # defines current election state and write it to the database
                     #just temp
                     #return
-                    self.setCurrentElectionStateAndCallCustomActions(contract=eden_account, database=self.database)
+                    self.tick()
 
                 except Exception as e:
                     LOG.exception("Exception in start loop. Description: " + str(e))
@@ -495,6 +495,12 @@ class GroupManagement:
             LOG.debug("Participants from chain: " + str(response.data))
             members = []
             if response.data is not None:
+                # all participants of the round are read from database at once
+                participants: dict[str, Participant] = self.database.getParticipantsByAccountNames(
+                    accountNames=[key for key, value in response.data.items()
+                                  if key is not None and (value['round'] == round or isLastRound is True)])
+                if participants is None:
+                    raise GroupManagementException("Error when called database.getParticipantsByAccountNames")
                 for key, value in response.data.items():
 
                     if value['round'] == round or isLastRound is True:
@@ -502,7 +508,7 @@ class GroupManagement:
                             LOG.error("groupManagement.getParticipantsFromChain; key is none! Skip it")
                             members.append(None)
                             continue
-                        participant: Participant = self.database.getParticipant(accountName=key)
+                        participant: Participant = participants.get(key)
                         if participant is None:
                             LOG.error("Participant not found in db (Skip it); name:" + str(key))
                             members.append(None)
@@ -554,6 +560,28 @@ class GroupManagement:
             raise GroupManagementException(
                 "Exception thrown when called GroupManagement.getFreePreelectionRoom; Description: " + str(e))
 
+    def getFreePreelectionRooms(self, election: Election, round: int, predisposedBy: str) -> dict[int, Room]:
+        """Free rooms (created before election) of the round by room index"""
+        assert isinstance(election, Election), "election must be Election"
+        assert isinstance(round, int), "round must be int"
+        assert isinstance(predisposedBy, str), "predisposedBy must be str"
+        try:
+            dummyElectionForFreeRooms: Election = self.database.getDummyElection(election=election)
+            if dummyElectionForFreeRooms is None:
+                raise GroupManagementException("GroupManagement.getFreePreelectionRooms; "
+                                               "No dummy election found for election: " + str(election))
+
+            rooms: dict[int, Room] = self.database.getFreeRoomsElectionFilteredByRound(
+                election=dummyElectionForFreeRooms,
+                round=round,
+                predisposedBy=predisposedBy)
+            if rooms is None:
+                raise GroupManagementException("GroupManagement.getFreePreelectionRooms; Error when getting rooms")
+            return rooms
+        except Exception as e:
+            raise GroupManagementException(
+                "Exception thrown when called GroupManagement.getFreePreelectionRooms; Description: " + str(e))
+
     def nextElectionID(self) -> int:
         try:
             numberOfPreviousElections: int = self.edenData.actionElectSeedParser(report=electionSeedData.data)
@@ -595,10 +623,18 @@ class GroupManagement:
             # predefined election number if we need to create new groups
             currentElectionNumber: int = None
 
+            # existing rooms and free (pre-created) rooms are read at once, allocation is done in memory
+            createdRoomIndexes: set[int] = self.database.getCreatedRoomIndexes(election=election, round=round)
+            if createdRoomIndexes is None:
+                raise GroupManagementException("GroupManagement.createOfflineGroupsWithParticipants; "
+                                               "Error when getting indexes of created rooms")
+            freeRooms: dict[int, Room] = self.getFreePreelectionRooms(election=election,
+                                                                      round=round,
+                                                                      predisposedBy=telegram_user_bot_name) \
+                if len(createdRoomIndexes) < numGroups else {}
+
             for index in range(numGroups):  # from 0 to numGroups -1
-                if self.database.isGroupCreated(election=election,
-                                                round=round,
-                                                roomIndex=index):
+                if index in createdRoomIndexes:
                     LOG.debug("Room with electionID: " + str(election.electionID) + ", round:" + str(round) +
                               ", room index: " + str(index) + " already exists")
                     #room: Room = self.database.getRoomElectionFilteredByRoundAndIndexWithoutPredisposed(
@@ -612,11 +648,7 @@ class GroupManagement:
                 else:
                     LOG.debug("Room with electionID: " + str(election.electionID) + ", round:" + str(round) +
                               ", room index:" + str(index) + "does not exist. Create new one in election")
-                    room: Room = self.getFreePreelectionRoom(
-                        election=election,
-                        round=round,
-                        index=index,
-                        predisposedBy=telegram_user_bot_name)
+                    room: Room = freeRooms.get(index)
 
                     if room is not None:
                         LOG.debug("Free (created in the past) room found. RoomID: " + str(room.roomID))
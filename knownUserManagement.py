@@ -1,6 +1,9 @@
+import threading
+import time
 from datetime import datetime
 
 from chain import EdenData
+from constants import known_user_changes_interval
 from database import Database, KnownUser
 from dateTimeManagement import DateTimeManagement
 from log import Log
@@ -18,15 +21,41 @@ LOG = Log(className="KnownUserManagement")
 LOGkud= Log(className="KnownUserData")
 
 class KnownUserData:
-    def __init__(self, database: Database):
+    """Known users of the bots kept in memory: botName -> {lower-cased userID -> KnownUser}. Changes made through this
+    object are applied to the index directly; changes made by other process (main or pyrogram handler) are read as
+    delta - rows with version greater than the last version seen by this process. Delta is read on every read of the
+    index when the last one is older than changesInterval (and on updateKnownUserData)"""
+
+    def __init__(self, database: Database, changesInterval: int = known_user_changes_interval):
         assert isinstance(database, Database), "database is not a Database object"
+        assert isinstance(changesInterval, int), "changesInterval is not an int"
         self.database = database
-        self.knownUsers = None
+        self.changesInterval: int = changesInterval
+        self._lock = threading.Lock()
+        self._index: dict[str, dict[str, KnownUser]] = {}
+        self._versions: dict[str, int] = {}
+        self._changesReadAt: dict[str, float] = {}  # botName -> monotonic time of the last delta (or full load)
 
     def removeAtSignAtBeginning(self, telegramID: (str, int)) -> (str, int):
         assert isinstance(telegramID, (str, int)), "telegramID is not a string or int"
         return REMOVE_AT_SIGN_IF_EXISTS(name=telegramID)
 
+    @staticmethod
+    def key(telegramID: (str, int)) -> str:
+        return str(telegramID).lower()
+
+    def _setInIndex(self, botName: str, telegramID: str, isKnown: bool):
+        with self._lock:
+            if botName not in self._index:
+                # not loaded yet - it is going to be loaded (with this change) on first read
+                return
+            key: str = self.key(telegramID=telegramID)
+            knownUser: KnownUser = self._index[botName].get(key)
+            if knownUser is None:
+                self._index[botName][key] = KnownUser(botName=botName, userID=key, isKnown=isKnown)
+            else:
+                knownUser.isKnown = isKnown
+
     def setKnownUser(self, botName: str, telegramID: (str, int), isKnown: bool) -> bool:
         assert isinstance(botName, str), "botName is not a string"
         assert isinstance(telegramID, (str, int)), "telegramID is not a string or int"
@@ -34,7 +63,8 @@ class KnownUserData:
         try:
             telegramID = self.removeAtSignAtBeginning(telegramID=telegramID)
             isSetted: bool = self.database.setKnownUser(botName=botName, telegramID=str(telegramID), isKnown=isKnown)
-            self.getKnownUsersOptimizedSave(botName=botName)
+            if isSetted:
+                self._setInIndex(botName=botName, telegramID=str(telegramID), isKnown=isKnown)
             return isSetted
         except Exception as e:
             LOGkud.exception("Set known user failed with error" + str(e))
@@ -45,8 +75,8 @@ class KnownUserData:
         assert isinstance(telegramID, (str, int)), "telegramID is not a string or int"
         try:
             telegramID = self.removeAtSignAtBeginning(telegramID=telegramID)
-            self.database.setKnownUser(botName=botName, telegramID=telegramID, isKnown=False)
-            self.getKnownUsersOptimizedSave(botName=botName)
+            if self.database.setKnownUser(botName=botName, telegramID=str(telegramID), isKnown=False):
+                self._setInIndex(botName=botName, telegramID=str(telegramID), isKnown=False)
             return True
         except Exception as e:
             LOGkud.exception("Set known user failed with error" + str(e))
@@ -70,28 +100,74 @@ class KnownUserData:
             LOGkud.exception("Get known users failed with error" + str(e))
             return []
 
-    def getKnownUsersOptimizedSave(self, botName: str) -> bool:
+    def getKnownUsersOptimizedSave(self, botName: str, force: bool = True) -> bool:
+        """Load known users of the bot into the index; when force is False and index is already loaded only the
+        changes since the last load are applied"""
         assert isinstance(botName, str), "botName is not a string"
+        assert isinstance(force, bool), "force is not a boolean"
         try:
-            self.knownUsers = self.database.getKnownUsers(botName=botName)
+            with self._lock:
+                isLoaded: bool = botName in self._index
+            if force is False and isLoaded:
+                return self.applyChanges(botName=botName)
+            response = self.database.getKnownUsersWithVersion(botName=botName)
+            if response is None:
+                return False
+            version, knownUsers = response
+            index: dict[str, KnownUser] = {}
+            for knownUser in knownUsers:
+                # the first one wins (as in linear search)
+                index.setdefault(self.key(telegramID=knownUser.userID), knownUser)
+            with self._lock:
+                self._index[botName] = index
+                self._versions[botName] = version
+                self._changesReadAt[botName] = time.monotonic()
             return True
         except Exception as e:
             LOGkud.exception("Get known users optimized save failed with error" + str(e))
             return False
 
+    def applyChanges(self, botName: str) -> bool:
+        """Apply known users changed (by any process) after the last seen version"""
+        assert isinstance(botName, str), "botName is not a string"
+        try:
+            with self._lock:
+                version: int = self._versions.get(botName, 0)
+                self._changesReadAt[botName] = time.monotonic()
+            changes: list[KnownUser] = self.database.getKnownUsersChangedAfter(botName=botName, version=version)
+            if changes is None:
+                return False
+            if len(changes) == 0:
+                return True
+            with self._lock:
+                index: dict[str, KnownUser] = self._index.setdefault(botName, {})
+                for knownUser in changes:
+                    index[self.key(telegramID=knownUser.userID)] = knownUser
+                self._versions[botName] = max(self._versions.get(botName, 0), changes[-1].version)
+            LOGkud.debug("Known users of " + botName + " changed: " + str(len(changes)) + "; version: " +
+                         str(changes[-1].version))
+            return True
+        except Exception as e:
+            LOGkud.exception("Apply known user changes failed with error" + str(e))
+            return False
+
     def getKnownUserFromOptimized(self, botName: str, telegramID: (str, int)) -> KnownUser:
         assert isinstance(botName, str), "botName is not a string"
         assert isinstance(telegramID, (str, int)), "telegramID is not a string or int"
         try:
             telegramID = self.removeAtSignAtBeginning(telegramID=telegramID)
-            if self.knownUsers is None:
+            with self._lock:
+                isLoaded: bool = botName in self._index
+                isChangesDue: bool = time.monotonic() - self._changesReadAt.get(botName, 0.0) >= self.changesInterval
+            if isLoaded is False:
                 LOGkud.error("Known users are not loaded - please call getKnownUsersOptimizedSave first - because"
                              "of performance reasons")
                 self.getKnownUsersOptimizedSave(botName=botName)
-            for knownUser in self.knownUsers:
-                if knownUser.userID.lower() == telegramID.lower():
-                    return knownUser
-            return None #return None if not found
+            elif isChangesDue:
+                # i.e. rooms registered or users removed by the other process
+                self.applyChanges(botName=botName)
+            with self._lock:
+                return self._index.get(botName, {}).get(self.key(telegramID=telegramID))  # None if not found
         except Exception as e:
             LOGkud.exception("Get known user from optimized failed with error" + str(e))
             return None
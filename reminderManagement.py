@@ -1,3 +1,4 @@
+import time
 from enum import Enum
 
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup
@@ -15,12 +16,15 @@ from log import Log
 from datetime import datetime, timedelta
 from chain.eden import EdenData, Response, ResponseError
 from database.participant import Participant
-from database.reminder import Reminder, ReminderSent, ReminderSendStatus
+from database.reminder import Reminder, ReminderSent
 from datetime import datetime
 from debugMode.modeDemo import ModeDemo
 from dateTimeManagement import DateTimeManagement
 from text.textManagement import GroupCommunicationTextManagement
 from transmission import SessionType, Communication
+from transmission.outboundDispatcher import OutboundMessage
+from transmission.outboxDispatcher import OutboxDispatcher
+
 
 import gettext
 
@@ -50,6 +54,7 @@ class ReminderManagement:
 
         self.edenData = edenData
         self.communication = communication
+        self.outboxDispatcher: OutboxDispatcher = OutboxDispatcher(database=database, communication=communication)
 
         self.dateTimeManagement = DateTimeManagement(edenData=edenData)
         self.participants = []
@@ -168,6 +173,8 @@ class ReminderManagement:
                         roomArray: RoomArray = RoomArray()
                         currentRoom: ExtendedRoom = None
                         self.communication.updateKnownUserData(botName=telegram_bot_name)
+                        # messages are sent together (through the outbox) after the loop
+                        wave: list[tuple[OutboundMessage, Participant]] = []
                         for room, participant in roomsAndParticipants:
                             LOG.debug("Group: " + str(room) + "; Participant: " + str(participant))
 
@@ -198,12 +205,15 @@ class ReminderManagement:
                             # add participant to current room
                             currentRoom.addMember(member=extendedParticipant)
 
-                            self.sendAndSyncWithDatabaseRoundIsAlmostFinish(member=extendedParticipant,
-                                                                            reminder=reminder,
-                                                                            modeDemo=modeDemo,
-                                                                            election=election,
-                                                                            closestReminderConst=closestReminder
-                                                                            )
+                            wave.append((self.prepareRoundIsAlmostFinishMessage(
+                                member=extendedParticipant,
+                                reminder=reminder,
+                                closestReminderConst=closestReminder), extendedParticipant))
+                        # reminder is useless after the round ends
+                        self.sendWave(wave=wave,
+                                      reminder=reminder,
+                                      expiresAt=OutboxDispatcher.localExpiry(deadline=roundEnd,
+                                                                             executionTime=executionTime))
 
                         # send message to the group
                         self.sendToTheGroupTimeIsUp(reminderRound=reminderRound,
@@ -261,18 +271,27 @@ class ReminderManagement:
                             reminderSentList: list[ReminderSent] = self.database.getAllParticipantsReminderSentRecord(
                                 reminder=reminder)
                             self.communication.updateKnownUserData(botName=telegram_bot_name)
+                            # messages are sent together (through the outbox) after the loop
+                            wave: list[tuple[OutboundMessage, Participant]] = []
+                            alreadySent: set[str] = set([x.accountName for x in reminderSentList])
                             for room, member in members:
                                 if member.telegramID is None or len(member.telegramID) < 3:
                                     LOG.debug("Member " + str(member) + " has no known telegramID, skip sending")
                                     continue
 
-                                isSent: bool = self.sendAndSyncWithDatabaseElectionIsComing(member=member,
-                                                                                            election=election,
-                                                                                            reminder=reminder,
-                                                                                            reminderSentList=reminderSentList)
-                                if isSent:
-                                    LOG.info("Reminder (for user: " + member.accountName + " sent to telegramID: "
-                                             + member.telegramID)
+                                if member.accountName in alreadySent:
+                                    LOG.info("Reminder already sent to telegramID: " + str(member.telegramID))
+                                    continue
+                                message: OutboundMessage = self.prepareElectionIsComingMessage(member=member,
+                                                                                               election=election,
+                                                                                               reminder=reminder)
+                                if message is not None:
+                                    wave.append((message, member))
+                            # reminder is useless after the election starts
+                            self.sendWave(wave=wave,
+                                          reminder=reminder,
+                                          expiresAt=OutboxDispatcher.localExpiry(deadline=election.date,
+                                                                                 executionTime=executionTime))
 
                         else:
                             LOG.debug("... reminder is not needed!")
@@ -446,168 +465,87 @@ class ReminderManagement:
             LOG.exception(str(e))
             raise ReminderManagementException("Exception thrown when called sendToTheGroup; Description: " + str(e))
 
-    def sendAndSyncWithDatabaseRoundIsAlmostFinish(self, member: ExtendedParticipant, election: Election,
-                                                   reminder: Reminder,
-                                                   closestReminderConst: tuple[int, ReminderGroup, str],
-                                                   modeDemo: ModeDemo = None) -> bool:
-        """Send reminder and write to database"""
-        ###I have participants without reminderSent record, send the message to them, write to database
-
-        try:
-            assert isinstance(member, ExtendedParticipant), "member is not instance of ExtendedParticipant"
-            assert isinstance(election, Election), "election is not instance of Election"
-            assert len(closestReminderConst) == 3, "closestReminderConst is not correct size"
-            assert isinstance(closestReminderConst[0], int), "closestReminderConst[0] is not instance of int"
-            assert isinstance(closestReminderConst[1],
-                              ReminderGroup), "closestReminderConst[1] is not instance of ReminderGroup"
-            assert isinstance(closestReminderConst[2], str), "closestReminderConst[2] is not instance of str"
-            LOG.debug("Member: " + str(member))
-            LOG.debug("Election id: " + str(election.electionID))
-            LOG.debug("Reminder: " + str(reminder))
-
-            #
-            # Create inline keyboard markup
-            #
-            gctm: GroupCommunicationTextManagement = GroupCommunicationTextManagement()
-            timeIsUpButtons: tuple[str] = gctm.timeIsAlmostUpButtons()
-
-            if len(timeIsUpButtons) != 2:
-                LOG.exception("timeIsUpButtons is not tuple with 2 items")
-                raise ReminderManagementException("timeIsUpButtons is not tuple with 2 items")
-
-            replyMarkup: InlineKeyboardMarkup = InlineKeyboardMarkup(
-                [
-                    [  # First row - link to the portal
-                        InlineKeyboardButton(  # Opens a web URL
-                            timeIsUpButtons[0],
-                            url=eden_portal_url_action
-                        ),
-                        # Second row - link to the blocks
-                        InlineKeyboardButton(  # Opens a web URL
-                            timeIsUpButtons[1],
-                            url=RawActionWeb().electVote(round=reminder.round,
-                                                         voter=member.accountName,
-                                                         candidate=None)
-                        ),
-                    ]
+    def prepareRoundIsAlmostFinishMessage(self, member: ExtendedParticipant, reminder: Reminder,
+                                          closestReminderConst: tuple[int, ReminderGroup, str]) -> OutboundMessage:
+        """Text and inline keyboard of private reminder that the round is almost finished"""
+        assert isinstance(member, ExtendedParticipant), "member is not instance of ExtendedParticipant"
+        assert isinstance(reminder, Reminder), "reminder is not instance of Reminder"
+        assert len(closestReminderConst) == 3, "closestReminderConst is not correct size"
+
+        #
+        # Create inline keyboard markup
+        #
+        gctm: GroupCommunicationTextManagement = GroupCommunicationTextManagement()
+        timeIsUpButtons: tuple[str] = gctm.timeIsAlmostUpButtons()
+
+        if len(timeIsUpButtons) != 2:
+            LOG.exception("timeIsUpButtons is not tuple with 2 items")
+            raise ReminderManagementException("timeIsUpButtons is not tuple with 2 items")
+
+        replyMarkup: InlineKeyboardMarkup = InlineKeyboardMarkup(
+            [
+                [  # First row - link to the portal
+                    InlineKeyboardButton(  # Opens a web URL
+                        timeIsUpButtons[0],
+                        url=eden_portal_url_action
+                    ),
+                    # Second row - link to the blocks
+                    InlineKeyboardButton(  # Opens a web URL
+                        timeIsUpButtons[1],
+                        url=RawActionWeb().electVote(round=reminder.round,
+                                                     voter=member.accountName,
+                                                     candidate=None)
+                    ),
                 ]
-            )
-
-            #
-            # Send message to the user
-            #
-
-            # prepare and send notification to the user
-            text: str = gctm.timeIsAlmostUpPrivate(timeLeftInMinutes=closestReminderConst[0]-1, # -1 because it is increased because of lag
-                                                   round=reminder.round,
-                                                   voteFor=member.voteFor)
-
-            sendResponse: bool = False
-
-            try:
-                # LIVE MODE
-                cSession = self.database.createCsesion(expireOnCommit=False)
-                LOG.trace("Live mode is enabled, sending message to: " + member.telegramID)
-                member.telegramID = ADD_AT_SIGN_IF_NOT_EXISTS(member.telegramID)
-                sendResponse = self.communication.sendMessage(sessionType=SessionType.BOT,
-                                                              chatId=member.telegramID,
-                                                              text=text,
-                                                              inlineReplyMarkup=replyMarkup)
-
-
-                # Save the record to the database
-                response = self.database.createOrUpdateReminderSentRecord(reminder=reminder,
-                                                               accountName=member.accountName,
-                                                               sendStatus=ReminderSendStatus.SEND if sendResponse is True
-                                                               else ReminderSendStatus.ERROR,
-                                                               cSession=cSession)
-                if response is True:
-                    self.database.commitCcession(session=cSession)
-                else:
-                    self.database.rollbackCcession(session=cSession)
-
-
-                LOG.info("LiveMode; Is message sent successfully to " + member.telegramID + ": " + str(sendResponse)
-                         + ". Saving to the database under electionID: " + str(election.electionID))
-                self.database.removeCcession(session=cSession)
-            except Exception as e:
-                LOG.exception("Exception in sendAndSyncWithDatabaseElectionIsComing. Description: " + str(e))
-                self.database.rollbackCcession(session=cSession)
-                self.database.removeCcession(session=cSession)
-            return sendResponse
-        except Exception as e:
-            LOG.exception("Exception thrown when called sendAndSyncWithDatabaseElectionIsComing; Description: " + str(e))
-
-
-    def sendAndSyncWithDatabaseElectionIsComing(self, member: Participant, election: Election, reminder: Reminder,
-                                                reminderSentList: list[ReminderSent]) -> bool:
-        """Send reminder and write to database"""
-        try:
-            assert isinstance(member, Participant), "member is not instance of Participant"
-            assert isinstance(election, Election), "election is not instance of Election"
-            assert isinstance(reminder, Reminder), "reminder is not instance of Reminder"
-            assert isinstance(reminderSentList, list), "reminderSentList is not instance of list"
-            LOG.trace("Send and sync with database: election is coming; "
-                      "Member: " + str(member) +
-                      ", Election: " + str(election) +
-                      ", Reminder: " + str(reminder))
-
-            foundReminders: list[ReminderSent] = [x for x in reminderSentList if x.accountName == member.accountName]
-
-            # if participant is found in reminderSentList + status is sent then skip
-            if len(foundReminders) > 0:
-                LOG.debug("Participant is found in reminderSentList + status is 'SEND'")
-                LOG.info("Reminder already sent to telegramID: " + str(member.telegramID))
-                return
-
-            # prepare and send notification to the user
-
-            text: str = self.getTextForUpcomingElection(member=member,
-                                                        electionDateTime=election.date,
-                                                        reminder=reminder,
-                                                        currentTime=self.datetime)
-            if text is None or len(text) < 1:
-                LOG.debug("Text is empty, skip sending")
-                return False
-            replyMarkup: InlineKeyboardMarkup = InlineKeyboardMarkup(
-                [
-                    [  # First row
-                        InlineKeyboardButton(  # Opens a web URL
-                            "Change the status",
-                            url=eden_portal_url
-                        ),
-                    ]
+            ]
+        )
+
+        # prepare notification to the user
+        text: str = gctm.timeIsAlmostUpPrivate(timeLeftInMinutes=closestReminderConst[0]-1, # -1 because it is increased because of lag
+                                               round=reminder.round,
+                                               voteFor=member.voteFor)
+        return OutboundMessage(chatId=ADD_AT_SIGN_IF_NOT_EXISTS(member.telegramID), text=text,
+                               inlineReplyMarkup=replyMarkup)
+
+    def prepareElectionIsComingMessage(self, member: Participant, election: Election,
+                                       reminder: Reminder) -> OutboundMessage:
+        """Text and inline keyboard of reminder that election is coming; None when member does not get reminder"""
+        text: str = self.getTextForUpcomingElection(member=member,
+                                                    electionDateTime=election.date,
+                                                    reminder=reminder,
+                                                    currentTime=self.datetime)
+        if text is None or len(text) < 1:
+            LOG.debug("Text is empty, skip sending")
+            return None
+        replyMarkup: InlineKeyboardMarkup = InlineKeyboardMarkup(
+            [
+                [  # First row
+                    InlineKeyboardButton(  # Opens a web URL
+                        "Change the status",
+                        url=eden_portal_url
+                    ),
                 ]
-            ) if member.participationStatus is False else None
-
-            sendResponse: bool = False
-
-            try:
-                cSession = self.database.createCsesion(expireOnCommit=False)
-                LOG.trace("Live mode is enabled, sending message to: " + member.telegramID)
-                member.telegramID = ADD_AT_SIGN_IF_NOT_EXISTS(member.telegramID)
-                sendResponse = self.communication.sendMessage(sessionType=SessionType.BOT,
-                                                              chatId=member.telegramID,
-                                                              text=text,
-                                                              inlineReplyMarkup=replyMarkup)
-
-                LOG.info("LiveMode; Is message sent successfully to " + member.telegramID + ": " + str(sendResponse)
-                         + ". Saving to the database under electionID: " + str(election.electionID))
-
-                response: bool = self.database.createOrUpdateReminderSentRecord(reminder=reminder, accountName=member.accountName,
-                                                               sendStatus=ReminderSendStatus.SEND if sendResponse is True
-                                                               else ReminderSendStatus.ERROR,
-                                                               cSession=cSession)
-                if response is True:
-                    self.database.commitCcession(session=cSession)
-                else:
-                    self.database.rollbackCcession(session=cSession)
-                self.database.removeCcession(session=cSession)
-            except Exception as e:
-                LOG.exception("Exception in sendAndSyncWithDatabaseElectionIsComing. Description: " + str(e))
-                self.database.rollbackCcession(session=cSession)
-                self.database.removeCcession(session=cSession)
-            return sendResponse
-
-        except Exception as e:
-            LOG.exception("Exception thrown when called sendAndSyncWithDatabaseElectionIsComing; Description: " + str(e))
\ No newline at end of file
+            ]
+        ) if member.participationStatus is False else None
+        return OutboundMessage(chatId=ADD_AT_SIGN_IF_NOT_EXISTS(member.telegramID), text=text,
+                               inlineReplyMarkup=replyMarkup)
+
+    def sendWave(self, wave: list[tuple[OutboundMessage, Participant]], reminder: Reminder, expiresAt: datetime):
+        """Enqueues prepared reminders to the outbox and sends them (concurrently) right away - reminders are time
+        critical, they do not wait for the end of the tick. reminderSent records are written by the outbox dispatcher.
+        Reminders not sent until expiresAt (local time of the event they remind of) are dropped"""
+        if len(wave) == 0:
+            return
+        start: float = time.monotonic()
+        enqueued: int = self.outboxDispatcher.enqueue(
+            messages=[self.outboxDispatcher.createReminderMessage(message=message,
+                                                                  reminder=reminder,
+                                                                  accountName=member.accountName,
+                                                                  expiresAt=expiresAt)
+                      for message, member in wave])
+        # outbox rows must be committed before sending - drain reads them with its own session
+        self.database.checkpointUnitOfWork()
+        sent: int = self.outboxDispatcher.drain()
+        LOG.info("Reminder (id: " + str(reminder.reminderID) + ") wave finished in " +
+                 str(round(time.monotonic() - start, 2)) + " seconds; enqueued: " + str(enqueued) + "/" +
+                 str(len(wave)) + "; sent (whole outbox): " + str(sent))
@@ -0,0 +1,56 @@
+import time
+from datetime import datetime, timedelta
+
+from constants import scheduler_min_sleep, scheduler_deadline_margin
+from log import Log
+
+LOG = Log(className="Scheduler")
+
+
+class SchedulerException(Exception):
+    pass
+
+
+class Scheduler:
+    """Calculates how long the bot sleeps between ticks - until the earliest known deadline (reminder, round end,
+    seeding end, group maintenance) but never longer than max poll time of current bot mode. Chain time of the last
+    tick is stored together with monotonic clock, so 'now' in chain time is known without calling the node"""
+
+    def __init__(self, minSleep: int = scheduler_min_sleep, deadlineMargin: int = scheduler_deadline_margin):
+        assert isinstance(minSleep, int), "minSleep must be type of int"
+        assert isinstance(deadlineMargin, int), "deadlineMargin must be type of int"
+        self.minSleep: int = minSleep
+        # wake up a bit after the deadline - block with deadline timestamp must already be produced
+        self.deadlineMargin: timedelta = timedelta(seconds=deadlineMargin)
+        self.lastExecutionTime: datetime = None
+        self.lastMonotonic: float = None
+
+    def tickDone(self, executionTime: datetime):
+        """Call after every tick with chain time of the tick"""
+        assert isinstance(executionTime, (datetime, type(None))), "executionTime must be type of datetime or None"
+        self.lastExecutionTime = executionTime
+        self.lastMonotonic = time.monotonic() if executionTime is not None else None
+
+    def estimatedNow(self) -> datetime:
+        """Chain time estimated from the last tick (or None if unknown)"""
+        if self.lastExecutionTime is None or self.lastMonotonic is None:
+            return None
+        return self.lastExecutionTime + timedelta(seconds=time.monotonic() - self.lastMonotonic)
+
+    def getSleepTime(self, maxSleep: int, nextDeadline: datetime) -> float:
+        """Seconds to sleep before the next tick"""
+        assert isinstance(maxSleep, int), "maxSleep must be type of int"
+        assert isinstance(nextDeadline, (datetime, type(None))), "nextDeadline must be type of datetime or None"
+        now: datetime = self.estimatedNow()
+        if nextDeadline is None or now is None:
+            return maxSleep
+        untilDeadline: float = (nextDeadline + self.deadlineMargin - now).total_seconds()
+        sleepTime: float = max(float(self.minSleep), min(float(maxSleep), untilDeadline))
+        if sleepTime < maxSleep:
+            LOG.debug("Next deadline: " + str(nextDeadline) + "; sleep time shortened to " + str(sleepTime))
+        return sleepTime
+
+    def sleep(self, maxSleep: int, nextDeadline: datetime):
+        sleepTime: float = self.getSleepTime(maxSleep=maxSleep, nextDeadline=nextDeadline)
+        LOG.debug("Sleep time: " + str(sleepTime))
+        time.sleep(sleepTime)
@@ -6,7 +6,7 @@ import pyrogram.raw.functions.updates
 from pyrogram.enums import ChatMembersFilter, ChatMemberStatus
 from pyrogram.errors import FloodWait, PeerIdInvalid, ChatAdminRequired
 from pyrogram.handlers import MessageHandler, RawUpdateHandler, InlineQueryHandler, CallbackQueryHandler, \
-    ChosenInlineResultHandler
+    ChosenInlineResultHandler, ChatMemberUpdatedHandler
 from pyrogram.raw.types import UpdatesTooLong, UpdateBotCallbackQuery, UpdateBotInlineSend
 from pyrogram.types import Chat, InlineKeyboardMarkup, ChatPrivileges, InlineKeyboardButton, BotCommand, Message, \
     ChatPreview, InlineQuery, CallbackQuery, ChosenInlineResult
@@ -22,8 +22,11 @@ from database import Database, KnownUser, Election
 from database.participant import Participant
 from database.room import Room
 from knownUserManagement import KnownUserData
+from transmission.outboundDispatcher import OutboundDispatcher, OutboundMessage, ChatThrottled
+from transmission.chatMemberCache import ChatMemberCache
 from log.log import Log
 from chain.eden import EdenData
+from chain.actionIndex import ActionIndex, ACTION_GIVE_SBT
 
 from multiprocessing import Process
 
@@ -31,6 +34,7 @@ from pyrogram import Client, filters, types, idle, raw
 
 
 
+import asyncio
 import time
 
 from text.textManagement import Button, BotCommunicationManagement, \
@@ -68,6 +72,9 @@ class Communication:
         global DATABASE_CONST
         DATABASE_CONST = database
         self.knownUserData: KnownUserData = KnownUserData(database=database)
+        self.outboundDispatcher: OutboundDispatcher = OutboundDispatcher()
+        # created before the handler process is forked - it publishes chat member updates to the main process
+        self.chatMemberCache: ChatMemberCache = ChatMemberCache()
 
         #we need it for the SBT call on bot
         self.edenData: EdenData = edenData
@@ -76,6 +83,11 @@ class Communication:
     # def run(self):
     #    self.idle()
 
+    def beforeSideEffect(self):
+        """Telegram calls can not be rolled back - work of the tick's unit of work is committed before them (raises
+        UnitOfWorkException when the unit is aborted, so no more side effects are done)"""
+        self.database.checkpointUnitOfWork()
+
     def startComm(self, apiId: int, apiHash: str, botToken: str):
         assert isinstance(apiId, int), "ApiId should be int"
         assert isinstance(apiHash, str), "ApiHash should be str"
@@ -195,6 +207,10 @@ class Communication:
                                filters=filters.command(commands=["chatID"]) & filters.group), group=2
             )
 
+            self.sessionBotThread.add_handler(
+                ChatMemberUpdatedHandler(callback=self.chatMemberUpdated), group=2
+            )
+
             self.sessionBotThread.add_handler(
                 MessageHandler(callback=self.actionVideoStarted,
                                filters=filters.video_chat_started), group=2
@@ -250,14 +266,15 @@ class Communication:
         assert isinstance(botName, str), "BotName should be str"
         assert isinstance(chatID, (int, str)), "chatID should be int or str"
         LOG.info("Adding known user: " + str(chatID) + " for bot: " + botName)
+        # local index is updated by setKnownUser
         self.knownUserData.setKnownUser(botName=botName, telegramID=chatID, isKnown=True)
-        self.updateKnownUserData(botName=botName)
 
     def updateKnownUserData(self, botName: str) -> bool:
+        """Apply known users changed since the last call (i.e. by other process); first call loads all of them"""
         assert isinstance(botName, str), "BotName should be str"
         try:
             LOG.info("Updating known user data for bot: " + botName)
-            return self.knownUserData.getKnownUsersOptimizedSave(botName=botName)
+            return self.knownUserData.getKnownUsersOptimizedSave(botName=botName, force=False)
         except Exception as e:
             LOG.exception("Communication.updateKnownUserData exception: " + str(e))
 
@@ -291,7 +308,8 @@ class Communication:
                              chatId: (str, int),
                              photoPath: str,
                              caption: str = None,
-                             replyMarkup: InlineKeyboardMarkup = None):
+                             replyMarkup: InlineKeyboardMarkup = None,
+                             failFast: bool = False):
         try:
             assert isinstance(client, Client), "Client should be Client"
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
@@ -307,27 +325,25 @@ class Communication:
                 LOG.error("User/group " + str(chatId) + " is not known to the bot" + telegram_bot_name + "!")
                 return False
 
-            response = await client.send_photo(chat_id=chatId,
+            response = await self.outboundDispatcher.sendAsync(
+                chatId=chatId,
+                send=lambda: client.send_photo(chat_id=chatId,
                                                photo=open(photoPath, 'rb'),
                                                caption=caption,
-                                               reply_markup=replyMarkup)
+                                               reply_markup=replyMarkup),
+                failFast=failFast)
             LOG.debug("Successfully send: " + "True" if type(response) is types.Message else "False")
             return True if type(response) is types.Message else False
         except PeerIdInvalid:
             LOG.exception("Exception (in sendPhoto): PeerIdInvalid")
             self.knownUserData.removeKnownUser(botName=telegram_bot_name, telegramID=chatId)
             return False
+        except ChatThrottled as e:
+            LOG.warning("Message is not sent (in sendPhoto-async): " + str(e))
+            return False
         except FloodWait as e:
             LOG.exception("FloodWait exception (in sendPhoto-async) Waiting time (in seconds): " + str(e.value))
-            LOG.debug("Sleeping for " + str(e.value) + " seconds")
-            time.sleep(e.value)
-            LOG.debug("Sleeping for " + str(e.value) + " seconds finished... Send message again")
-            return await self.sendPhoto(client=client,
-                                        chatId=chatId,
-                                        photoPath=photoPath,
-                                        caption=caption,
-                                        replyMarkup=replyMarkup
-                                        )
+            return False
         except Exception as e:
             LOG.exception("Exception (in sendPhoto-async): " + str(e))
 
@@ -336,7 +352,10 @@ class Communication:
                   chatId: (str, int),
                   photoPath: str,
                   caption: str = None,
-                  replyMarkup: InlineKeyboardMarkup = None):
+                  replyMarkup: InlineKeyboardMarkup = None,
+                  failFast: bool = False):
+        # failFast: message is not sent when the chat is throttled for longer time (outbox retries it later)
+        self.beforeSideEffect()
         try:
             assert isinstance(sessionType, SessionType), "SessionType should be SessionType"
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
@@ -353,31 +372,33 @@ class Communication:
                 return False
 
             if sessionType == SessionType.BOT:
-                response = self.sessionBot.send_photo(chat_id=chatId,
-                                                      photo=open(photoPath, 'rb'),
-                                                      caption=caption,
-                                                      reply_markup=replyMarkup)
+                response = self.outboundDispatcher.send(
+                    chatId=chatId,
+                    send=lambda: self.sessionBot.send_photo(chat_id=chatId,
+                                                            photo=open(photoPath, 'rb'),
+                                                            caption=caption,
+                                                            reply_markup=replyMarkup),
+                    failFast=failFast)
             elif sessionType == SessionType.USER:
-                response = self.sessionUser.send_photo(chat_id=chatId,
-                                                       photo=open(photoPath, 'rb'),
-                                                       caption=caption,
-                                                       reply_markup=replyMarkup)
+                response = self.outboundDispatcher.send(
+                    chatId=chatId,
+                    send=lambda: self.sessionUser.send_photo(chat_id=chatId,
+                                                             photo=open(photoPath, 'rb'),
+                                                             caption=caption,
+                                                             reply_markup=replyMarkup),
+                    failFast=failFast)
             LOG.debug("Successfully send: " + "True" if type(response) is types.Message else "False")
             return True if type(response) is types.Message else False
         except PeerIdInvalid:
             LOG.exception("Exception (in sendPhoto): PeerIdInvalid")
             self.knownUserData.removeKnownUser(botName=telegram_bot_name, telegramID=chatId)
             return False
+        except ChatThrottled as e:
+            LOG.warning("Message is not sent (in sendPhoto): " + str(e))
+            return False
         except FloodWait as e:
             LOG.exception("FloodWait exception (in sendPhoto) Waiting time (in seconds): " + str(e.value))
-            LOG.debug("Sleeping for " + str(e.value) + " seconds")
-            time.sleep(e.value)
-            LOG.debug("Sleeping for " + str(e.value) + " seconds finished... Send message again")
-            return self.sendPhoto(sessionType=sessionType,
-                                  chatId=chatId,
-                                  photoPath=photoPath,
-                                  caption=caption,
-                                  replyMarkup=replyMarkup)
+            return False
         except Exception as e:
             LOG.exception("Exception (in sendPhoto): " + str(e))
 
@@ -388,7 +409,9 @@ class Communication:
                     disableWebPagePreview=False,
                     scheduleDate: datetime = None,
                     inlineReplyMarkup: InlineKeyboardMarkup = None,
+                    failFast: bool = False
                     ) -> bool:
+        self.beforeSideEffect()
         # warning:
         # when sessionType is SessionType.USER you cannot send message with inline keyboard
         try:
@@ -412,34 +435,35 @@ class Communication:
                                                                              telegramID=str(chatId)) is False:
                     LOG.error("User/group " + str(chatId) + " is not known to the bot" + telegram_bot_name + "!")
                     return False
-                response = self.sessionBot.send_message(chat_id=chatId,
-                                                        text=text,
-                                                        schedule_date=scheduleDate,
-                                                        reply_markup=inlineReplyMarkup,
-                                                        disable_web_page_preview=disableWebPagePreview)
+                response = self.outboundDispatcher.send(
+                    chatId=chatId,
+                    send=lambda: self.sessionBot.send_message(chat_id=chatId,
+                                                              text=text,
+                                                              schedule_date=scheduleDate,
+                                                              reply_markup=inlineReplyMarkup,
+                                                              disable_web_page_preview=disableWebPagePreview),
+                    failFast=failFast)
             elif sessionType == SessionType.USER:
-                response = self.sessionUser.send_message(chat_id=chatId,
-                                                         text=text,
-                                                         schedule_date=scheduleDate,
-                                                         reply_markup=inlineReplyMarkup,
-                                                         disable_web_page_preview=disableWebPagePreview)
+                response = self.outboundDispatcher.send(
+                    chatId=chatId,
+                    send=lambda: self.sessionUser.send_message(chat_id=chatId,
+                                                               text=text,
+                                                               schedule_date=scheduleDate,
+                                                               reply_markup=inlineReplyMarkup,
+                                                               disable_web_page_preview=disableWebPagePreview),
+                    failFast=failFast)
             LOG.debug("Successfully send: " + "True" if type(response) is types.Message else "False")
             return True if type(response) is types.Message else False
         except PeerIdInvalid:
             LOG.exception("Exception (in sendMessage): PeerIdInvalid")
             self.knownUserData.removeKnownUser(botName=telegram_bot_name, telegramID=chatId)
             return False
+        except ChatThrottled as e:
+            LOG.warning("Message is not sent (in sendMessage): " + str(e))
+            return False
         except FloodWait as e:
             LOG.exception("FloodWait exception (in sendMessage) Waiting time (in seconds): " + str(e.value))
-            LOG.debug("Sleeping for " + str(e.value) + " seconds")
-            time.sleep(e.value)
-            LOG.debug("Sleeping for " + str(e.value) + " seconds finished... Send message again")
-            return self.sendMessage(sessionType=sessionType,
-                                    chatId=chatId,
-                                    text=text,
-                                    disableWebPagePreview=disableWebPagePreview,
-                                    scheduleDate=scheduleDate,
-                                    inlineReplyMarkup=inlineReplyMarkup)
+            return False
         except Exception as e:
             LOG.exception("Exception in send messages: " + str(e))
             return False
@@ -451,6 +475,7 @@ class Communication:
                                disableWebPagePreview=False,
                                scheduleDate: datetime = None,
                                inlineReplyMarkup: InlineKeyboardMarkup = None,
+                               failFast: bool = False
                                ) -> bool:
         # warning:
         # when sessionType is SessionType.USER you cannot send message with inline keyboard
@@ -465,32 +490,70 @@ class Communication:
             assert isinstance(inlineReplyMarkup, (InlineKeyboardMarkup, type(None))), \
                 "inlineReplyMarkup should be InlineKeyboardMarkup or None"
 
-            response = await client.send_message(chat_id=chatId,
+            response = await self.outboundDispatcher.sendAsync(
+                chatId=chatId,
+                send=lambda: client.send_message(chat_id=chatId,
                                                  text=text,
                                                  schedule_date=scheduleDate,
                                                  reply_markup=inlineReplyMarkup,
-                                                 disable_web_page_preview=disableWebPagePreview)
+                                                 disable_web_page_preview=disableWebPagePreview),
+                failFast=failFast)
             LOG.debug("Successfully send: " + "True" if type(response) is types.Message else "False")
             return True if type(response) is types.Message else False
         except PeerIdInvalid:
             LOG.exception("Exception (in sendMessage): PeerIdInvalid")
             self.knownUserData.removeKnownUser(botName=telegram_bot_name, telegramID=chatId)
             return False
+        except ChatThrottled as e:
+            LOG.warning("Message is not sent (in sendMessage-async): " + str(e))
+            return False
         except FloodWait as e:
-            LOG.exception("FloodWait exception (in sendMessage) Waiting time (in seconds): " + str(e.value))
-            LOG.debug("Sleeping for " + str(e.value) + " seconds")
-            time.sleep(e.value)
-            LOG.debug("Sleeping for " + str(e.value) + " seconds finished... Send message again")
-            return await self.sendMessageAsync(client=client,
-                                               chatId=chatId,
-                                               text=text,
-                                               disableWebPagePreview=disableWebPagePreview,
-                                               scheduleDate=scheduleDate,
-                                               inlineReplyMarkup=inlineReplyMarkup)
+            LOG.exception("FloodWait exception (in sendMessage-async) Waiting time (in seconds): " + str(e.value))
+            return False
         except Exception as e:
             LOG.exception("Exception in send messages - async: " + str(e))
             return False
 
+    async def sendMessagesAsync(self, client: Client, messages: list[OutboundMessage], concurrency: int,
+                                failFast: bool = False) -> list[bool]:
+        """Sends messages concurrently - max. 'concurrency' messages at once, pace is set by outbound dispatcher"""
+        assert isinstance(client, Client), "Client should be Client"
+        assert isinstance(messages, list), "messages should be list"
+        assert isinstance(concurrency, int) and concurrency > 0, "concurrency should be int and greater than 0"
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(message: OutboundMessage) -> bool:
+            async with semaphore:
+                if self.knownUserData.getKnownUsersOptimizedOnlyBoolean(botName=telegram_bot_name,
+                                                                        telegramID=str(message.chatId)) is False:
+                    LOG.error("User/group " + str(message.chatId) + " is not known to the bot" + telegram_bot_name +
+                              "!")
+                    return False
+                return await self.sendMessageAsync(client=client,
+                                                   chatId=message.chatId,
+                                                   text=message.text,
+                                                   disableWebPagePreview=message.disableWebPagePreview,
+                                                   inlineReplyMarkup=message.inlineReplyMarkup,
+                                                   failFast=failFast)
+
+        return list(await asyncio.gather(*[send(message) for message in messages]))
+
+    def sendMessages(self, messages: list[OutboundMessage], concurrency: int = telegram_send_concurrency,
+                     failFast: bool = False) -> list[bool]:
+        """Sends messages with bot session concurrently; returns send status of every message (in the same order)"""
+        self.beforeSideEffect()
+        try:
+            assert isinstance(messages, list), "messages should be list"
+            if len(messages) == 0:
+                return []
+            # sync pyrogram client runs its coroutines in its own loop - the same loop is used here
+            return self.sessionBot.loop.run_until_complete(
+                self.sendMessagesAsync(client=self.sessionBot, messages=messages, concurrency=concurrency,
+                                       failFast=failFast))
+        except Exception as e:
+            LOG.exception("Exception in sendMessages: " + str(e))
+            return [False] * len(messages)
+
     def sendLogToAdmin(self, level: str, log: str):
         LOG.info("Sending log (level: " + level + ") to admin: " + log)
         if telegram_admins_id is not None:
@@ -498,6 +561,7 @@ class Communication:
                 self.sendMessage(sessionType=SessionType.BOT, chatId=adminId, text=log)
 
     def createGroup(self, name: str, participants: list) -> int:
+        self.beforeSideEffect()
         LOG.info("Creating group: " + name + " with participants: " + str(participants))
         try:
             assert name is not None, "Name should not be null"
@@ -511,6 +575,7 @@ class Communication:
             return None
 
     def createSuperGroup(self, name: str, description: str) -> int:
+        self.beforeSideEffect()
         LOG.info("Creating super group: " + name + " with description: " + description)
         try:
             assert name is not None, "Name should not be null"
@@ -533,6 +598,7 @@ class Communication:
             return False
 
     def getInvitationLink(self, sessionType: SessionType, chatId: (str, int)) -> str:
+        self.beforeSideEffect()
         assert isinstance(sessionType, SessionType), "sessionType should be SessionType"
         assert isinstance(chatId, (str, int)), "ChatId should be str or int"
         LOG.debug("Getting invitation link for chat: " + str(chatId) + " Make sure that user/bot is admin and keep in"
@@ -561,8 +627,10 @@ class Communication:
             return None
 
     def archiveGroup(self, chatId: (str, int)) -> bool:
+        self.beforeSideEffect()
         assert isinstance(chatId, (str, int)), "ChatId should be str or int"
         LOG.info("Archiving group: " + str(chatId))
+        self.chatMemberCache.invalidate(chatId=chatId)
         try:
             if isinstance(chatId, type(None)) or \
                     self.knownUserData.getKnownUsersOptimizedOnlyBoolean(botName=telegram_bot_name,
@@ -593,8 +661,10 @@ class Communication:
             LOG.exception("Exception (in callbackQuery): " + str(e))
 
     def deleteGroup(self, chatId: (str, int)) -> bool:
+        self.beforeSideEffect()
         assert isinstance(chatId, (str, int)), "ChatId should be str or int"
         LOG.info("Deleting group: " + str(chatId))
+        self.chatMemberCache.invalidate(chatId=chatId)
         try:
             if self.knownUserData.getKnownUsersOptimizedOnlyBoolean(botName=telegram_bot_name,
                                                                     telegramID=str(chatId)) is False:
@@ -614,10 +684,12 @@ class Communication:
             return False
 
     def removeUserFromGroup(self,  sessionType: SessionType, chatId: (str, int), userId: str) -> bool:
+        self.beforeSideEffect()
         assert isinstance(sessionType, SessionType), "sessionType should be SessionType"
         assert isinstance(chatId, (str, int)), "ChatId should be str or int"
         assert isinstance(userId, str), "userId should be str"
         LOG.info("Removing user: " + str(userId) + " from group: " + str(chatId))
+        self.chatMemberCache.invalidate(chatId=chatId)
         try:
             #if self.knownUserData.getKnownUsersOptimizedOnlyBoolean(botName=telegram_bot_name,
             #                                                        telegramID=str(chatId)) is False:
@@ -663,11 +735,13 @@ class Communication:
             return None
 
     def leaveChat(self, sessionType: SessionType, chatId: (str, int), userId: str) -> bool:
+        self.beforeSideEffect()
         assert isinstance(sessionType, SessionType), "sessionType should be SessionType"
         assert isinstance(chatId, (str, int)), "ChatId should be str or int"
         try:
             # delete option not used, because it is not working on supergroups
             LOG.debug("User is leaving a chat: " + str(chatId))
+            self.chatMemberCache.invalidate(chatId=chatId)
             if sessionType == SessionType.USER:
                 self.sessionUser.leave_chat(chat_id=chatId)
             else:
@@ -813,6 +887,11 @@ class Communication:
                                                                          telegramID=str(chatId)) is False:
                 LOG.error("User/group " + str(chatId) + " is not known to the bot" + telegram_bot_name + "!")
                 return []
+            cachedMembers: list[CustomMember] = self.chatMemberCache.get(chatId=chatId)
+            if cachedMembers is not None:
+                LOG.debug("Members of group " + str(chatId) + " are taken from cache")
+                return cachedMembers
+
             if sessionType == SessionType.USER:
                 membersTG = self.sessionUser.get_chat_members(chat_id=chatId)
             else:
@@ -824,42 +903,10 @@ class Communication:
                 if member.user.is_bot:
                     LOG.trace("Skipping bot: " + str(member.user.id) + " in group: " + str(chatId))
                     continue
+                members.append(self.customMemberFromChatMember(chatId=chatId, member=member))
 
-
-                if member.status is ChatMemberStatus.OWNER or member.status is ChatMemberStatus.ADMINISTRATOR:
-                    LOG.debug("Member is admin in group: " + str(chatId))
-                    adminRights = AdminRights(isAdmin=True,
-                                              canChangeInfo=member.privileges.can_change_info,
-                                              canDeleteMessages=member.privileges.can_delete_messages,
-                                              canEditMessages=member.privileges.can_edit_messages,
-                                              canInviteUsers=member.privileges.can_invite_users,
-                                              canManageChat=member.privileges.can_manage_chat,
-                                              canManageVideoChats=member.privileges.can_manage_video_chats,
-                                              canPinMessages=member.privileges.can_pin_messages,
-                                              canPostMessages=member.privileges.can_post_messages,
-                                              canPromoteMembers=member.privileges.can_promote_members,
-                                              canRestrictMembers=member.privileges.can_restrict_members,
-                                              isAnonymous=member.privileges.is_anonymous)
-
-                    promotedBy = member.promoted_by
-                    promotion: Promotion = Promotion(userId=str(promotedBy.id), username=promotedBy.username) if \
-                        promotedBy is not None else None
-                    memberStatus: MemberStatus = MemberStatus.ADMINISTRATOR if member.status \
-                                                                               is pyrogram.enums.ChatMemberStatus.ADMINISTRATOR else MemberStatus.OWNER
-                else:
-                    LOG.debug("Member is not admin in group: " + str(chatId))
-                    adminRights = AdminRights(isAdmin=False)
-                    promotion: Promotion = None
-                    memberStatus: MemberStatus = MemberStatus.MEMBER
-
-                members.append(CustomMember(userId=str(member.user.id),
-                                            memberStatus=memberStatus,
-                                            isBot=member.user.is_bot,
-                                            username=member.user.username,
-                                            tag=member.custom_title,
-                                            adminRights=adminRights,
-                                            promotedBy=promotion))
-
+            if len(members) > 0:
+                self.chatMemberCache.set(chatId=chatId, members=members)
             return members
         except PeerIdInvalid:
             LOG.exception("Exception (in getMembersInGroup): PeerIdInvalid")
@@ -869,11 +916,68 @@ class Communication:
             LOG.exception("Exception (in getMembersInGroup): " + str(e))
             return []
 
+    def customMemberFromChatMember(self, chatId: (str, int), member: types.ChatMember) -> CustomMember:
+        if member.status is ChatMemberStatus.OWNER or member.status is ChatMemberStatus.ADMINISTRATOR:
+            LOG.debug("Member is admin in group: " + str(chatId))
+            adminRights = AdminRights(isAdmin=True,
+                                      canChangeInfo=member.privileges.can_change_info,
+                                      canDeleteMessages=member.privileges.can_delete_messages,
+                                      canEditMessages=member.privileges.can_edit_messages,
+                                      canInviteUsers=member.privileges.can_invite_users,
+                                      canManageChat=member.privileges.can_manage_chat,
+                                      canManageVideoChats=member.privileges.can_manage_video_chats,
+                                      canPinMessages=member.privileges.can_pin_messages,
+                                      canPostMessages=member.privileges.can_post_messages,
+                                      canPromoteMembers=member.privileges.can_promote_members,
+                                      canRestrictMembers=member.privileges.can_restrict_members,
+                                      isAnonymous=member.privileges.is_anonymous)
+
+            promotedBy = member.promoted_by
+            promotion: Promotion = Promotion(userId=str(promotedBy.id), username=promotedBy.username) if \
+                promotedBy is not None else None
+            memberStatus: MemberStatus = MemberStatus.ADMINISTRATOR if member.status \
+                                                                       is pyrogram.enums.ChatMemberStatus.ADMINISTRATOR else MemberStatus.OWNER
+        else:
+            LOG.debug("Member is not admin in group: " + str(chatId))
+            adminRights = AdminRights(isAdmin=False)
+            promotion: Promotion = None
+            memberStatus: MemberStatus = MemberStatus.MEMBER
+
+        return CustomMember(userId=str(member.user.id),
+                            memberStatus=memberStatus,
+                            isBot=member.user.is_bot,
+                            username=member.user.username,
+                            tag=member.custom_title,
+                            adminRights=adminRights,
+                            promotedBy=promotion)
+
+
+    async def chatMemberUpdated(self, client: Client, update: types.ChatMemberUpdated):
+        """Handler process: change of chat member is sent to the member cache of main process"""
+        try:
+            chatMember: types.ChatMember = update.new_chat_member if update.new_chat_member is not None \
+                else update.old_chat_member
+            if chatMember is None or chatMember.user is None:
+                return
+            isInChat: bool = update.new_chat_member is not None and \
+                update.new_chat_member.status not in (ChatMemberStatus.LEFT, ChatMemberStatus.BANNED)
+            LOG.debug("Chat member updated in chat " + str(update.chat.id) + ": " + str(chatMember.user.id) +
+                      "; in chat: " + str(isInChat))
+            self.chatMemberCache.publish(chatId=update.chat.id,
+                                         userId=str(chatMember.user.id),
+                                         member=self.customMemberFromChatMember(chatId=update.chat.id,
+                                                                                member=chatMember)
+                                         if isInChat else None)
+        except Exception as e:
+            LOG.exception("Exception (in chatMemberUpdated): " + str(e))
+
     def addChatMembers(self, chatId: (str, int), participants: list) -> bool:
+        self.beforeSideEffect()
         LOG.info("Adding participants to group: " + str(chatId) + " with participants: " + str(participants))
         try:
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
             assert participants is not None, "Participants should not be null"
+            self.chatMemberCache.invalidate(chatId=chatId)
 
             knownParticipants = []
             for participant in participants:
@@ -892,11 +996,13 @@ class Communication:
             return False
 
     def promoteMembers(self, sessionType: SessionType, chatId: (str, int), participants: list) -> bool:
+        self.beforeSideEffect()
         try:
             assert isinstance(sessionType, SessionType), "SessionType should be SessionType"
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
             assert isinstance(participants, list), "Participants should be list"
             LOG.info("Promoting participants to group: " + str(chatId) + " with participants: " + str(participants))
+            self.chatMemberCache.invalidate(chatId=chatId)
 
             if sessionType == SessionType.BOT:
                 if isinstance(chatId, type(None)) or \
@@ -963,6 +1069,7 @@ class Communication:
 
     def promoteSpecificMember(self, sessionType: SessionType, chatId: (str, int), userId: (str, int),#  participant: Participant,
                               adminRights: AdminRights) -> bool:
+        self.beforeSideEffect()
         try:
             assert isinstance(sessionType, SessionType), "SessionType should be SessionType"
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
@@ -970,6 +1077,7 @@ class Communication:
             #assert isinstance(participant, Participant), "participant should be a Participant object"
             assert isinstance(adminRights, AdminRights), "adminRights should be an AdminRights object"
             LOG.info("Promoting specific participant in group: " + str(chatId) + " with user id: " + str(userId))
+            self.chatMemberCache.invalidate(chatId=chatId)
 
             if sessionType == SessionType.BOT:
                 if isinstance(chatId, type(None)) or \
@@ -1054,6 +1162,7 @@ class Communication:
             return False
 
     def setAdministratorTitle(self, sessionType: SessionType, chatId: (str, int), userId: (str, int), title: str) -> bool:
+        self.beforeSideEffect()
         try:
             assert isinstance(sessionType, SessionType), "SessionType should be SessionType"
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
@@ -1061,6 +1170,7 @@ class Communication:
             assert isinstance(title, str), "Title should be str"
             LOG.info("Setting administrator title in (super)group: " + str(chatId)
                      + " with user id: " + str(userId) + " and title: " + str(title))
+            self.chatMemberCache.invalidate(chatId=chatId)
 
             if sessionType == SessionType.BOT:
                 if isinstance(chatId, type(None)) or \
@@ -1099,6 +1209,7 @@ class Communication:
             return False
 
     def setChatTitle(self, chatId: (str, int), title: str) -> bool:
+        self.beforeSideEffect()
         try:
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
             assert isinstance(title, str), "Title should be str"
@@ -1111,6 +1222,7 @@ class Communication:
             return False
 
     def setChatDescription(self, chatId: (str, int), description: str) -> bool:
+        self.beforeSideEffect()
         try:
             assert isinstance(chatId, (str, int)), "ChatId should be str or int"
             assert isinstance(description, str), "Title should be str"
@@ -1187,10 +1299,12 @@ class Communication:
             return None
 
     def leaveChat(self, sessionType: SessionType, chatId: (str, int)) -> bool:
+        self.beforeSideEffect()
         assert isinstance(sessionType, SessionType), "SessionType should be SessionType"
         assert isinstance(chatId, (str, int)), "ChatId should be str or int"
 
         LOG.info("Leaving group: " + str(chatId))
+        self.chatMemberCache.invalidate(chatId=chatId)
         LOG.info("SessionType: " + str(sessionType))
         try:
             if sessionType == SessionType.USER:
@@ -2108,9 +2222,11 @@ class Communication:
 
             LOG.debug("Get NFT between " + str(startDate) + " and " + str(endDate))
 
-            givenSBT: Response = self.edenData.getGivenSBT(contractAccount=contractAccount,
-                                                           startTime=startDate,
-                                                           endTime=endDate)
+            givenSBT: Response = ActionIndex(edenData=self.edenData, database=self.database)\
+                .getActions(contractAccount=contractAccount,
+                            actionName=ACTION_GIVE_SBT,
+                            startTime=startDate,
+                            endTime=endDate)
             if isinstance(givenSBT, ResponseError):
                 raise CommunicationException("There was an error when getting given SBT: " + str(givenSBT.error))
 
@@ -0,0 +1,89 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from constants import telegram_chat_members_cache_ttl
+from log import Log
+from transmissionCustom import CustomMember
+
+LOG = Log(className="ChatMemberCache")
+
+# events waiting to be applied; when the queue is full events are dropped and entries expire by ttl
+CHAT_MEMBER_EVENTS_MAX: int = 10000
+
+
+class ChatMemberCacheException(Exception):
+    pass
+
+
+class ChatMemberCache:
+    """Members of the chats (list of CustomMember without bots) with ttl. Chat member updates received by pyrogram
+    handler process are published to the queue (created before the process is forked) and applied to the cache of
+    main process before every read: member is replaced, added or removed"""
+
+    def __init__(self, ttl: int = telegram_chat_members_cache_ttl):
+        assert isinstance(ttl, int), "ttl must be type of int"
+        self.ttl: int = ttl
+        self._lock = threading.Lock()
+        self._entries: dict = {}  # chat key -> (loadedAt, list[CustomMember])
+        self._events = multiprocessing.Queue(maxsize=CHAT_MEMBER_EVENTS_MAX)
+
+    @staticmethod
+    def key(chatId: (str, int)) -> str:
+        return str(chatId).lower()
+
+    def get(self, chatId: (str, int)) -> list[CustomMember]:
+        """Copy of cached members or None when chat is not cached or entry is too old"""
+        assert isinstance(chatId, (str, int)), "chatId must be type of str or int"
+        self.applyEvents()
+        with self._lock:
+            entry = self._entries.get(self.key(chatId))
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                return None
+            return list(entry[1])
+
+    def set(self, chatId: (str, int), members: list[CustomMember]):
+        assert isinstance(chatId, (str, int)), "chatId must be type of str or int"
+        assert isinstance(members, list), "members must be type of list"
+        with self._lock:
+            self._entries[self.key(chatId)] = (time.monotonic(), list(members))
+
+    def invalidate(self, chatId: (str, int) = None):
+        with self._lock:
+            if chatId is None:
+                self._entries = {}
+            else:
+                self._entries.pop(self.key(chatId), None)
+
+    def patch(self, chatId: (str, int), userId: str, member: CustomMember = None):
+        """Replace (or add) member of cached chat; member None means user is not in the chat anymore"""
+        assert isinstance(userId, str), "userId must be type of str"
+        assert isinstance(member, (CustomMember, type(None))), "member must be type of CustomMember or None"
+        with self._lock:
+            entry = self._entries.get(self.key(chatId))
+            if entry is None:
+                return
+            members: list[CustomMember] = [item for item in entry[1] if item.userId != userId]
+            if member is not None and member.isBot is False:
+                members.append(member)
+            # patched entry keeps its age - ttl still limits time without full reload
+            self._entries[self.key(chatId)] = (entry[0], members)
+
+    def publish(self, chatId: (str, int), userId: str, member: CustomMember = None):
+        """Called in the handler process - change is applied in the main process on next read"""
+        try:
+            self._events.put_nowait((self.key(chatId), userId, member))
+        except queue.Full:
+            LOG.warning("Chat member events queue is full - update of chat " + str(chatId) + " is dropped")
+
+    def applyEvents(self):
+        while True:
+            try:
+                chatKey, userId, member = self._events.get_nowait()
+            except queue.Empty:
+                return
+            except Exception as e:
+                LOG.exception("Exception when reading chat member events: " + str(e))
+                return
+            self.patch(chatId=chatKey, userId=userId, member=member)
@@ -0,0 +1,171 @@
+import asyncio
+import multiprocessing
+import time
+
+from pyrogram.errors import FloodWait
+from pyrogram.types import InlineKeyboardMarkup
+
+from constants import telegram_global_rate, telegram_private_chat_interval, telegram_group_chat_interval, \
+    telegram_flood_wait_retries, telegram_max_inline_wait, telegram_max_direct_wait
+from log import Log
+
+LOG = Log(className="OutboundDispatcher")
+
+
+class OutboundDispatcherException(Exception):
+    pass
+
+
+class ChatThrottled(OutboundDispatcherException):
+    """Chat can not get a slot soon enough - message is not sent; caller (or outbox) retries later"""
+
+    def __init__(self, chatId: (str, int), seconds: float):
+        super().__init__("Chat " + str(chatId) + " is throttled for " + str(round(seconds, 1)) + " seconds")
+        self.chatId: (str, int) = chatId
+        self.seconds: float = seconds
+
+
+class OutboundMessage:
+    """Message prepared for concurrent sending (Communication.sendMessages)"""
+
+    def __init__(self, chatId: (str, int), text: str, inlineReplyMarkup: InlineKeyboardMarkup = None,
+                 disableWebPagePreview: bool = False):
+        assert isinstance(chatId, (str, int)), "chatId must be type of str or int"
+        assert isinstance(text, str), "text must be type of str"
+        assert isinstance(inlineReplyMarkup, (InlineKeyboardMarkup, type(None))), \
+            "inlineReplyMarkup must be type of InlineKeyboardMarkup or None"
+        assert isinstance(disableWebPagePreview, bool), "disableWebPagePreview must be type of bool"
+        self.chatId: (str, int) = chatId
+        self.text: str = text
+        self.inlineReplyMarkup: InlineKeyboardMarkup = inlineReplyMarkup
+        self.disableWebPagePreview: bool = disableWebPagePreview
+
+    def __str__(self):
+        return "OutboundMessage(chatId=" + str(self.chatId) + ", text=" + self.text + ")"
+
+
+class OutboundDispatcher:
+    """Paces outbound Telegram messages: global token bucket (messages per second for the whole bot) and minimal
+    interval between two messages in the same chat. FloodWait blocks only the chat it was received for - other chats
+    keep their pace. Send functions are called in the caller's thread (send) or event loop (sendAsync); caller waits
+    for FloodWait of the chat (and retries) at most maxDirectWait seconds - with failFast (outbox, it retries the
+    message later) only maxInlineWait seconds. Otherwise ChatThrottled is raised (FloodWait when Telegram asks for a
+    longer wait). Token bucket is shared by all processes forked after the dispatcher is created (main and handler
+    process) - the global rate is the budget of the whole bot; chat intervals are kept per process"""
+
+    def __init__(self, globalRate: int = telegram_global_rate,
+                 privateChatInterval: float = telegram_private_chat_interval,
+                 groupChatInterval: float = telegram_group_chat_interval,
+                 floodWaitRetries: int = telegram_flood_wait_retries,
+                 maxInlineWait: int = telegram_max_inline_wait,
+                 maxDirectWait: int = telegram_max_direct_wait):
+        assert isinstance(globalRate, int) and globalRate > 0, "globalRate must be type of int and greater than 0"
+        assert isinstance(privateChatInterval, (int, float)), "privateChatInterval must be type of int or float"
+        assert isinstance(groupChatInterval, (int, float)), "groupChatInterval must be type of int or float"
+        assert isinstance(floodWaitRetries, int), "floodWaitRetries must be type of int"
+        assert isinstance(maxInlineWait, int), "maxInlineWait must be type of int"
+        assert isinstance(maxDirectWait, int), "maxDirectWait must be type of int"
+        self.globalRate: int = globalRate
+        self.privateChatInterval: float = float(privateChatInterval)
+        self.groupChatInterval: float = float(groupChatInterval)
+        self.floodWaitRetries: int = floodWaitRetries
+        self.maxInlineWait: int = maxInlineWait
+        self.maxDirectWait: int = maxDirectWait
+        # lock and bucket are in shared memory; lock also serializes threads of the same process
+        self._lock = multiprocessing.Lock()
+        self._tokens = multiprocessing.Value('d', float(globalRate), lock=False)
+        self._tokensAt = multiprocessing.Value('d', time.monotonic(), lock=False)
+        self._chatReadyAt: dict = {}  # chat key -> monotonic time when next message to the chat can be sent
+        self._chatBlockedUntil: dict = {}  # chat key -> monotonic time when FloodWait of the chat ends
+
+    @staticmethod
+    def key(chatId: (str, int)) -> str:
+        return str(chatId).lower()
+
+    @staticmethod
+    def isGroup(chatId: (str, int)) -> bool:
+        # groups, supergroups and channels have negative ids
+        return str(chatId).startswith("-")
+
+    def maxWait(self, failFast: bool) -> int:
+        return self.maxInlineWait if failFast else self.maxDirectWait
+
+    def reserve(self, chatId: (str, int), maxWait: int) -> float:
+        """Reserves a slot for one message to the chat; returns seconds to wait before sending it. Raises ChatThrottled
+        (nothing is reserved) when FloodWait of the chat ends later than in maxWait seconds"""
+        assert isinstance(chatId, (str, int)), "chatId must be type of str or int"
+        assert isinstance(maxWait, int), "maxWait must be type of int"
+        with self._lock:
+            now: float = time.monotonic()
+            key: str = self.key(chatId)
+            blockedFor: float = self._chatBlockedUntil.get(key, now) - now
+            if blockedFor > maxWait:
+                raise ChatThrottled(chatId=chatId, seconds=blockedFor)
+
+            # global bucket; tokens can go below zero - slots already promised to waiting senders
+            self._tokens.value = min(float(self.globalRate),
+                                     self._tokens.value + (now - self._tokensAt.value) * self.globalRate)
+            self._tokensAt.value = now
+            self._tokens.value -= 1
+            globalDelay: float = max(0.0, -self._tokens.value / self.globalRate)
+
+            sendAt: float = max(now + globalDelay, now + blockedFor, self._chatReadyAt.get(key, now))
+            interval: float = self.groupChatInterval if self.isGroup(chatId) else self.privateChatInterval
+            self._chatReadyAt[key] = sendAt + interval
+            self._cleanUp(now=now)
+            return sendAt - now
+
+    def backoff(self, chatId: (str, int), seconds: int):
+        """No message is sent to the chat in next n seconds (FloodWait)"""
+        assert isinstance(chatId, (str, int)), "chatId must be type of str or int"
+        assert isinstance(seconds, (int, float)), "seconds must be type of int or float"
+        with self._lock:
+            key: str = self.key(chatId)
+            self._chatBlockedUntil[key] = max(self._chatBlockedUntil.get(key, 0.0), time.monotonic() + seconds)
+
+    def _cleanUp(self, now: float):
+        if len(self._chatReadyAt) > 10000:
+            self._chatReadyAt = {key: readyAt for key, readyAt in self._chatReadyAt.items() if readyAt > now}
+            self._chatBlockedUntil = {key: blockedUntil for key, blockedUntil in self._chatBlockedUntil.items()
+                                      if blockedUntil > now}
+
+    def _canRetry(self, chatId: (str, int), floodWait: FloodWait, attempt: int, maxWait: int) -> bool:
+        LOG.warning("FloodWait for chat " + str(chatId) + "; waiting time (in seconds): " + str(floodWait.value) +
+                    "; attempt: " + str(attempt))
+        self.backoff(chatId=chatId, seconds=floodWait.value)
+        if attempt >= self.floodWaitRetries or floodWait.value > maxWait:
+            LOG.error("Message to chat " + str(chatId) + " is not sent now - waiting time is too long or too many "
+                                                            "attempts")
+            return False
+        return True
+
+    def send(self, chatId: (str, int), send, failFast: bool = False):
+        """Calls send() when the chat and the bot have a free slot. FloodWait is raised when retries run out or the
+        wait is too long, ChatThrottled when the chat is still blocked by earlier FloodWait"""
+        maxWait: int = self.maxWait(failFast=failFast)
+        attempt: int = 0
+        while True:
+            delay: float = self.reserve(chatId=chatId, maxWait=maxWait)
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                return send()
+            except FloodWait as e:
+                attempt += 1
+                if self._canRetry(chatId=chatId, floodWait=e, attempt=attempt, maxWait=maxWait) is False:
+                    raise
+
+    async def sendAsync(self, chatId: (str, int), send, failFast: bool = False):
+        """Async variant of send - send is function returning coroutine; waiting does not block the event loop"""
+        maxWait: int = self.maxWait(failFast=failFast)
+        attempt: int = 0
+        while True:
+            delay: float = self.reserve(chatId=chatId, maxWait=maxWait)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                return await send()
+            except FloodWait as e:
+                attempt += 1
+                if self._canRetry(chatId=chatId, floodWait=e, attempt=attempt, maxWait=maxWait) is False:
+                    raise
@@ -0,0 +1,218 @@
+import json
+import re
+from datetime import datetime, timedelta
+
+from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from constants import outbox_batch_size, outbox_max_attempts, outbox_retry_delay, telegram_send_concurrency
+from database import Database, Reminder, ReminderSendStatus
+from database.outboxMessage import OutboxMessage, OutboxStatus
+from log import Log
+from transmission.Communication import Communication, SessionType
+from transmission.outboundDispatcher import OutboundMessage
+
+LOG = Log(className="OutboxDispatcher")
+
+
+class OutboxDispatcherException(Exception):
+    pass
+
+
+class OutboxDispatcher:
+    """Messages are first written to the outbox table (with idempotency key) and then sent from it. Outcome of every
+    batch is written in one transaction (outbox status + reminderSent records); failed messages are retried with
+    growing delay. Messages which are not sent before the restart are sent by the next drain.
+    Enqueue joins the tick's unit of work; drain is called after the unit is committed (time critical reminders
+    commit the unit's work so far and drain right away) and only when a message is due - the time of the next due
+    message is kept in memory (shared by all dispatchers of the process)"""
+
+    # local time when the next message is due (None - nothing to send)
+    nextDueAt: datetime = None
+
+    def __init__(self, database: Database, communication: Communication, batchSize: int = outbox_batch_size,
+                 maxAttempts: int = outbox_max_attempts, retryDelay: int = outbox_retry_delay):
+        assert isinstance(database, Database), "database must be type of Database"
+        assert isinstance(communication, Communication), "communication must be type of Communication"
+        assert isinstance(batchSize, int) and batchSize > 0, "batchSize must be type of int and greater than 0"
+        assert isinstance(maxAttempts, int) and maxAttempts > 0, "maxAttempts must be type of int and greater than 0"
+        assert isinstance(retryDelay, int), "retryDelay must be type of int"
+        self.database: Database = database
+        self.communication: Communication = communication
+        self.batchSize: int = batchSize
+        self.maxAttempts: int = maxAttempts
+        self.retryDelay: int = retryDelay
+
+    @staticmethod
+    def reminderKey(reminder: Reminder, accountName: str, round: int = None) -> str:
+        return "reminder:" + str(reminder.reminderID) + ":" + accountName + ":" + str(round)
+
+    @staticmethod
+    def localExpiry(deadline: datetime, executionTime: datetime) -> datetime:
+        """Deadline is in chain (or demo) time like the execution time of the tick; outbox works in local time"""
+        assert isinstance(deadline, datetime), "deadline must be type of datetime"
+        assert isinstance(executionTime, datetime), "executionTime must be type of datetime"
+        return datetime.now() + (deadline - executionTime)
+
+    @staticmethod
+    def markupToJson(markup: InlineKeyboardMarkup) -> str:
+        """Only url buttons are stored"""
+        if markup is None:
+            return None
+        return json.dumps([[{'text': button.text, 'url': button.url} for button in row]
+                           for row in markup.inline_keyboard])
+
+    @staticmethod
+    def markupFromJson(markup: str) -> InlineKeyboardMarkup:
+        if markup is None:
+            return None
+        return InlineKeyboardMarkup([[InlineKeyboardButton(text=button['text'], url=button['url']) for button in row]
+                                     for row in json.loads(markup)])
+
+    @staticmethod
+    def chatIdFromString(chatID: str) -> (str, int):
+        # pyrogram handles numeric string as phone number
+        return int(chatID) if re.fullmatch(r"-?\d+", chatID.strip()) else chatID.strip()
+
+    def createMessage(self, idempotencyKey: str, chatId: (str, int), text: str,
+                      inlineReplyMarkup: InlineKeyboardMarkup = None, photoPath: str = None,
+                      reminder: Reminder = None, accountName: str = None, round: int = None,
+                      expiresAt: datetime = None) -> OutboxMessage:
+        assert isinstance(chatId, (str, int)), "chatId must be type of str or int"
+        assert isinstance(reminder, (Reminder, type(None))), "reminder must be type of Reminder or None"
+        return OutboxMessage(idempotencyKey=idempotencyKey,
+                             chatID=str(chatId),
+                             text=text,
+                             replyMarkup=self.markupToJson(inlineReplyMarkup),
+                             photoPath=photoPath,
+                             reminderID=reminder.reminderID if reminder is not None else None,
+                             accountName=accountName,
+                             round=round,
+                             expiresAt=expiresAt)
+
+    def createReminderMessage(self, message: OutboundMessage, reminder: Reminder, accountName: str,
+                              round: int = None, expiresAt: datetime = None) -> OutboxMessage:
+        assert isinstance(message, OutboundMessage), "message must be type of OutboundMessage"
+        assert isinstance(reminder, Reminder), "reminder must be type of Reminder"
+        return self.createMessage(idempotencyKey=self.reminderKey(reminder=reminder, accountName=accountName,
+                                                                  round=round),
+                                  chatId=message.chatId,
+                                  text=message.text,
+                                  inlineReplyMarkup=message.inlineReplyMarkup,
+                                  reminder=reminder,
+                                  accountName=accountName,
+                                  round=round,
+                                  expiresAt=expiresAt)
+
+    @classmethod
+    def scheduleAt(cls, dueAt: datetime):
+        if dueAt is not None and (cls.nextDueAt is None or dueAt < cls.nextDueAt):
+            cls.nextDueAt = dueAt
+
+    def isDue(self, now: datetime) -> bool:
+        assert isinstance(now, datetime), "now must be type of datetime"
+        return OutboxDispatcher.nextDueAt is not None and OutboxDispatcher.nextDueAt <= now
+
+    def loadNextDue(self):
+        """Reads the time of the next due message from the outbox (at the start and after every drain)"""
+        try:
+            OutboxDispatcher.nextDueAt = self.database.getNextOutboxAttempt()
+            LOG.debug("Next outbox message is due at: " + str(OutboxDispatcher.nextDueAt))
+        except Exception as e:
+            LOG.exception("Exception in OutboxDispatcher.loadNextDue: " + str(e))
+            OutboxDispatcher.nextDueAt = datetime.now() + timedelta(seconds=self.retryDelay)
+
+    def enqueue(self, messages: list[OutboxMessage]) -> int:
+        """Messages are sent by the drain after the unit of work is committed; returns number of new messages or
+        None on error"""
+        enqueued: int = self.database.enqueueOutboxMessages(messages=messages)
+        if enqueued is None:
+            LOG.error("Messages are not enqueued - they are not sent")
+        elif enqueued > 0:
+            self.scheduleAt(dueAt=datetime.now())
+        return enqueued
+
+    def drainIfDue(self) -> int:
+        """Drain only when a message is due - otherwise no query is made"""
+        if self.isDue(now=datetime.now()) is False:
+            return 0
+        return self.drain()
+
+    def sendBatch(self, batch: list[OutboxMessage]) -> list[bool]:
+        """Text messages are sent concurrently, photos one by one; throttled chats fail fast - retried by the outbox"""
+        results: dict = {}
+        texts: list[OutboxMessage] = [item for item in batch if item.photoPath is None]
+        sendResponses: list[bool] = self.communication.sendMessages(
+            messages=[OutboundMessage(chatId=self.chatIdFromString(item.chatID),
+                                      text=item.text,
+                                      inlineReplyMarkup=self.markupFromJson(item.replyMarkup))
+                      for item in texts],
+            concurrency=telegram_send_concurrency,
+            failFast=True)
+        for item, sendResponse in zip(texts, sendResponses):
+            results[item.outboxMessageID] = sendResponse
+
+        for item in batch:
+            if item.photoPath is not None:
+                results[item.outboxMessageID] = self.communication.sendPhoto(
+                    sessionType=SessionType.BOT,
+                    chatId=self.chatIdFromString(item.chatID),
+                    photoPath=item.photoPath,
+                    caption=item.text,
+                    replyMarkup=self.markupFromJson(item.replyMarkup),
+                    failFast=True) is True
+        return [results[item.outboxMessageID] for item in batch]
+
+    def drain(self) -> int:
+        """Sends due messages from the outbox in batches; returns number of sent messages"""
+        sent: int = 0
+        try:
+            while True:
+                now: datetime = datetime.now()
+                batch: list[OutboxMessage] = self.database.getDueOutboxMessages(now=now, limit=self.batchSize)
+                if batch is None:
+                    OutboxDispatcher.nextDueAt = now + timedelta(seconds=self.retryDelay)
+                    return sent
+                if len(batch) == 0:
+                    self.loadNextDue()
+                    return sent
+
+                expired: list[OutboxMessage] = [item for item in batch
+                                                if item.expiresAt is not None and item.expiresAt <= now]
+                toSend: list[OutboxMessage] = [item for item in batch if item not in expired]
+                sendResponses: list[bool] = self.sendBatch(batch=toSend)
+                updates: list[dict] = []
+                reminderSentRecords: list[tuple[int, str, int, ReminderSendStatus]] = []
+                for item, sendResponse in list(zip(toSend, sendResponses)) + [(item, None) for item in expired]:
+                    attempts: int = item.attempts + 1 if sendResponse is not None else item.attempts
+                    if sendResponse is None:
+                        status: OutboxStatus = OutboxStatus.FAILED
+                        LOG.warning("Outbox message expired at " + str(item.expiresAt) + " - not sent: " + str(item))
+                    elif sendResponse is True:
+                        status = OutboxStatus.SENT
+                        sent += 1
+                    elif attempts >= self.maxAttempts:
+                        status = OutboxStatus.FAILED
+                        LOG.error("Outbox message is not sent after " + str(attempts) + " attempts: " + str(item))
+                    else:
+                        status = OutboxStatus.PENDING
+                    updates.append({'outboxMessageID': item.outboxMessageID,
+                                    'status': status.value,
+                                    'attempts': attempts,
+                                    'nextAttempt': now + timedelta(seconds=self.retryDelay * 2 ** (attempts - 1))})
+                    if item.reminderID is not None and status is not OutboxStatus.PENDING:
+                        reminderSentRecords.append((item.reminderID, item.accountName, item.round,
+                                                    ReminderSendStatus.SEND if status is OutboxStatus.SENT
+                                                    else ReminderSendStatus.ERROR))
+
+                if self.database.updateOutboxMessages(updates=updates,
+                                                      reminderSentRecords=reminderSentRecords) is False:
+                    # messages would be sent again in the same drain
+                    LOG.error("Outbox status is not saved - stop sending")
+                    OutboxDispatcher.nextDueAt = now + timedelta(seconds=self.retryDelay)
+                    return sent
+                LOG.info("Outbox batch; sent: " + str(sendResponses.count(True)) + "/" + str(len(batch)) +
+                         ", expired: " + str(len(expired)))
+        except Exception as e:
+            LOG.exception("Exception in OutboxDispatcher.drain: " + str(e))
+            OutboxDispatcher.nextDueAt = datetime.now() + timedelta(seconds=self.retryDelay)
+            return sent